@@ -0,0 +1,60 @@
+import queue
+import threading
+
+# Background producers that keep fetching API pages while the caller
+# preprocesses and scores the previous ones.
+
+_DONE = object()
+
+
+def prefetch_pages(pages, max_prefetch=2):
+    # Runs the page iterator in a background thread and yields its pages through
+    # a bounded queue, so the next page is fetched while this one is processed
+    for _, page in prefetch_query_pages({None: pages}, max_prefetch=max_prefetch):
+        yield page
+
+
+def prefetch_query_pages(page_iters, max_prefetch=2):
+    # page_iters maps a query to its page iterator. Every iterator is drained by
+    # its own thread; (query, page) pairs are yielded as they arrive.
+    pages = queue.Queue(maxsize=max(1, max_prefetch))
+    stop = threading.Event()
+
+    def produce(query, page_iter):
+        try:
+            for page in page_iter:
+                if not _put(pages, (query, page), stop):
+                    return
+        except Exception as e:
+            _put(pages, (query, e), stop)
+        finally:
+            _put(pages, (query, _DONE), stop)
+
+    threads = [threading.Thread(target=produce, args=(query, page_iter), daemon=True)
+               for query, page_iter in page_iters.items()]
+    for thread in threads:
+        thread.start()
+
+    running = len(threads)
+    try:
+        while running:
+            query, page = pages.get()
+            if page is _DONE:
+                running -= 1
+            elif isinstance(page, Exception):
+                raise page
+            else:
+                yield query, page
+    finally:
+        # Let producers exit if the consumer stopped early
+        stop.set()
+
+
+def _put(pages, item, stop):
+    while not stop.is_set():
+        try:
+            pages.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
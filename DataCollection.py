@@ -1,25 +1,71 @@
+import threading
 import tweepy
+import requests
 import pandas as pd
-import time
+from RequestScheduler import RequestScheduler, TweetPage
+from QueryPlanner import QueryPlanner
+
+TWITTER_API_HOST = "https://api.twitter.com"
+
+class HeaderTrackingClient(tweepy.Client):
+    # tweepy.Client that remembers the headers of the last response (for the
+    # x-rate-limit-* values) and can be pointed at a different API host,
+    # e.g. FakeTwitterServer for local runs
+    def __init__(self, *args, api_host=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.last_response_headers = None
+        if api_host and api_host.rstrip('/') != TWITTER_API_HOST:
+            self.session = _HostRewritingSession(api_host.rstrip('/'))
+    
+    def request(self, *args, **kwargs):
+        response = super().request(*args, **kwargs)
+        self.last_response_headers = response.headers
+        return response
+
+class _HostRewritingSession(requests.Session):
+    def __init__(self, api_host):
+        super().__init__()
+        self.api_host = api_host
+    
+    def request(self, method, url, *args, **kwargs):
+        if url.startswith(TWITTER_API_HOST):
+            url = self.api_host + url[len(TWITTER_API_HOST):]
+        return super().request(method, url, *args, **kwargs)
 
 class TwitterDataCollector:
-    def __init__(self, bearer_token, api_key, api_secret, access_token, access_token_secret):
+    def __init__(self, bearer_token=None, api_key=None, api_secret=None, access_token=None,
+                 access_token_secret=None, client=None, scheduler=None, api_host=None, planner=None):
         self.bearer_token = bearer_token
         self.api_key = api_key
         self.api_secret = api_secret
         self.access_token = access_token
         self.access_token_secret = access_token_secret
-        self.setup_api()
+        self.api_host = api_host
+        # Shared by every query collected through this collector, including concurrent ones
+        self.scheduler = scheduler or RequestScheduler()
+        # Turns a query into what is sent to the API (server-side filters, tweet_fields)
+        self.planner = planner or QueryPlanner()
+        # Tweets returned by the API vs tweets kept, across every query
+        self.fetched = 0
+        self.kept = 0
+        self._stats_lock = threading.Lock()
+        
+        if client is not None:
+            # Any object with a tweepy-style search_recent_tweets, e.g. FakeTwitterClient
+            self.client = client
+        else:
+            self.setup_api()
     
     def setup_api(self):
-        # Setup Twitter API v2 client
-        self.client = tweepy.Client(
+        # Setup Twitter API v2 client; rate limits are paced by self.scheduler
+        self.client = HeaderTrackingClient(
             bearer_token=self.bearer_token,
             consumer_key=self.api_key,
             consumer_secret=self.api_secret,
             access_token=self.access_token,
             access_token_secret=self.access_token_secret,
-            wait_on_rate_limit=True  # Automatically handles basic rate limits
+            wait_on_rate_limit=False,
+            api_host=self.api_host
         )
         
         # Setup v1.1 API for optional future use
@@ -27,61 +73,115 @@ class TwitterDataCollector:
         auth.set_access_token(self.access_token, self.access_token_secret)
         self.api = tweepy.API(auth, wait_on_rate_limit=True)
 
-    def collect_tweets(self, query, max_tweets=10):
+    def collect_tweets(self, query, max_tweets=10, since_id=None, columns=None):
         tweets_data = []
-        next_token = None
-        collected = 0
+        for page in self.iter_tweet_pages(query, max_tweets, since_id=since_id, columns=columns):
+            tweets_data.extend(page)
+        return pd.DataFrame(tweets_data)
 
-        print(f"[INFO] Starting tweet collection for query: '{query}' (max {max_tweets} tweets)")
+    def iter_tweet_pages(self, query, max_tweets=10, checkpoint=None, since_id=None, columns=None,
+                         next_token=None):
+        # Yields one TweetPage of tweet dicts per API page so callers can process
+        # tweets while collection is still running. Every page carries the
+        # next_token to resume after it, and a run that completes ends with an
+        # empty page marked finished whose next_token is None once pagination
+        # is exhausted. With a CollectionCheckpoint the caller saves that state
+        # with checkpoint.commit after processing each page, and an interrupted
+        # run for the same query resumes where it stopped; pages with nothing
+        # kept are yielded for committing too. since_id limits the search to
+        # tweets newer than that id (incremental collection) and next_token
+        # starts from a page an earlier run did not reach. columns limits the
+        # tweet dicts (and the tweet_fields requested) to what the caller needs.
+        state = checkpoint.get(query) if checkpoint is not None else {}
+        collected = state.get('collected', 0)
+        if state.get('next_token'):
+            next_token = state['next_token']
+            if 'since_id' in state:
+                # A next_token is only valid with the since_id it was issued for
+                since_id = state['since_id']
+        search_kwargs = {'since_id': since_id} if since_id is not None else {}
+        plan = self.planner.plan(query, columns)
+        # Tweets fetched and kept by this call; collected includes those of a resumed run
+        fetched = kept = 0
+        finished = False
+
+        if next_token:
+            print(f"[INFO] Resuming collection for query: '{query}' ({collected} tweets already collected)")
+        else:
+            print(f"[INFO] Starting tweet collection for query: '{query}' (max {max_tweets} tweets)")
 
         while collected < max_tweets:
             try:
                 print(f"[DEBUG] Collecting batch... Collected so far: {collected}")
 
-                response = self.client.search_recent_tweets(
-                    query=query,
-                    tweet_fields=['created_at', 'author_id', 'public_metrics', 'lang'],
-                    max_results=min(100, max_tweets - collected),
-                    next_token=next_token
+                response = self.scheduler.call(
+                    self.client.search_recent_tweets,
+                    query=plan.query,
+                    tweet_fields=plan.tweet_fields or None,
+                    max_results=max(10, min(100, max_tweets - collected)),
+                    next_token=next_token,
+                    headers_source=self.client,
+                    **search_kwargs
                 )
+            except Exception as e:
+                # Retries are exhausted or the error is permanent; the checkpoint
+                # (if any) keeps the last next_token so the run can be resumed
+                print(f"[ERROR] Unexpected error: {e}")
+                break
 
-                if response.data:
-                    for tweet in response.data:
-                        if tweet.lang == 'en':
-                            tweets_data.append({
-                                'id': tweet.id,
-                                'text': tweet.text,
-                                'created_at': tweet.created_at,
-                                'author_id': tweet.author_id,
-                                'retweet_count': tweet.public_metrics['retweet_count'],
-                                'like_count': tweet.public_metrics['like_count'],
-                                'reply_count': tweet.public_metrics['reply_count'],
-                            })
-                            collected += 1
-                            if collected >= max_tweets:
-                                break
-
-                    next_token = response.meta.get('next_token')
-                    if not next_token:
-                        print("[INFO] No more tweets available from API.")
+            if not response.data:
+                print("[INFO] No tweets returned in response.")
+                next_token = None
+                finished = True
+                break
+
+            page = []
+            fetched += len(response.data)
+            for tweet in response.data:
+                if self._keep(tweet, plan):
+                    page.append(self._tweet_record(tweet, plan.columns))
+                    collected += 1
+                    if collected >= max_tweets:
                         break
+            kept += len(page)
+            with self._stats_lock:
+                self.fetched += len(response.data)
+                self.kept += len(page)
 
-                else:
-                    print("[INFO] No tweets returned in response.")
-                    break
+            next_token = response.meta.get('next_token')
+            if page or checkpoint is not None:
+                yield TweetPage(page, {'next_token': next_token, 'collected': collected, 'since_id': since_id})
 
-            except tweepy.TooManyRequests as e:
-                # Handle rate limits with sleep
-                reset_time = int(e.response.headers.get('x-rate-limit-reset', time.time() + 900))
-                sleep_time = max(reset_time - time.time(), 0)
-                print(f"[WARNING] Rate limit hit. Sleeping for {int(sleep_time)} seconds...")
-                time.sleep(sleep_time + 5)  # Add buffer
-            except Exception as e:
-                print(f"[ERROR] Unexpected error: {e}")
+            if not next_token:
+                print("[INFO] No more tweets available from API.")
+                finished = True
                 break
+        else:
+            finished = True
 
-        print(f"[INFO] Finished collecting {len(tweets_data)} tweets.")
-        return pd.DataFrame(tweets_data)
+        if finished:
+            yield TweetPage(checkpoint_state={'finished': True, 'next_token': next_token, 'since_id': since_id})
+        ratio = f" ({kept / fetched:.0%} of {fetched} fetched kept)" if fetched else ""
+        print(f"[INFO] Finished collecting {collected} tweets{ratio}.")
+
+    @staticmethod
+    def _keep(tweet, plan):
+        # Only filters the query could not carry are checked here
+        if 'lang' in plan.client_filters and tweet.lang != plan.lang:
+            return False
+        if 'retweet' in plan.client_filters and tweet.text.startswith('RT @'):
+            return False
+        return True
+
+    @staticmethod
+    def _tweet_record(tweet, columns):
+        record = {}
+        for column in columns:
+            if column in ('retweet_count', 'like_count', 'reply_count'):
+                record[column] = tweet.public_metrics[column]
+            else:
+                record[column] = getattr(tweet, column)
+        return record
 
 # Optional test run (for standalone use)
 if __name__ == "__main__":
@@ -0,0 +1,130 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+# Offline stand-in for the Hugging Face Inference API text-classification
+# endpoint (POST /models/<model>), for exercising HuggingFaceClient and the
+# huggingface_api method without a token or network access. Point
+# SentimentAnalyzer(hf_api_url=server.model_url(...)) or HF_API_URL at it.
+
+POSITIVE = set("love great happy awesome amazing best fast good fix launch".split())
+NEGATIVE = set("hate terrible sad broken worst slow bug bad awful".split())
+
+
+class FakeInferenceServer:
+    # loading_requests: the first N requests answer 503 "model is loading" with
+    # an estimated_time, like a cold model; error_every: every Nth request
+    # after that returns 503; latency/per_text_latency: simulated inference time
+    def __init__(self, loading_requests=0, estimated_time=0.05, error_every=0, latency=0.0,
+                 per_text_latency=0.0, max_inputs=64, port=0):
+        self.loading_requests = loading_requests
+        self.estimated_time = estimated_time
+        self.error_every = error_every
+        self.latency = latency
+        self.per_text_latency = per_text_latency
+        self.max_inputs = max_inputs
+        self.requests = 0
+        self.inputs = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), self._make_handler())
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def model_url(self, model_name="cardiffnlp/twitter-roberta-base-sentiment-latest"):
+        return f"{self.url}/models/{model_name}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def handle_classify(self, body):
+        with self._lock:
+            self.requests += 1
+            request_number = self.requests
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if request_number <= self.loading_requests:
+                return 503, {"error": "Model is currently loading", "estimated_time": self.estimated_time}
+            if self.error_every and request_number % self.error_every == 0:
+                return 503, {"error": "Service Unavailable"}
+
+            try:
+                inputs = json.loads(body)['inputs']
+            except (ValueError, KeyError, TypeError):
+                return 400, {"error": "Expected a JSON body with inputs"}
+            single = isinstance(inputs, str)
+            texts = [inputs] if single else inputs
+            if len(texts) > self.max_inputs:
+                return 413, {"error": f"At most {self.max_inputs} inputs per request"}
+
+            time.sleep(self.latency + self.per_text_latency * len(texts))
+            with self._lock:
+                self.inputs += len(texts)
+            results = [self.classify(text) for text in texts]
+            return 200, results[0] if single else results
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    @staticmethod
+    def classify(text):
+        # Word-count lexicon; scores sorted highest first like the real API
+        words = text.lower().split()
+        positive = sum(word in POSITIVE for word in words)
+        negative = sum(word in NEGATIVE for word in words)
+        raw = {'positive': 1.0 + 2 * positive, 'negative': 1.0 + 2 * negative, 'neutral': 2.0}
+        total = sum(raw.values())
+        return sorted(({'label': label, 'score': value / total} for label, value in raw.items()),
+                      key=lambda item: -item['score'])
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                super().setup()
+                with server._lock:
+                    server.connections += 1
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length)
+                if not urlparse(self.path).path.startswith('/models/'):
+                    status, response = 404, {"error": "Not Found"}
+                else:
+                    status, response = server.handle_classify(body)
+
+                payload = json.dumps(response).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,235 @@
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# Offline stand-ins for the Twitter API v2 recent search endpoint, used to
+# exercise the collector and pipeline without network access or credentials:
+# FakeTwitterClient replaces tweepy.Client in-process, FakeTwitterServer is a
+# local HTTP stub that a real tweepy client can be pointed at (api_host=...).
+
+# Search operators the fakes understand; everything else in a query is search terms
+OPERATOR = re.compile(r'(?<![\w-])(-?)(lang|is):(\w+)')
+PROJECTED_FIELDS = ('created_at', 'author_id', 'public_metrics', 'lang')
+
+WORDS = ("love hate great terrible python release bug fix happy sad awesome broken "
+         "today launch update slow fast amazing worst best meh okay").split()
+
+
+class FakeTweet:
+    def __init__(self, tweet_id, text, created_at, author_id, public_metrics, lang='en'):
+        self.id = tweet_id
+        self.text = text
+        self.created_at = created_at
+        self.author_id = author_id
+        self.public_metrics = public_metrics
+        self.lang = lang
+
+    def __getitem__(self, key):
+        return getattr(self, key)
+
+
+class FakeResponse:
+    def __init__(self, data, meta):
+        self.data = data
+        self.meta = meta
+        self.includes = {}
+        self.errors = []
+
+
+class FakeTwitterClient:
+    def __init__(self, total_tweets=1000, latency=0.0, non_english_ratio=0.1, seed=0):
+        self.total_tweets = total_tweets
+        self.latency = latency  # seconds slept per request, to mimic network wait
+        self.non_english_ratio = non_english_ratio
+        self.seed = seed
+        self.calls = 0
+        self.start_time = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    def make_tweet(self, query, index):
+        rng = random.Random(f"{self.seed}:{query}:{index}")
+        words = [rng.choice(WORDS) for _ in range(rng.randint(4, 20))]
+        if rng.random() < 0.3:
+            words.insert(0, f"@user{rng.randint(0, 500)}")
+        if rng.random() < 0.3:
+            words.append(f"#{query.split()[0] if query.split() else 'tag'}")
+        if rng.random() < 0.2:
+            words.append(f"https://t.co/{rng.randint(0, 10 ** 6)}")
+        if rng.random() < 0.1:
+            words = ['RT', f"@user{rng.randint(0, 50)}:"] + words
+
+        return FakeTweet(
+            tweet_id=10 ** 18 + index,
+            text=' '.join(words),
+            created_at=self.start_time + timedelta(seconds=index * 37),
+            author_id=rng.randint(1, 10 ** 6),
+            public_metrics={
+                'retweet_count': rng.randint(0, 50),
+                'like_count': rng.randint(0, 500),
+                'reply_count': rng.randint(0, 20),
+                'quote_count': rng.randint(0, 5),
+            },
+            lang='fr' if rng.random() < self.non_english_ratio else 'en',
+        )
+
+    def search_recent_tweets(self, query, max_results=10, next_token=None, since_id=None, tweet_fields=None,
+                             **kwargs):
+        # Tweet i has id 10**18 + i; raise total_tweets to simulate new tweets arriving.
+        # Like the real endpoint, results come newest first and next_token pages
+        # towards older tweets, down to since_id (exclusive).
+        # lang:, is:retweet and is:reply operators (a reply starts with a mention)
+        # filter server-side; with tweet_fields, unrequested fields come back None.
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+        terms = ' '.join(OPERATOR.sub('', query).replace('(', ' ').replace(')', ' ').split())
+        operators = OPERATOR.findall(query)
+        if isinstance(tweet_fields, str):
+            tweet_fields = tweet_fields.split(',')
+
+        index = int(next_token) if next_token else self.total_tweets - 1
+        oldest = int(since_id) - 10 ** 18 + 1 if since_id is not None else 0
+        data = []
+        while len(data) < max_results and index >= oldest:
+            tweet = self.make_tweet(terms, index)
+            index -= 1
+            if all(_matches(tweet, negated, name, value) for negated, name, value in operators):
+                if tweet_fields is not None:
+                    for field in PROJECTED_FIELDS:
+                        if field not in tweet_fields:
+                            setattr(tweet, field, None)
+                data.append(tweet)
+        meta = {'result_count': len(data)}
+        if index >= oldest:
+            meta['next_token'] = str(index)
+        return FakeResponse(data or None, meta)
+
+
+def _matches(tweet, negated, name, value):
+    if name == 'lang':
+        matched = tweet.lang == value
+    elif value == 'retweet':
+        matched = tweet.text.startswith('RT @')
+    elif value == 'reply':
+        matched = tweet.text.startswith('@')
+    else:
+        matched = True
+    return matched != bool(negated)
+
+
+class FakeTwitterServer:
+    # Local stub of GET /2/tweets/search/recent with x-rate-limit-* headers,
+    # 429s once the window budget is spent, and optional injected 503s
+    def __init__(self, total_tweets=1000, rate_limit=450, window_seconds=900,
+                 error_every=0, port=0, seed=0):
+        self.tweets = FakeTwitterClient(total_tweets=total_tweets, seed=seed)
+        self.rate_limit = rate_limit
+        self.window_seconds = window_seconds
+        self.error_every = error_every  # every Nth request returns 503; 0 disables
+        self.requests = 0
+        self.rate_limited = 0
+        self.window_start = time.time()
+        self.window_used = 0
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), self._make_handler())
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def handle_search(self, params):
+        with self._lock:
+            self.requests += 1
+            now = time.time()
+            if now - self.window_start >= self.window_seconds:
+                self.window_start = now
+                self.window_used = 0
+            reset = int(self.window_start + self.window_seconds)
+
+            if self.error_every and self.requests % self.error_every == 0:
+                return 503, {}, {"title": "Service Unavailable", "detail": "Injected failure"}
+
+            if self.window_used >= self.rate_limit:
+                self.rate_limited += 1
+                headers = self._rate_headers(0, reset)
+                return 429, headers, {"title": "Too Many Requests", "detail": "Too Many Requests"}
+
+            self.window_used += 1
+            headers = self._rate_headers(self.rate_limit - self.window_used, reset)
+
+        query = params.get('query', [''])[0]
+        max_results = int(params.get('max_results', ['10'])[0])
+        response = self.tweets.search_recent_tweets(query, max_results=max_results,
+                                                    next_token=params.get('next_token', [None])[0],
+                                                    since_id=params.get('since_id', [None])[0],
+                                                    tweet_fields=params.get('tweet.fields', [None])[0])
+        data = []
+        for tweet in response.data or []:
+            fields = {
+                'id': str(tweet.id),
+                'edit_history_tweet_ids': [str(tweet.id)],
+                'text': tweet.text,
+                'created_at': tweet.created_at.strftime('%Y-%m-%dT%H:%M:%S.000Z') if tweet.created_at else None,
+                'author_id': str(tweet.author_id) if tweet.author_id else None,
+                'lang': tweet.lang,
+                'public_metrics': tweet.public_metrics,
+            }
+            data.append({key: value for key, value in fields.items() if value is not None})
+        body = {'meta': response.meta}
+        if data:
+            body['data'] = data
+        return 200, headers, body
+
+    def _rate_headers(self, remaining, reset):
+        return {
+            'x-rate-limit-limit': str(self.rate_limit),
+            'x-rate-limit-remaining': str(remaining),
+            'x-rate-limit-reset': str(reset),
+        }
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                if parsed.path != '/2/tweets/search/recent':
+                    status, headers, body = 404, {}, {"title": "Not Found"}
+                else:
+                    status, headers, body = server.handle_search(parse_qs(parsed.query))
+
+                payload = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,149 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_API_BASE = "https://api-inference.huggingface.co/models"
+
+# 503 is the Inference API's "model is loading" answer; 429 and 5xx gateway
+# errors are also worth another try
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+TRANSIENT_ERRORS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+)
+
+
+class InferenceAPIError(Exception):
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class HuggingFaceClient:
+    # Text classification over the Hugging Face Inference API. Texts are sent
+    # as list inputs of batch_size, up to max_concurrency requests in flight,
+    # all over one pooled keep-alive Session. Loading/overload responses are
+    # retried with jittered exponential backoff (honouring the API's
+    # estimated_time hint); anything else fails that batch with an
+    # InferenceAPIError, without affecting the other batches.
+    def __init__(self, api_url, token=None, batch_size=16, max_concurrency=4, timeout=30.0,
+                 max_retries=5, base_delay=1.0, max_delay=30.0):
+        self.api_url = api_url
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        if token:
+            self.session.headers['Authorization'] = f"Bearer {token}"
+
+        self.api_calls = 0
+        self.retries = 0
+        self.sleep_time = 0.0
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def classify(self, texts):
+        # Returns (results, errors): one list of {'label', 'score'} dicts per
+        # text in input order, None for texts whose batch failed, and
+        # {text index: InferenceAPIError} for those texts
+        texts = list(texts)
+        starts = range(0, len(texts), self.batch_size)
+        batches = [texts[start:start + self.batch_size] for start in starts]
+        if len(batches) <= 1 or self.max_concurrency <= 1:
+            outcomes = map(self._post_batch, batches)
+        else:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix='hf-api')
+            outcomes = self._executor.map(self._post_batch, batches)
+
+        results = [None] * len(texts)
+        errors = {}
+        for start, batch, outcome in zip(starts, batches, outcomes):
+            if isinstance(outcome, InferenceAPIError):
+                errors.update((index, outcome) for index in range(start, start + len(batch)))
+            else:
+                results[start:start + len(batch)] = outcome
+        return results, errors
+
+    def stats(self):
+        return {
+            'api_calls': self.api_calls,
+            'retries': self.retries,
+            'sleep_time': round(self.sleep_time, 3),
+        }
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        self.session.close()
+
+    def _post_batch(self, batch):
+        try:
+            return self._post(batch)
+        except InferenceAPIError as e:
+            return e
+
+    def _post(self, batch):
+        payload = {"inputs": batch, "options": {"wait_for_model": True}}
+        attempt = 0
+        while True:
+            with self._lock:
+                self.api_calls += 1
+            hint = None
+            try:
+                response = self.session.post(self.api_url, json=payload, timeout=self.timeout)
+            except TRANSIENT_ERRORS as e:
+                error = InferenceAPIError(f"Inference API request failed: {e}")
+            else:
+                if response.status_code == 200:
+                    return self._parse(response.json(), len(batch))
+                body = _json_or_none(response)
+                message = body.get('error') if isinstance(body, dict) else response.text[:200]
+                error = InferenceAPIError(f"Inference API returned {response.status_code}: {message}",
+                                          status=response.status_code)
+                if response.status_code not in RETRY_STATUSES:
+                    raise error
+                if isinstance(body, dict):
+                    hint = body.get('estimated_time')
+
+            attempt += 1
+            if attempt > self.max_retries:
+                raise error
+            # Full jitter, but never shorter than the model's estimated load time
+            delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+            if hint:
+                delay = max(delay, min(float(hint), self.max_delay))
+            print(f"[WARNING] {error}. Retry {attempt}/{self.max_retries} in {delay:.1f}s...")
+            with self._lock:
+                self.retries += 1
+                self.sleep_time += delay
+            time.sleep(delay)
+
+    @staticmethod
+    def _parse(result, expected):
+        # A single input may come back unnested as one list of label scores
+        if expected == 1 and isinstance(result, list) and result and isinstance(result[0], dict):
+            result = [result]
+        if not isinstance(result, list) or len(result) != expected:
+            raise InferenceAPIError(f"Unexpected Inference API response for {expected} inputs")
+        return result
+
+
+def _json_or_none(response):
+    try:
+        return response.json()
+    except ValueError:
+        return None
@@ -0,0 +1,126 @@
+import json
+import os
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+def peak_rss_mb():
+    # Peak resident set size of this process so far (ru_maxrss is KB on Linux, bytes on macOS)
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+class PipelineMetrics:
+    # Per-run timings of the pipeline stages plus run-level counters (cache
+    # hits, API calls, rate-limit sleep...). Stages entered more than once,
+    # e.g. once per page in streaming runs, accumulate into one record.
+    def __init__(self, labels=None):
+        self.run_id = uuid.uuid4().hex[:12]
+        self.started_at = datetime.now(timezone.utc)
+        self.labels = dict(labels or {})
+        self.stages = {}
+        self.counters = {}
+        self._start = time.perf_counter()
+        self._wall_seconds = None
+
+    @contextmanager
+    def stage(self, name):
+        # Yields the stage record; callers add the number of items they handled:
+        #   with metrics.stage('score') as stage:
+        #       ...
+        #       stage['items'] += len(texts)
+        record = self.stages.setdefault(name, {'calls': 0, 'items': 0, 'wall_seconds': 0.0, 'cpu_seconds': 0.0})
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield record
+        finally:
+            record['calls'] += 1
+            record['wall_seconds'] += time.perf_counter() - wall
+            # process_time covers every thread, including background collectors
+            record['cpu_seconds'] += time.process_time() - cpu
+            record['peak_rss_mb'] = peak_rss_mb()
+
+    def finish(self, **counters):
+        self.counters.update(counters)
+        self._wall_seconds = time.perf_counter() - self._start
+        return self
+
+    def to_record(self):
+        stages = {}
+        for name, record in self.stages.items():
+            stages[name] = dict(record)
+            stages[name]['items_per_second'] = (
+                record['items'] / record['wall_seconds'] if record['wall_seconds'] > 0 else 0.0
+            )
+        return {
+            'run_id': self.run_id,
+            'started_at': self.started_at.isoformat(),
+            'wall_seconds': self._wall_seconds if self._wall_seconds is not None else time.perf_counter() - self._start,
+            'peak_rss_mb': peak_rss_mb(),
+            'labels': self.labels,
+            'stages': stages,
+            'counters': self.counters,
+        }
+
+    def write_jsonl(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'a') as f:
+            f.write(json.dumps(self.to_record()) + "\n")
+
+    def to_prometheus(self):
+        # Prometheus text exposition format, e.g. for node_exporter's textfile collector
+        record = self.to_record()
+        labels = {'run_id': record['run_id'], **{k: str(v) for k, v in self.labels.items()}}
+        lines = []
+
+        def metric(name, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            for extra, value in samples:
+                if value is not None:
+                    lines.append(f"{name}{_format_labels({**labels, **extra})} {value}")
+
+        stages = record['stages']
+        metric('pipeline_stage_wall_seconds', 'Wall-clock time spent in each pipeline stage',
+               [({'stage': s}, r['wall_seconds']) for s, r in stages.items()])
+        metric('pipeline_stage_cpu_seconds', 'Process CPU time spent in each pipeline stage',
+               [({'stage': s}, r['cpu_seconds']) for s, r in stages.items()])
+        metric('pipeline_stage_items', 'Items handled by each pipeline stage',
+               [({'stage': s}, r['items']) for s, r in stages.items()])
+        metric('pipeline_stage_items_per_second', 'Throughput of each pipeline stage',
+               [({'stage': s}, r['items_per_second']) for s, r in stages.items()])
+        metric('pipeline_run_wall_seconds', 'Wall-clock time of the whole run', [({}, record['wall_seconds'])])
+        metric('pipeline_peak_rss_megabytes', 'Peak resident set size of the process', [({}, record['peak_rss_mb'])])
+        for name, value in record['counters'].items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                metric(f"pipeline_{name}", f"Run counter {name}", [({}, value)])
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        # Written to a temporary file first so scrapers never see a partial file
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    pairs = []
+    for key, value in labels.items():
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{key}="{value}"')
+    return "{" + ",".join(pairs) + "}"
@@ -0,0 +1,176 @@
+import copy
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from SentimentAggregates import SentimentAggregates
+from SentimentTrends import SentimentTrends
+
+# Runs pipeline analyses in background threads so callers (the Streamlit app)
+# can poll progress and partial results, or cancel, while a run is in flight.
+
+FINISHED_STATUSES = ('done', 'cancelled', 'failed')
+
+
+class AnalysisJob:
+    def __init__(self, query, max_tweets, method):
+        self.id = uuid.uuid4().hex[:8]
+        self.query = query
+        self.max_tweets = max_tweets
+        self.method = method
+        self.status = 'queued'
+        self.collected = 0
+        self.analyzed = 0
+        self.error = None
+        self.summary = None
+        self.metrics = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+        self._pages = []
+        self._results = None
+        self._aggregates = SentimentAggregates()
+        self._aggregates_snapshot = None
+        self._trends = SentimentTrends()
+        self._trends_snapshot = None
+        self._lock = threading.Lock()
+
+    @property
+    def done(self):
+        return self.status in FINISHED_STATUSES
+
+    @property
+    def progress(self):
+        # Fraction of the requested tweets collected so far
+        if self.status == 'done':
+            return 1.0
+        return min(1.0, self.collected / self.max_tweets) if self.max_tweets else 0.0
+
+    def results(self):
+        # Every page scored so far, as one DataFrame (rebuilt only when pages arrived)
+        with self._lock:
+            if self._results is None:
+                self._results = pd.concat(self._pages, ignore_index=True) if self._pages else pd.DataFrame()
+            return self._results
+
+    def aggregates(self):
+        # Kept up to date page by page; callers get a copy they can read while
+        # the job keeps adding pages (copied only when pages arrived)
+        with self._lock:
+            if self._aggregates_snapshot is None:
+                self._aggregates_snapshot = copy.deepcopy(self._aggregates)
+            return self._aggregates_snapshot
+
+    def trends(self):
+        # Sentiment over time, kept up to date and copied the same way as aggregates()
+        with self._lock:
+            if self._trends_snapshot is None:
+                self._trends_snapshot = copy.deepcopy(self._trends)
+            return self._trends_snapshot
+
+    def add_page(self, query, scored_df, totals):
+        page_aggregates = SentimentAggregates.from_dataframe(scored_df) if scored_df is not None else None
+        page_trends = SentimentTrends.from_dataframe(scored_df) if scored_df is not None else None
+        with self._lock:
+            if scored_df is not None:
+                self._pages.append(scored_df)
+                self._aggregates.merge(page_aggregates)
+                self._trends.merge(page_trends)
+                self._results = None
+                self._aggregates_snapshot = None
+                self._trends_snapshot = None
+            self.collected = totals['collected']
+            self.analyzed = totals['analyzed']
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'query': self.query,
+            'max_tweets': self.max_tweets,
+            'method': self.method,
+            'status': self.status,
+            'collected': self.collected,
+            'analyzed': self.analyzed,
+            'progress': self.progress,
+            'error': self.error,
+            'submitted_at': self.submitted_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+
+
+class JobManager:
+    def __init__(self, max_workers=2, max_finished_jobs=50):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='analysis-job')
+        self._jobs = OrderedDict()
+        self._futures = {}
+        self._lock = threading.Lock()
+        self.max_finished_jobs = max_finished_jobs
+
+    def submit(self, pipeline, query, max_tweets=1000, method='textblob', save_results=False):
+        # Jobs run the streaming pipeline so results arrive page by page
+        job = AnalysisJob(query, max_tweets, method)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+            self._futures[job.id] = self._executor.submit(self._run, job, pipeline, save_results)
+        return job
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def jobs(self):
+        return list(self._jobs.values())
+
+    def cancel(self, job_id):
+        job = self._jobs.get(job_id)
+        if job is None or job.done:
+            return False
+        job.cancel_event.set()
+        future = self._futures.get(job_id)
+        if future is not None and future.cancel():
+            # Never started, so it will never mark itself
+            job.status = 'cancelled'
+            job.finished_at = time.time()
+        return True
+
+    def shutdown(self, cancel_running=True):
+        if cancel_running:
+            for job in self.jobs():
+                self.cancel(job.id)
+        self._executor.shutdown(wait=True)
+
+    def _run(self, job, pipeline, save_results):
+        if job.cancel_event.is_set():
+            job.status = 'cancelled'
+            job.finished_at = time.time()
+            return
+
+        job.status = 'running'
+        job.started_at = time.time()
+        try:
+            summaries = pipeline.run_queries_streaming(
+                [job.query], job.max_tweets, job.method,
+                save_results=save_results, on_page=job.add_page, cancel_event=job.cancel_event
+            )
+            job.summary = summaries[job.query]
+            job.metrics = pipeline.metrics
+            job.status = 'cancelled' if job.summary['cancelled'] else 'done'
+        except Exception as e:
+            print(f"Error in analysis job {job.id}: {e}")
+            job.error = str(e)
+            job.status = 'failed'
+        finally:
+            job.finished_at = time.time()
+
+    def _prune(self):
+        # Forget the oldest finished jobs so a long-lived manager doesn't grow forever
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        for job_id in finished[:max(0, len(finished) - self.max_finished_jobs)]:
+            del self._jobs[job_id]
+            self._futures.pop(job_id, None)
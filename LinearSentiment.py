@@ -0,0 +1,149 @@
+import os
+import time
+import uuid
+
+import joblib
+import numpy as np
+from scipy.special import softmax
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import train_test_split
+from sklearn.metrics import classification_report, accuracy_score
+
+LABELS = ['negative', 'neutral', 'positive']
+DEFAULT_MODEL_PATH = "linear_sentiment_model.joblib"
+
+
+class LinearSentimentModel:
+    # TF-IDF + logistic regression student model distilled from RoBERTa labels.
+    # Scoring a batch is one sparse (texts x features) @ dense (features x 3) product.
+    def __init__(self, vectorizer, classifier, version=None, evaluation=None):
+        self.vectorizer = vectorizer
+        self.classifier = classifier
+        self.version = version or uuid.uuid4().hex[:12]
+        self.evaluation = evaluation or {}
+        self._build_weights()
+
+    @classmethod
+    def train(cls, texts, labels, test_size=0.2, max_features=200000, C=4.0, random_state=42):
+        vectorizer = TfidfVectorizer(ngram_range=(1, 2), min_df=2, max_features=max_features,
+                                     sublinear_tf=True, dtype=np.float32)
+        features = vectorizer.fit_transform(texts)
+        labels = np.asarray(labels)
+
+        X_train, X_test, y_train, y_test = train_test_split(
+            features, labels, test_size=test_size, random_state=random_state
+        )
+        classifier = LogisticRegression(C=C, max_iter=1000)
+        classifier.fit(X_train, y_train)
+
+        predictions = classifier.predict(X_test)
+        evaluation = {
+            'train_size': int(X_train.shape[0]),
+            'test_size': int(X_test.shape[0]),
+            'agreement': float(accuracy_score(y_test, predictions)),
+            'report': classification_report(y_test, predictions, zero_division=0),
+        }
+        return cls(vectorizer, classifier, evaluation=evaluation)
+
+    def predict_proba(self, texts):
+        # Returns a (len(texts), 3) float32 matrix in LABELS order
+        features = self.vectorizer.transform(texts)
+        logits = features @ self._weights + self._bias
+        return softmax(np.asarray(logits), axis=1).astype(np.float32)
+
+    def save(self, path=DEFAULT_MODEL_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        joblib.dump({
+            'vectorizer': self.vectorizer,
+            'classifier': self.classifier,
+            'version': self.version,
+            'evaluation': self.evaluation,
+        }, path)
+
+    @classmethod
+    def load(cls, path=DEFAULT_MODEL_PATH):
+        bundle = joblib.load(path)
+        return cls(bundle['vectorizer'], bundle['classifier'],
+                   version=bundle['version'], evaluation=bundle.get('evaluation'))
+
+    def _build_weights(self):
+        # Lay the coefficients out as a dense (features x 3) matrix in LABELS
+        # order; labels the teacher never produced get a -inf logit
+        n_features = self.classifier.coef_.shape[1]
+        weights = np.zeros((n_features, len(LABELS)), dtype=np.float32)
+        bias = np.full(len(LABELS), -np.inf, dtype=np.float32)
+        classes = list(self.classifier.classes_)
+
+        if len(classes) == 2:
+            # Binary logistic regression: softmax over [0, z] equals sigmoid(z)
+            positive = LABELS.index(classes[1])
+            weights[:, positive] = self.classifier.coef_[0]
+            bias[LABELS.index(classes[0])] = 0.0
+            bias[positive] = self.classifier.intercept_[0]
+        else:
+            for row, label in enumerate(classes):
+                weights[:, LABELS.index(label)] = self.classifier.coef_[row]
+                bias[LABELS.index(label)] = self.classifier.intercept_[row]
+
+        self._weights = weights
+        self._bias = bias
+
+
+def prepare_texts(analyzer, texts):
+    # What the model sees of each text, when trained and when scoring
+    # (method='linear'): the same @user/http masking as RoBERTa's input
+    return [analyzer.preprocess_for_roberta(text) for text in texts]
+
+
+def distill(analyzer, texts, teacher='roberta', batch_size=32, **train_kwargs):
+    # Labels texts with the teacher backend and trains a LinearSentimentModel on
+    # them, prepared (train and held-out alike) the way scoring prepares them
+    texts = list(dict.fromkeys(texts))
+    print(f"[INFO] Labelling {len(texts)} texts with '{teacher}'...")
+    results = analyzer.batch_analyze(texts, method=teacher, batch_size=batch_size)
+    labelled = [(text, result['sentiment']) for text, result in zip(texts, results)
+                if result is not None and 'error' not in result]
+
+    print(f"[INFO] Training linear model on {len(labelled)} labelled texts...")
+    model = LinearSentimentModel.train(prepare_texts(analyzer, [t for t, _ in labelled]),
+                                       [l for _, l in labelled], **train_kwargs)
+
+    # Throughput of the student on the whole corpus, for comparison with the teacher
+    start = time.perf_counter()
+    model.predict_proba(prepare_texts(analyzer, [t for t, _ in labelled]))
+    model.evaluation['texts_per_second'] = len(labelled) / max(time.perf_counter() - start, 1e-9)
+    model.evaluation['teacher'] = teacher
+    return model
+
+
+# Train from the command line, e.g. on a CSV written by the pipeline:
+#   python LinearSentiment.py sentiment_analysis_python.csv --out linear_sentiment_model.joblib
+if __name__ == "__main__":
+    import argparse
+    import pandas as pd
+    from SentimentAnalysis import SentimentAnalyzer
+
+    parser = argparse.ArgumentParser(description="Distill RoBERTa sentiment labels into a linear model")
+    parser.add_argument("corpus", help="CSV or Parquet file/directory with a text column")
+    parser.add_argument("--text-column", default="cleaned_text")
+    parser.add_argument("--teacher", default="roberta")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--out", default=os.getenv("LINEAR_MODEL_PATH", DEFAULT_MODEL_PATH))
+    args = parser.parse_args()
+
+    if args.corpus.endswith('.csv'):
+        corpus = pd.read_csv(args.corpus, usecols=[args.text_column])
+    else:
+        corpus = pd.read_parquet(args.corpus, columns=[args.text_column])
+    texts = corpus[args.text_column].dropna().astype(str).tolist()
+
+    model = distill(SentimentAnalyzer(), texts, teacher=args.teacher, batch_size=args.batch_size)
+    model.save(args.out)
+
+    print(f"Agreement with {args.teacher} on held-out texts: {model.evaluation['agreement']:.3f}")
+    print(model.evaluation['report'])
+    print(f"Linear model throughput: {model.evaluation['texts_per_second']:.0f} texts/sec")
+    print(f"Model saved to {args.out} (version {model.version})")
@@ -0,0 +1,148 @@
+import os
+import threading
+
+# Process-wide registry so every SentimentAnalyzer (and every Streamlit session)
+# shares one copy of each model, loaded the first time it is needed.
+_models = {}
+_locks = {}
+_registry_lock = threading.Lock()
+
+
+def get_model(key, loader):
+    model = _models.get(key)
+    if model is not None:
+        return model
+
+    # One lock per key so loading one model never blocks lookups of another
+    with _registry_lock:
+        lock = _locks.setdefault(key, threading.Lock())
+
+    with lock:
+        model = _models.get(key)
+        if model is None:
+            print(f"[INFO] Loading model {key}...")
+            model = loader()
+            _models[key] = model
+    return model
+
+
+def is_loaded(key):
+    return key in _models
+
+
+def loaded_models():
+    return list(_models.keys())
+
+
+def unload(key=None):
+    with _registry_lock:
+        if key is None:
+            _models.clear()
+        else:
+            _models.pop(key, None)
+
+
+def load_roberta(model_name):
+    # Heavy imports stay here so importing the analyzer is cheap
+    from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name)
+    model.eval()
+    return tokenizer, model
+
+
+def load_roberta_int8(model_name):
+    # Dynamic int8 quantization of every Linear layer; weights are quantized
+    # once here and activations on the fly, which suits CPU-only hosts
+    import torch
+
+    tokenizer, model = get_model(('roberta', model_name), lambda: load_roberta(model_name))
+    quantized = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    quantized.eval()
+    return tokenizer, quantized
+
+
+def onnx_export_dir(model_name):
+    base = os.getenv("ONNX_MODEL_DIR", os.path.join(os.path.expanduser("~"), ".cache", "twitter-sentiment", "onnx"))
+    return os.path.join(base, model_name.replace('/', '--'))
+
+
+def export_onnx(model_name, export_dir=None, quantize=True):
+    # Exports the model to ONNX once and caches it (plus its tokenizer) on disk.
+    # Returns the path of the model file to serve. Model files are written
+    # under a temporary name and renamed into place, so an existing file is
+    # always a complete export, and a file lock makes concurrent processes
+    # (e.g. scoring workers on a cold cache) wait for one export instead of
+    # writing the same files at once.
+    from filelock import FileLock
+
+    export_dir = export_dir or onnx_export_dir(model_name)
+    fp32_path = os.path.join(export_dir, "model.onnx")
+    int8_path = os.path.join(export_dir, "model.int8.onnx")
+    target = int8_path if quantize else fp32_path
+    if os.path.exists(target):
+        return target
+
+    os.makedirs(export_dir, exist_ok=True)
+    with FileLock(os.path.join(export_dir, ".export.lock")):
+        if not os.path.exists(target):
+            _export_onnx(model_name, export_dir, fp32_path, int8_path if quantize else None)
+    return target
+
+
+def _export_onnx(model_name, export_dir, fp32_path, int8_path):
+    import torch
+
+    if not os.path.exists(fp32_path):
+        print(f"[INFO] Exporting {model_name} to ONNX in {export_dir}...")
+        tokenizer, model = get_model(('roberta', model_name), lambda: load_roberta(model_name))
+        tokenizer.save_pretrained(export_dir)
+        dummy = tokenizer(["exporting the sentiment model"], return_tensors='pt')
+        tmp_path = fp32_path + ".tmp"
+        torch.onnx.export(
+            model,
+            (dummy['input_ids'], dummy['attention_mask']),
+            tmp_path,
+            input_names=['input_ids', 'attention_mask'],
+            output_names=['logits'],
+            dynamic_axes={
+                'input_ids': {0: 'batch', 1: 'sequence'},
+                'attention_mask': {0: 'batch', 1: 'sequence'},
+                'logits': {0: 'batch'},
+            },
+            opset_version=17,
+            dynamo=False,
+        )
+        os.replace(tmp_path, fp32_path)
+
+    if int8_path is not None:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+
+        print("[INFO] Quantizing ONNX model to int8...")
+        tmp_path = int8_path + ".tmp"
+        quantize_dynamic(fp32_path, tmp_path, weight_type=QuantType.QInt8)
+        os.replace(tmp_path, int8_path)
+
+
+def load_roberta_onnx(model_name, export_dir=None, quantize=True):
+    import onnxruntime as ort
+    from transformers import AutoTokenizer
+
+    export_dir = export_dir or onnx_export_dir(model_name)
+    path = export_onnx(model_name, export_dir, quantize=quantize)
+    tokenizer = AutoTokenizer.from_pretrained(export_dir)
+    options = ort.SessionOptions()
+    if os.getenv('OMP_NUM_THREADS'):
+        # Parallel scoring workers cap their thread count through OMP_NUM_THREADS
+        options.intra_op_num_threads = int(os.environ['OMP_NUM_THREADS'])
+    session = ort.InferenceSession(path, sess_options=options, providers=['CPUExecutionProvider'])
+    return tokenizer, session
+
+
+def load_linear(path):
+    from LinearSentiment import LinearSentimentModel
+
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No linear sentiment model at {path}; train one with LinearSentiment.py")
+    return LinearSentimentModel.load(path)
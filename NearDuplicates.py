@@ -0,0 +1,145 @@
+import re
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+# Retweets of a tweet differ from it only by this prefix (after cleaning,
+# mentions are 'user'), so it is left out of the shingles
+RETWEET_PREFIX = re.compile(r'^\s*rt\s+@?user\w*\s*:?\s*', re.IGNORECASE)
+
+# Splitmix64 finalizer constants. Shingle ids are mixed once; each MinHash
+# permutation is then a multiply-add-shift of the mixed value, all in
+# wrapping uint64 arithmetic.
+_MIX_1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX_2 = np.uint64(0x94D049BB133111EB)
+
+
+def _mix(x):
+    x = (x ^ (x >> np.uint64(30))) * _MIX_1
+    x = (x ^ (x >> np.uint64(27))) * _MIX_2
+    return x ^ (x >> np.uint64(31))
+
+
+def _fold(block):
+    key = np.zeros(len(block), dtype=np.uint64)
+    for column in block.T:
+        key = _mix(key ^ column)
+    return key
+
+
+def _permute(hashes, multiplier, increment):
+    return ((hashes * multiplier + increment) >> np.uint64(32)).astype(np.uint32)
+
+
+class NearDuplicateDetector:
+    # Groups near-identical tweets (retweets, template spam, the same text with
+    # a different link or mention) with MinHash + LSH so only one tweet per
+    # group needs to be scored. Shingles are word unigrams and bigrams; LSH
+    # candidates are kept only when their estimated Jaccard similarity reaches
+    # threshold, and clusters are the connected components of those pairs.
+    def __init__(self, threshold=0.7, num_perm=64, bands=16, seed=0):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        # One odd multiplier and one increment per permutation
+        seeds = np.random.default_rng(seed).integers(0, 2 ** 64 - 1, (num_perm, 2), dtype=np.uint64, endpoint=True)
+        seeds[:, 0] |= np.uint64(1)
+        self.seeds = seeds
+        self.last_stats = None
+
+    def cluster(self, texts):
+        # Returns one cluster id per text, numbered in order of first appearance
+        texts = list(texts)
+        n = len(texts)
+        if n == 0:
+            return np.zeros(0, dtype=np.int64)
+
+        signatures, has_shingles = self._signatures(texts)
+        candidates = np.flatnonzero(has_shingles)
+        rows_per_band = self.num_perm // self.bands
+
+        edges = []
+        for band in range(self.bands):
+            block = signatures[candidates, band * rows_per_band:(band + 1) * rows_per_band].astype(np.uint64)
+            # Band rows folded into one uint64 bucket key; a rare collision only
+            # adds a candidate pair, which the similarity check below rejects
+            keys = _fold(block)
+            # Link every text to the first text that fell in the same bucket
+            _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+            heads = candidates[first[inverse.ravel()]]
+            linked = candidates != heads
+            edges.append(np.stack([candidates[linked], heads[linked]]))
+
+        # Each pair once, however many bands it shared
+        pairs = np.unique(np.concatenate([docs * n + heads for docs, heads in edges]))
+        edges = np.stack([pairs // n, pairs % n])
+        if edges.shape[1]:
+            similarity = (signatures[edges[0]] == signatures[edges[1]]).mean(axis=1)
+            edges = edges[:, similarity >= self.threshold]
+
+        graph = coo_matrix((np.ones(edges.shape[1], dtype=np.int8), (edges[0], edges[1])), shape=(n, n))
+        _, labels = connected_components(graph, directed=False)
+        cluster_ids = pd.factorize(labels)[0]
+
+        clusters = int(cluster_ids.max()) + 1
+        self.last_stats = {
+            'texts': n,
+            'clusters': clusters,
+            'reduction_ratio': 1 - clusters / n,
+        }
+        return cluster_ids
+
+    def annotate(self, df, text_column='cleaned_text'):
+        # Adds cluster_id and cluster_size columns; the first row of each cluster is its representative
+        df = df.copy()
+        df['cluster_id'] = self.cluster(df[text_column].tolist()) if len(df) else np.zeros(0, dtype=np.int64)
+        df['cluster_size'] = df.groupby('cluster_id')['cluster_id'].transform('size').astype(np.int64)
+        return df
+
+    @staticmethod
+    def representatives(df):
+        return df.drop_duplicates('cluster_id')
+
+    def _signatures(self, texts):
+        # Word ids over the whole batch at once; bigram shingles are
+        # (id1 + 1) << 32 | id2 so they never collide with unigram ids. MinHash
+        # ignores repeated shingles, so nothing is deduplicated per text.
+        words = [RETWEET_PREFIX.sub('', str(text), count=1).split() for text in texts]
+        lengths = np.fromiter((len(w) for w in words), dtype=np.int64, count=len(words))
+        has_shingles = lengths > 0
+
+        # Texts without words keep an all-max signature and are never linked
+        signatures = np.full((len(texts), self.num_perm), np.iinfo(np.uint32).max, dtype=np.uint32)
+        if not has_shingles.any():
+            return signatures, has_shingles
+
+        ids = pd.factorize(np.fromiter(chain.from_iterable(words), dtype=object, count=int(lengths.sum())))[0]
+        ids = ids.astype(np.uint64)
+        unigram_starts = (np.cumsum(lengths) - lengths)[has_shingles]
+
+        # A bigram starts at every word except each text's last
+        bigram_lengths = np.maximum(lengths - 1, 0)
+        has_bigrams = bigram_lengths > 0
+        last_words = np.cumsum(lengths)[has_shingles] - 1
+        starts_bigram = np.ones(len(ids), dtype=bool)
+        starts_bigram[last_words] = False
+        bigrams = ((ids[:-1][starts_bigram[:-1]] + np.uint64(1)) << np.uint64(32)) | ids[1:][starts_bigram[:-1]]
+        bigram_starts = (np.cumsum(bigram_lengths) - bigram_lengths)[has_bigrams]
+
+        unigram_hashes = _mix(ids)
+        bigram_hashes = _mix(bigrams)
+        unigram_rows = np.flatnonzero(has_shingles)
+        bigram_rows = np.flatnonzero(has_bigrams)
+        for column, (multiplier, increment) in enumerate(self.seeds):
+            signatures[unigram_rows, column] = np.minimum.reduceat(
+                _permute(unigram_hashes, multiplier, increment), unigram_starts)
+            if len(bigram_rows):
+                signatures[bigram_rows, column] = np.minimum(
+                    signatures[bigram_rows, column],
+                    np.minimum.reduceat(_permute(bigram_hashes, multiplier, increment), bigram_starts))
+        return signatures, has_shingles
@@ -0,0 +1,103 @@
+import re
+
+# Recent search rejects queries longer than this (standard access)
+MAX_QUERY_LENGTH = 512
+
+# Tweet columns the collector can produce and the v2 tweet_fields each one needs
+# (id and text always come back)
+COLUMN_FIELDS = {
+    'id': None,
+    'text': None,
+    'created_at': 'created_at',
+    'author_id': 'author_id',
+    'retweet_count': 'public_metrics',
+    'like_count': 'public_metrics',
+    'reply_count': 'public_metrics',
+}
+
+# Columns each pipeline stage reads from the collected tweets
+STAGE_COLUMNS = {
+    'preprocess': ('id', 'text'),
+    'score': ('text',),
+    'insights': ('text', 'created_at', 'retweet_count', 'like_count', 'reply_count'),
+    'visualize': ('text', 'created_at', 'retweet_count', 'like_count', 'reply_count'),
+    'trends': ('created_at', 'retweet_count', 'like_count', 'reply_count'),
+    'save': tuple(COLUMN_FIELDS),
+    'store': tuple(COLUMN_FIELDS),
+}
+
+_LANG_OPERATOR = re.compile(r'(?<![\w-])-?lang:\w+')
+_RETWEET_OPERATOR = re.compile(r'(?<![\w-])-?is:retweet\b')
+_REPLY_OPERATOR = re.compile(r'(?<![\w-])-?is:reply\b')
+
+
+class QueryPlan:
+    def __init__(self, query, tweet_fields, columns, client_filters, lang=None):
+        self.query = query  # what is sent to the API
+        self.tweet_fields = tweet_fields
+        self.columns = columns
+        # Filters the API could not apply, checked per tweet instead ('lang', 'retweet')
+        self.client_filters = client_filters
+        self.lang = lang
+
+    def __repr__(self):
+        return f"QueryPlan(query={self.query!r}, tweet_fields={self.tweet_fields}, client_filters={self.client_filters})"
+
+
+class QueryPlanner:
+    # Pushes the pipeline's filters into the v2 search query (lang:en,
+    # -is:retweet, optionally -is:reply) so the API stops returning tweets that
+    # would be thrown away, and asks only for the tweet_fields behind the
+    # columns the downstream stages need. Operators the user already put in
+    # the query are left as they are. If pushing a filter down would make the
+    # query too long, that filter is applied client-side instead. With
+    # pushdown=False every filter is applied client-side (the old behaviour).
+    def __init__(self, lang='en', exclude_retweets=True, exclude_replies=False, pushdown=True):
+        self.lang = lang
+        self.exclude_retweets = exclude_retweets
+        self.exclude_replies = exclude_replies
+        self.pushdown = pushdown
+
+    @staticmethod
+    def columns_for(stages):
+        # Union of the columns the given stages declare, in COLUMN_FIELDS order
+        needed = {column for stage in stages for column in STAGE_COLUMNS[stage]}
+        return [column for column in COLUMN_FIELDS if column in needed]
+
+    def plan(self, query, columns=None):
+        columns = list(columns or COLUMN_FIELDS)
+        filters = []
+        if self.lang and not _LANG_OPERATOR.search(query):
+            filters.append(('lang', f"lang:{self.lang}"))
+        if self.exclude_retweets and not _RETWEET_OPERATOR.search(query):
+            filters.append(('retweet', "-is:retweet"))
+        if self.exclude_replies and not _REPLY_OPERATOR.search(query):
+            filters.append(('reply', "-is:reply"))
+
+        # Top-level OR binds looser than the appended operators
+        base = f"({query})" if re.search(r'\bOR\b', query) and not _is_grouped(query) else query
+        client_filters = []
+        while filters and (not self.pushdown or len(' '.join([base] + [op for _, op in filters])) > MAX_QUERY_LENGTH):
+            name, _ = filters.pop()
+            if name != 'reply':  # replies can't be told apart without extra expansions
+                client_filters.append(name)
+        planned = ' '.join([base] + [op for _, op in filters]) if filters else query
+
+        fields = {COLUMN_FIELDS[column] for column in columns if COLUMN_FIELDS.get(column)}
+        if 'lang' in client_filters:
+            fields.add('lang')
+        return QueryPlan(planned, sorted(fields), columns, client_filters, lang=self.lang)
+
+
+def _is_grouped(query):
+    # True when the whole query is one parenthesised group
+    query = query.strip()
+    if not (query.startswith('(') and query.endswith(')')):
+        return False
+    depth = 0
+    for i, char in enumerate(query):
+        depth += char == '('
+        depth -= char == ')'
+        if depth == 0 and i < len(query) - 1:
+            return False
+    return True
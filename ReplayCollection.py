@@ -0,0 +1,321 @@
+import gzip
+import json
+import mmap
+import os
+import re
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+from QueryPlanner import QueryPlanner, COLUMN_FIELDS
+from RequestScheduler import TweetPage
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+# Bytes read per chunk; each chunk ends on a line boundary
+CHUNK_SIZE = 8 * 1024 * 1024
+
+_V1_TIME_FORMAT = '%a %b %d %H:%M:%S %z %Y'
+_TERM = re.compile(r'"[^"]*"|\S+')
+
+
+class ArchiveTweetCollector:
+    # Drop-in replacement for TwitterDataCollector that replays tweets from
+    # local JSONL/NDJSON archives (.gz and .zst too) instead of calling the API,
+    # for backfills and fully offline runs. Each line is one tweet, either
+    # API v2 shaped ({"id", "text", "public_metrics": {...}, ...}), flat like the
+    # collector's own records, a v1.1 status, or a whole API response
+    # ({"data": [...]}). Plain files are memory-mapped and read in chunks;
+    # the query's terms are matched against the raw bytes first, so lines that
+    # cannot match are never parsed. Queries follow the search syntax the
+    # pipeline uses: terms (quoted phrases, -negation, OR), lang: and is:retweet
+    # / is:reply, with the same QueryPlanner filters the live collector pushes down.
+    def __init__(self, paths, page_size=500, planner=None, chunk_size=CHUNK_SIZE):
+        if isinstance(paths, str):
+            paths = [paths]
+        self.paths = [path for spec in paths for path in _expand(spec)]
+        self.page_size = page_size
+        self.planner = planner or QueryPlanner()
+        self.chunk_size = chunk_size
+        # Archive records read vs tweets kept, across every query
+        self.fetched = 0
+        self.kept = 0
+        self._stats_lock = threading.Lock()
+
+    def collect_tweets(self, query, max_tweets=10, since_id=None, columns=None):
+        tweets_data = []
+        for page in self.iter_tweet_pages(query, max_tweets, since_id=since_id, columns=columns):
+            tweets_data.extend(page)
+        return pd.DataFrame(tweets_data)
+
+    def iter_tweet_pages(self, query, max_tweets=10, checkpoint=None, since_id=None, columns=None,
+                         next_token=None):
+        # Same contract as TwitterDataCollector.iter_tweet_pages, including
+        # checkpoints committed by the caller; next_token is
+        # "<archive index>:<byte offset>" of the first unread line
+        state = checkpoint.get(query) if checkpoint is not None else {}
+        collected = state.get('collected', 0)
+        if state.get('next_token'):
+            next_token = state['next_token']
+            since_id = state.get('since_id', since_id)
+        plan = self.planner.plan(query, columns)
+        matcher = _QueryMatcher(plan.query)
+        since_id = int(since_id) if since_id is not None else None
+        start_index, start_offset = (int(part) for part in next_token.split(':')) if next_token else (0, 0)
+
+        if next_token:
+            print(f"[INFO] Resuming replay for query: '{query}' ({collected} tweets already collected)")
+        else:
+            print(f"[INFO] Replaying archived tweets for query: '{query}' (max {max_tweets} tweets)")
+
+        fetched = 0
+        page = []
+        done = collected >= max_tweets
+        for index in range(start_index, len(self.paths)):
+            if done:
+                break
+            path = self.paths[index]
+            for line, offset in _iter_lines(path, start_offset if index == start_index else 0, self.chunk_size):
+                if not matcher.may_match(line):
+                    fetched += 1
+                    continue
+                for tweet in _records(line):
+                    fetched += 1
+                    if since_id is not None and int(tweet.get('id') or 0) <= since_id:
+                        continue
+                    if not matcher.matches(tweet):
+                        continue
+                    page.append(_project(tweet, plan.columns))
+                    collected += 1
+                    if collected >= max_tweets:
+                        done = True
+                        break
+                if len(page) >= self.page_size or done:
+                    self._count(fetched, len(page))
+                    fetched = 0
+                    next_token = f"{index}:{offset}"
+                    yield TweetPage(page, {'next_token': next_token, 'collected': collected, 'since_id': since_id})
+                    page = []
+                if done:
+                    break
+
+        if page or fetched:
+            self._count(fetched, len(page))
+        if not done:
+            # Every archive was read to the end
+            next_token = None
+        if page:
+            yield TweetPage(page, {'next_token': next_token, 'collected': collected, 'since_id': since_id})
+        yield TweetPage(checkpoint_state={'finished': True, 'next_token': next_token, 'since_id': since_id})
+        print(f"[INFO] Finished replaying {collected} tweets.")
+
+    def _count(self, fetched, kept):
+        with self._stats_lock:
+            self.fetched += fetched
+            self.kept += kept
+
+
+class _QueryMatcher:
+    # Evaluates a planned search query against archived tweets: top-level OR
+    # groups of terms that must all appear in the text (case-insensitive),
+    # -term exclusions, and lang:/is:retweet/is:reply operators
+    def __init__(self, query):
+        self.groups = []
+        self.operators = []
+        for group in re.split(r'\s+OR\s+', query.replace('(', ' ').replace(')', ' ')):
+            required, excluded = [], []
+            for token in _TERM.findall(group):
+                negated = token.startswith('-') and len(token) > 1
+                term = token[1:] if negated else token
+                if re.fullmatch(r'(lang|is):\w+', term):
+                    self.operators.append((negated, *term.split(':')))
+                elif term != '*':  # '*' replays everything
+                    (excluded if negated else required).append(term.strip('"').lower())
+            if required or excluded:
+                self.groups.append((required, excluded))
+        # Raw-bytes prefilter: some group's required terms must all be in the line.
+        # Terms JSON may escape (non-ASCII, quotes, slashes) can't be looked for in raw bytes.
+        self._prefilters = None
+        if self.groups and all(required for required, _ in self.groups):
+            prefilters = [[term.encode() for term in required if term.isascii() and not set(term) & set('"\\/')]
+                          for required, _ in self.groups]
+            if all(prefilters):
+                self._prefilters = prefilters
+
+    def may_match(self, line):
+        if self._prefilters is None:
+            return True
+        line = line.lower()
+        return any(all(term in line for term in terms) for terms in self._prefilters)
+
+    def matches(self, tweet):
+        text = (tweet.get('text') or '').lower()
+        if self.groups and not any(all(term in text for term in required) and
+                                   not any(term in text for term in excluded)
+                                   for required, excluded in self.groups):
+            return False
+        for negated, name, value in self.operators:
+            if name == 'lang':
+                matched = tweet.get('lang', value) == value
+            elif value == 'retweet':
+                matched = tweet['text'].startswith('RT @')
+            elif value == 'reply':
+                matched = bool(tweet.get('in_reply_to_user_id')) or tweet['text'].startswith('@')
+            else:
+                matched = True
+            if matched == negated:
+                return False
+        return True
+
+
+def _expand(spec):
+    # A file or a directory of archives (sorted, so replays are repeatable)
+    if os.path.isdir(spec):
+        return [os.path.join(spec, name) for name in sorted(os.listdir(spec))
+                if name.endswith(('.jsonl', '.ndjson', '.json', '.gz', '.zst'))]
+    return [spec]
+
+
+def _iter_lines(path, offset=0, chunk_size=CHUNK_SIZE):
+    # Yields (line, offset just past it); offsets are into the decompressed stream
+    if path.endswith(('.gz', '.zst')):
+        yield from _iter_stream_lines(_open_compressed(path), offset, chunk_size)
+        return
+
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            position = offset
+            while position < size:
+                end = min(position + chunk_size, size)
+                if end < size:
+                    newline = mm.rfind(b'\n', position, end)
+                    end = newline + 1 if newline >= position else (mm.find(b'\n', end) + 1 or size)
+                for line in mm[position:end].split(b'\n'):
+                    position += len(line) + 1
+                    if line.strip():
+                        yield line, min(position, size)
+                position = end
+
+
+def _iter_stream_lines(stream, offset, chunk_size):
+    with stream:
+        # Compressed streams can't seek; resuming decompresses up to the offset
+        remaining = offset
+        while remaining:
+            data = stream.read(min(chunk_size, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+        position = offset
+        tail = b''
+        while True:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                break
+            lines = (tail + chunk).split(b'\n')
+            tail = lines.pop()
+            for line in lines:
+                position += len(line) + 1
+                if line.strip():
+                    yield line, position
+        if tail.strip():
+            yield tail, position + len(tail)
+
+
+def _open_compressed(path):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rb')
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError(f"Reading {path} needs the zstandard package (pip install zstandard)")
+    return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+
+
+def _records(line):
+    try:
+        record = _loads(line)
+    except ValueError:
+        return []
+    if isinstance(record, dict) and isinstance(record.get('data'), list):
+        return [_normalize(tweet) for tweet in record['data'] if isinstance(tweet, dict)]
+    return [_normalize(record)] if isinstance(record, dict) else []
+
+
+def _normalize(tweet):
+    # v1.1 statuses carry full_text/id_str/favorite_count and a user object
+    if 'full_text' in tweet or 'id_str' in tweet:
+        return {
+            'id': int(tweet.get('id_str') or tweet.get('id')),
+            'text': tweet.get('full_text') or tweet.get('text') or '',
+            'created_at': tweet.get('created_at'),
+            'author_id': (tweet.get('user') or {}).get('id'),
+            'lang': tweet.get('lang'),
+            'in_reply_to_user_id': tweet.get('in_reply_to_user_id'),
+            'public_metrics': {'retweet_count': tweet.get('retweet_count', 0),
+                               'like_count': tweet.get('favorite_count', 0),
+                               'reply_count': tweet.get('reply_count', 0)},
+        }
+    return tweet
+
+
+def _project(tweet, columns):
+    metrics = tweet.get('public_metrics') or {}
+    record = {}
+    for column in columns:
+        if column in ('retweet_count', 'like_count', 'reply_count'):
+            record[column] = metrics.get(column, tweet.get(column, 0))
+        elif column == 'created_at':
+            record[column] = _parse_time(tweet.get('created_at'))
+        elif column in ('id', 'author_id'):
+            value = tweet.get(column)
+            record[column] = int(value) if value is not None else None
+        else:
+            record[column] = tweet.get(column)
+    return record
+
+
+def _parse_time(value):
+    if not isinstance(value, str):
+        return value
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        try:
+            return datetime.strptime(value, _V1_TIME_FORMAT)
+        except ValueError:
+            return None
+
+
+def write_archive(tweets_df, path):
+    # Writes collector-shaped tweets as API v2 JSON lines (.gz/.zst compressed by extension)
+    columns = [column for column in COLUMN_FIELDS if column in tweets_df.columns]
+    if path.endswith('.gz'):
+        f = gzip.open(path, 'wt', encoding='utf-8')
+    elif path.endswith('.zst'):
+        import zstandard
+        f = zstandard.open(path, 'wt', encoding='utf-8')
+    else:
+        f = open(path, 'w', encoding='utf-8')
+    with f:
+        for row in tweets_df[columns].itertuples(index=False):
+            row = row._asdict()
+            # Collector output is English-only
+            tweet = {'id': str(row['id']), 'text': row['text'], 'lang': 'en'}
+            if 'created_at' in row:
+                created_at = pd.Timestamp(row['created_at'])
+                tweet['created_at'] = None if pd.isna(created_at) else created_at.strftime('%Y-%m-%dT%H:%M:%S.000Z')
+            if 'author_id' in row:
+                tweet['author_id'] = str(row['author_id'])
+            tweet['public_metrics'] = {c: int(row[c]) for c in ('retweet_count', 'like_count', 'reply_count')
+                                       if c in row}
+            f.write(json.dumps(tweet, ensure_ascii=False) + '\n')
+    return path
@@ -0,0 +1,220 @@
+import json
+import os
+import random
+import threading
+import time
+
+import requests
+import tweepy
+
+# Errors worth retrying: Twitter 5xx responses and dropped/timed out connections
+TRANSIENT_ERRORS = (
+    tweepy.TwitterServerError,
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+)
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate  # tokens per second
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        # Blocks until a token is available and returns the time spent waiting
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                wait = (1 - self.tokens) / self.rate if self.rate > 0 else 1.0
+            time.sleep(wait)
+            waited += wait
+
+    def set_rate(self, rate, capacity=None):
+        with self._lock:
+            self._refill()
+            self.rate = rate
+            if capacity is not None:
+                self.capacity = capacity
+                self.tokens = min(self.tokens, capacity)
+
+    def fill(self):
+        with self._lock:
+            self.tokens = self.capacity
+            self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+
+class RequestScheduler:
+    # Paces Twitter API calls with a token bucket, follows the x-rate-limit-*
+    # headers, and retries transient failures with jittered exponential backoff.
+    # One scheduler is shared by every thread using the same API credentials.
+    def __init__(self, max_requests=450, window_seconds=900, burst=None,
+                 max_retries=5, base_delay=1.0, max_delay=60.0):
+        self.default_rate = max_requests / window_seconds
+        self.burst = burst or max(1, max_requests // 15)
+        self.bucket = TokenBucket(self.default_rate, self.burst)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self.remaining = None
+        self.reset_at = None
+        self.api_calls = 0
+        self.retries = 0
+        self.rate_limit_hits = 0
+        self.sleep_time = 0.0
+        self._lock = threading.Lock()
+
+    def call(self, fn, *args, headers_source=None, **kwargs):
+        # headers_source is the object exposing last_response_headers (the client)
+        attempt = 0
+        while True:
+            self._wait_for_reset()
+            waited = self.bucket.acquire()
+            with self._lock:
+                self.sleep_time += waited
+                self.api_calls += 1
+
+            try:
+                result = fn(*args, **kwargs)
+            except tweepy.TooManyRequests as e:
+                with self._lock:
+                    self.rate_limit_hits += 1
+                headers = getattr(e.response, 'headers', None) or {}
+                self.update_from_headers(headers)
+                with self._lock:
+                    self.remaining = 0
+                    if self.reset_at is None or self.reset_at <= time.time():
+                        # No usable reset header; back off for a full window
+                        self.reset_at = time.time() + 900
+                print("[WARNING] Rate limit hit. Waiting until reset...")
+                continue
+            except TRANSIENT_ERRORS as e:
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise
+                # Full jitter: sleep a random time up to the exponential cap
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+                print(f"[WARNING] Transient error ({e}). Retry {attempt}/{self.max_retries} in {delay:.1f}s...")
+                with self._lock:
+                    self.retries += 1
+                    self.sleep_time += delay
+                time.sleep(delay)
+                continue
+
+            if headers_source is not None:
+                self.update_from_headers(getattr(headers_source, 'last_response_headers', None))
+            return result
+
+    def update_from_headers(self, headers):
+        if not headers:
+            return
+        remaining = headers.get('x-rate-limit-remaining')
+        reset = headers.get('x-rate-limit-reset')
+        if remaining is None or reset is None:
+            return
+
+        with self._lock:
+            self.remaining = int(remaining)
+            self.reset_at = float(reset)
+            seconds_left = self.reset_at - time.time()
+
+        if self.remaining > 0 and seconds_left > 0:
+            # Spread what is left of this window evenly over the time left in it
+            self.bucket.set_rate(self.remaining / seconds_left)
+
+    def stats(self):
+        return {
+            'api_calls': self.api_calls,
+            'retries': self.retries,
+            'rate_limit_hits': self.rate_limit_hits,
+            'sleep_time': round(self.sleep_time, 3),
+            'remaining': self.remaining,
+            'reset_at': self.reset_at,
+        }
+
+    def _wait_for_reset(self):
+        with self._lock:
+            if self.remaining is None or self.remaining > 0 or self.reset_at is None:
+                return
+            wait = self.reset_at - time.time() + 1  # one second of slack for clock skew
+
+        if wait > 0:
+            print(f"[INFO] Rate limit window exhausted. Sleeping {wait:.0f} seconds until reset...")
+            time.sleep(wait)
+            with self._lock:
+                self.sleep_time += wait
+
+        with self._lock:
+            self.remaining = None
+        self.bucket.set_rate(self.default_rate)
+        self.bucket.fill()
+
+
+class TweetPage(list):
+    # One page of tweet dicts from a collector, carrying the pagination state
+    # to save once the caller has processed it
+    def __init__(self, tweets=(), checkpoint_state=None):
+        super().__init__(tweets)
+        self.checkpoint_state = checkpoint_state
+
+
+class CollectionCheckpoint:
+    # Small JSON file mapping each query to its pagination state, so an
+    # interrupted collection resumes from the last next_token. Collectors
+    # don't advance it themselves: each page is committed by the caller once
+    # its results are written, so pages still queued (or in flight) when a run
+    # dies are fetched again on resume rather than lost or written twice.
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._state = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self._state = json.load(f)
+
+    def get(self, query):
+        with self._lock:
+            return dict(self._state.get(query, {}))
+
+    def update(self, query, **fields):
+        with self._lock:
+            self._state.setdefault(query, {}).update(fields)
+            self._save()
+
+    def commit(self, query, page):
+        # Records the state of a processed page; the page after the last one clears the query
+        state = getattr(page, 'checkpoint_state', None)
+        if state is None:
+            return
+        if state.get('finished'):
+            self.clear(query)
+        else:
+            self.update(query, **state)
+
+    def clear(self, query):
+        with self._lock:
+            if self._state.pop(query, None) is not None:
+                self._save()
+
+    def _save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Write then rename so a crash never leaves a half-written checkpoint
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self._state, f)
+        os.replace(tmp_path, self.path)
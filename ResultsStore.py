@@ -0,0 +1,130 @@
+import os
+import uuid
+from datetime import datetime, timezone
+from urllib.parse import quote
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+SENTIMENT_CATEGORIES = ['negative', 'neutral', 'positive']
+
+# Column types written to Parquet; columns not listed keep their inferred type.
+# Integers are nullable: archives and projected fields may leave them missing.
+COLUMN_TYPES = {
+    'id': 'Int64',
+    'author_id': 'Int64',
+    'retweet_count': 'Int64',
+    'like_count': 'Int64',
+    'reply_count': 'Int64',
+    'cluster_id': 'Int64',
+    'cluster_size': 'Int64',
+    'confidence': 'float64',
+}
+
+
+class ResultsStore:
+    # Append-only Parquet store of scored tweets, partitioned hive-style by
+    # query and tweet date: <root>/query=<query>/date=<YYYY-MM-DD>/part-*.parquet
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def append(self, df, query):
+        if df.empty:
+            return []
+
+        frame = self.typed(df)
+        if 'created_at' in frame.columns:
+            dates = frame['created_at'].dt.strftime('%Y-%m-%d').fillna('unknown')
+        else:
+            dates = pd.Series(datetime.now(timezone.utc).strftime('%Y-%m-%d'), index=frame.index)
+
+        written = []
+        stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')
+        for date, part in frame.groupby(dates, sort=False):
+            directory = os.path.join(self.root, f"query={quote(query, safe='')}", f"date={date}")
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"part-{stamp}-{uuid.uuid4().hex[:8]}.parquet")
+            table = self._normalize(pa.Table.from_pandas(part.reset_index(drop=True), preserve_index=False))
+            pq.write_table(table, path, compression='zstd')
+            written.append(path)
+        return written
+
+    def read(self, columns=None, query=None, start_date=None, end_date=None):
+        # Only the requested columns and matching partitions are read from disk
+        dataset = self._dataset()
+        if dataset is None:
+            return pd.DataFrame(columns=columns or [])
+
+        table = dataset.to_table(columns=columns, filter=self._filter(query, start_date, end_date))
+        return table.to_pandas()
+
+    def summarize(self, query=None, start_date=None, end_date=None):
+        results = self.read(columns=['sentiment', 'confidence'], query=query,
+                            start_date=start_date, end_date=end_date)
+        return {
+            'total_tweets': len(results),
+            'sentiment_distribution': {k: int(v) for k, v in results['sentiment'].value_counts().items() if v},
+            'average_confidence': float(results['confidence'].mean()) if len(results) else 0.0,
+        }
+
+    def queries(self):
+        dataset = self._dataset()
+        if dataset is None:
+            return []
+        return sorted(dataset.to_table(columns=['query']).column('query').unique().to_pylist())
+
+    @staticmethod
+    def typed(df):
+        frame = df.copy()
+        for column, dtype in COLUMN_TYPES.items():
+            if column in frame.columns:
+                frame[column] = frame[column].astype(dtype)
+        if 'created_at' in frame.columns:
+            frame['created_at'] = pd.to_datetime(frame['created_at'], utc=True)
+        if 'sentiment' in frame.columns:
+            frame['sentiment'] = pd.Categorical(frame['sentiment'], categories=SENTIMENT_CATEGORIES)
+        return frame
+
+    @staticmethod
+    def _normalize(table):
+        # Every part file gets plain string columns, whatever string dtype pandas
+        # used, so parts written by different runs always share one schema
+        fields = []
+        for field in table.schema:
+            if pa.types.is_large_string(field.type):
+                field = field.with_type(pa.string())
+            elif pa.types.is_dictionary(field.type) and pa.types.is_large_string(field.type.value_type):
+                field = field.with_type(pa.dictionary(field.type.index_type, pa.string()))
+            fields.append(field)
+        return table.cast(pa.schema(fields))
+
+    def _dataset(self):
+        if not any(entry.startswith('query=') for entry in os.listdir(self.root)):
+            return None
+        partition_schema = pa.schema([('query', pa.string()), ('date', pa.string())])
+        partitioning = ds.partitioning(partition_schema, flavor='hive')
+        dataset = ds.dataset(self.root, format='parquet', partitioning=partitioning)
+        # A dataset takes its schema from the first part file, so columns only
+        # some parts have (e.g. cluster_id) are unified across all of them;
+        # parts without a column read it as null
+        schemas = [fragment.physical_schema for fragment in dataset.get_fragments()]
+        schema = pa.unify_schemas(schemas + [partition_schema], promote_options='permissive')
+        return ds.dataset(self.root, schema=schema, format='parquet', partitioning=partitioning)
+
+    @staticmethod
+    def _filter(query, start_date, end_date):
+        conditions = []
+        if query is not None:
+            conditions.append(ds.field('query') == query)
+        if start_date is not None:
+            conditions.append(ds.field('date') >= str(start_date))
+        if end_date is not None:
+            conditions.append(ds.field('date') <= str(end_date))
+
+        expression = None
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+        return expression
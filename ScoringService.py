@@ -0,0 +1,272 @@
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import numpy as np
+from dotenv import load_dotenv
+
+from SentimentAnalysis import SentimentAnalyzer
+from SentimentCache import SentimentCache
+
+# Local HTTP scoring service around SentimentAnalyzer:
+#   POST /score   {"text": "..."} or {"texts": ["...", ...]}
+#   GET  /metrics request/batch counters and latency percentiles
+#   GET  /health
+# Texts from concurrent requests are coalesced into micro-batches so the
+# RoBERTa backends see padded batches instead of one forward pass per request.
+
+
+class _Server(ThreadingHTTPServer):
+    # Load generators open many connections at once; the default backlog of 5
+    # turns bursts into one-second SYN retransmits
+    request_queue_size = 128
+    daemon_threads = True
+
+
+class MicroBatcher:
+    # Queues texts from any number of threads and scores them in batches of up
+    # to max_batch_size, waiting at most max_wait_ms after the first queued
+    # text for others to join. One worker thread does all the scoring.
+    def __init__(self, score_batch, max_batch_size=32, max_wait_ms=10):
+        self.score_batch = score_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.batches = 0
+        self.batched_texts = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, texts):
+        # One future per text, resolved with its result
+        futures = []
+        for text in texts:
+            future = Future()
+            self._queue.put((text, future))
+            futures.append(future)
+        return futures
+
+    def score(self, texts, timeout=None):
+        return [future.result(timeout) for future in self.submit(texts)]
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    # Whatever is already queued joins without waiting
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)
+                    break
+                batch.append(item)
+            self._score(batch)
+
+    def _score(self, batch):
+        texts = [text for text, _ in batch]
+        try:
+            results = self.score_batch(texts)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        self.batches += 1
+        self.batched_texts += len(batch)
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+
+class LatencyTracker:
+    # Latencies of the most recent requests (bounded), for percentiles
+    def __init__(self, window=10000):
+        self.latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self.latencies.append(seconds)
+
+    def percentiles(self, quantiles=(50, 90, 99)):
+        with self._lock:
+            latencies = np.array(self.latencies)
+        if not len(latencies):
+            return {}
+        values = np.percentile(latencies * 1000, quantiles)
+        stats = {f"p{q}": round(float(v), 3) for q, v in zip(quantiles, values)}
+        stats['max'] = round(float(latencies.max() * 1000), 3)
+        return stats
+
+
+class ScoringService:
+    def __init__(self, analyzer=None, method='roberta', max_batch_size=32, max_wait_ms=10,
+                 max_request_texts=1000, host='127.0.0.1', port=8000):
+        self.analyzer = analyzer or SentimentAnalyzer()
+        self.method = method
+        self.model_id = self.analyzer.model_id(method)
+        self.max_request_texts = max_request_texts
+        self.batcher = MicroBatcher(self._score_batch, max_batch_size, max_wait_ms)
+        self.latency = LatencyTracker()
+        self.requests = 0
+        self.texts = 0
+        self.errors = 0
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self.httpd = _Server((host, port), self._make_handler())
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.batcher.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def handle_score(self, body):
+        start = time.perf_counter()
+        try:
+            request = json.loads(body or b'{}')
+        except ValueError:
+            return 400, {"error": "Body must be JSON"}
+
+        single = isinstance(request, dict) and 'text' in request
+        texts = [request['text']] if single else request.get('texts') if isinstance(request, dict) else None
+        if not isinstance(texts, list) or not texts or not all(isinstance(t, str) for t in texts):
+            return 400, {"error": "Expected {\"text\": str} or {\"texts\": [str, ...]}"}
+        if len(texts) > self.max_request_texts:
+            return 413, {"error": f"At most {self.max_request_texts} texts per request"}
+
+        try:
+            results = self.batcher.score(texts)
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+            return 500, {"error": str(e)}
+
+        elapsed = time.perf_counter() - start
+        self.latency.record(elapsed)
+        with self._lock:
+            self.requests += 1
+            self.texts += len(texts)
+        response = {"model": self.model_id, "latency_ms": round(elapsed * 1000, 3)}
+        if single:
+            response['result'] = results[0]
+        else:
+            response['results'] = results
+        return 200, response
+
+    def stats(self):
+        batches = self.batcher.batches
+        return {
+            'method': self.method,
+            'model': self.model_id,
+            'uptime_seconds': round(time.time() - self.started_at, 3),
+            'requests': self.requests,
+            'texts': self.texts,
+            'errors': self.errors,
+            'batches': batches,
+            'average_batch_size': round(self.batcher.batched_texts / batches, 3) if batches else 0.0,
+            'max_batch_size': self.batcher.max_batch_size,
+            'max_wait_ms': self.batcher.max_wait * 1000,
+            'latency_ms': self.latency.percentiles(),
+            'cache_hits': self.analyzer.cache_hits,
+            'cache_misses': self.analyzer.cache_misses,
+        }
+
+    def _score_batch(self, texts):
+        return self.analyzer.batch_analyze(texts, method=self.method, batch_size=self.batcher.max_batch_size)
+
+    def _make_handler(self):
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive, so clients reuse connections between requests
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                path = urlparse(self.path).path
+                if path == '/health':
+                    self._send(200, {"status": "ok", "method": service.method, "model": service.model_id})
+                elif path == '/metrics':
+                    self._send(200, service.stats())
+                else:
+                    self._send(404, {"error": "Not Found"})
+
+            def do_POST(self):
+                if urlparse(self.path).path != '/score':
+                    self._send(404, {"error": "Not Found"})
+                    return
+                length = int(self.headers.get('Content-Length') or 0)
+                self._send(*service.handle_score(self.rfile.read(length)))
+
+            def _send(self, status, body):
+                payload = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Serve sentiment scoring over HTTP with micro-batching")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--method", default="roberta",
+                        help="any SentimentAnalyzer method, e.g. roberta, roberta_onnx, linear, textblob")
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=10)
+    parser.add_argument("--cache-path", default=os.getenv("SENTIMENT_CACHE_PATH", ""),
+                        help="SQLite sentiment cache; empty (the default) disables it")
+    args = parser.parse_args()
+
+    analyzer = SentimentAnalyzer(hf_token=os.getenv("HF_TOKEN"),
+                                 cache=SentimentCache(args.cache_path) if args.cache_path else None)
+    service = ScoringService(analyzer, method=args.method, max_batch_size=args.max_batch_size,
+                             max_wait_ms=args.max_wait_ms, host=args.host, port=args.port)
+    print(f"Scoring with {service.model_id} on {service.url} "
+          f"(batches of up to {args.max_batch_size}, {args.max_wait_ms:g} ms max wait)")
+    try:
+        service.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.httpd.server_close()
+        service.batcher.close()
@@ -0,0 +1,198 @@
+import heapq
+from collections import Counter
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+
+SENTIMENTS = ['negative', 'neutral', 'positive']
+ENGAGEMENT_COLUMNS = ['like_count', 'retweet_count', 'reply_count']
+CONFIDENCE_BINS = np.linspace(0.0, 1.0, 21)
+
+
+class SentimentAggregates:
+    # Everything the insights, charts and Streamlit page need, built in one pass
+    # over the scored tweets: counts, confidence stats and histogram, token
+    # frequencies and engagement value frequencies per sentiment, plus the most
+    # confident examples. update() takes one page at a time, so streaming runs
+    # and background jobs keep it current without revisiting earlier rows, and
+    # the object is small enough to ship to chart render workers.
+    def __init__(self, top_examples=5, text_column='cleaned_text'):
+        self.text_column = text_column
+        self.top_examples_n = top_examples
+        self.total = 0
+        self.counts = Counter()
+        self.confidence = {}
+        self.tokens = {}
+        self.engagement = {column: {} for column in ENGAGEMENT_COLUMNS}
+        self._top = {}
+        self._seq = 0
+
+    @classmethod
+    def from_dataframe(cls, df, **kwargs):
+        return cls(**kwargs).update(df)
+
+    def update(self, df):
+        if df is None or df.empty or 'sentiment' not in df.columns:
+            return self
+        self.total += len(df)
+
+        codes, labels = pd.factorize(df['sentiment'].astype(str))
+        confidence = df['confidence'].to_numpy(dtype=np.float64) if 'confidence' in df.columns else None
+        texts = df[self.text_column].to_numpy(dtype=object) if self.text_column in df.columns else None
+        engagement = {column: df[column].to_numpy() for column in ENGAGEMENT_COLUMNS if column in df.columns}
+
+        for code, label in enumerate(labels):
+            rows = np.flatnonzero(codes == code)
+            self.counts[label] += len(rows)
+
+            if confidence is not None:
+                self._update_confidence(label, confidence[rows])
+                self._update_top(label, df, rows, confidence[rows])
+
+            if texts is not None:
+                # Streams tokens into the counter; no per-sentiment mega-string
+                self.tokens.setdefault(label, Counter()).update(
+                    chain.from_iterable(text.split() for text in texts[rows] if isinstance(text, str))
+                )
+
+            for column, values in engagement.items():
+                unique, frequency = np.unique(values[rows], return_counts=True)
+                self.engagement[column].setdefault(label, Counter()).update(
+                    dict(zip(unique.tolist(), frequency.tolist()))
+                )
+        return self
+
+    def merge(self, other):
+        self.total += other.total
+        self.counts.update(other.counts)
+        for label, stats in other.confidence.items():
+            mine = self._confidence_stats(label)
+            mine['count'] += stats['count']
+            mine['sum'] += stats['sum']
+            mine['min'] = min(mine['min'], stats['min'])
+            mine['max'] = max(mine['max'], stats['max'])
+            mine['histogram'] += stats['histogram']
+        for label, tokens in other.tokens.items():
+            self.tokens.setdefault(label, Counter()).update(tokens)
+        for column, by_label in other.engagement.items():
+            for label, values in by_label.items():
+                self.engagement.setdefault(column, {}).setdefault(label, Counter()).update(values)
+        for label, heap in other._top.items():
+            for confidence, _, row in heap:
+                self._push_top(label, confidence, row)
+        return self
+
+    def sentiments(self):
+        # Known sentiments first, in their usual order, then anything else seen
+        return [s for s in SENTIMENTS if self.counts.get(s)] + \
+               [s for s in self.counts if s not in SENTIMENTS and self.counts[s]]
+
+    def percentage(self, sentiment):
+        return self.counts.get(sentiment, 0) / self.total * 100 if self.total else 0.0
+
+    def average_confidence(self, sentiment=None):
+        stats = list(self.confidence.values()) if sentiment is None else [self.confidence.get(sentiment)]
+        count = sum(s['count'] for s in stats if s)
+        return sum(s['sum'] for s in stats if s) / count if count else 0.0
+
+    def confidence_histogram(self, sentiment):
+        # (bin edges, counts) over [0, 1] in 20 equal bins
+        stats = self.confidence.get(sentiment)
+        counts = stats['histogram'] if stats else np.zeros(len(CONFIDENCE_BINS) - 1, dtype=np.int64)
+        return CONFIDENCE_BINS, counts
+
+    def top_words(self, sentiment, n=5, stopwords=None):
+        tokens = self.tokens.get(sentiment, Counter())
+        if not stopwords:
+            return tokens.most_common(n)
+        return [(w, c) for w, c in tokens.most_common(n + len(stopwords)) if w not in stopwords][:n]
+
+    def word_frequencies(self, sentiment, max_words=200, stopwords=None):
+        return dict(self.top_words(sentiment, max_words, stopwords))
+
+    def engagement_quantiles(self, column, sentiment, quantiles=(0.25, 0.5, 0.75)):
+        values, cumulative = self._value_distribution(column, sentiment)
+        if values is None:
+            return None
+        return {q: _quantile(values, cumulative, q) for q in quantiles}
+
+    def box_stats(self, column, sentiment):
+        # Matplotlib bxp() stats (Tukey whiskers at 1.5 IQR, no fliers)
+        values, cumulative = self._value_distribution(column, sentiment)
+        if values is None:
+            return None
+        q1, med, q3 = (_quantile(values, cumulative, q) for q in (0.25, 0.5, 0.75))
+        iqr = q3 - q1
+        inside = values[(values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)]
+        return {
+            'label': sentiment,
+            'q1': q1, 'med': med, 'q3': q3,
+            'whislo': float(inside.min()) if len(inside) else q1,
+            'whishi': float(inside.max()) if len(inside) else q3,
+            'fliers': [],
+        }
+
+    def top_examples(self, sentiment):
+        # The most confident rows of a sentiment, highest first
+        return [row for _, _, row in sorted(self._top.get(sentiment, []), key=lambda item: (-item[0], -item[1]))]
+
+    def summary(self):
+        return {
+            'total_tweets': self.total,
+            'sentiment_distribution': {s: int(self.counts[s]) for s in self.sentiments()},
+            'average_confidence': float(self.average_confidence()),
+        }
+
+    def _confidence_stats(self, label):
+        return self.confidence.setdefault(label, {
+            'count': 0, 'sum': 0.0, 'min': np.inf, 'max': -np.inf,
+            'histogram': np.zeros(len(CONFIDENCE_BINS) - 1, dtype=np.int64),
+        })
+
+    def _update_confidence(self, label, values):
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        stats = self._confidence_stats(label)
+        stats['count'] += len(values)
+        stats['sum'] += float(values.sum())
+        stats['min'] = min(stats['min'], float(values.min()))
+        stats['max'] = max(stats['max'], float(values.max()))
+        stats['histogram'] += np.histogram(np.clip(values, 0.0, 1.0), bins=CONFIDENCE_BINS)[0]
+
+    def _update_top(self, label, df, rows, confidence):
+        if not self.top_examples_n:
+            return
+        # Only this page's best candidates can enter the heap
+        best = rows[np.argsort(-np.nan_to_num(confidence, nan=-1.0), kind='stable')[:self.top_examples_n]]
+        columns = [c for c in ('text', 'created_at', 'confidence') if c in df.columns]
+        for row in df.iloc[best][columns].to_dict('records'):
+            self._push_top(label, float(row.get('confidence', 0.0)), row)
+
+    def _push_top(self, label, confidence, row):
+        heap = self._top.setdefault(label, [])
+        # The sequence number breaks ties so rows themselves are never compared;
+        # negated so that on equal confidence the earlier row is kept
+        self._seq += 1
+        item = (confidence, -self._seq, row)
+        if len(heap) < self.top_examples_n:
+            heapq.heappush(heap, item)
+        elif item[:2] > heap[0][:2]:
+            heapq.heapreplace(heap, item)
+
+    def _value_distribution(self, column, sentiment):
+        counter = self.engagement.get(column, {}).get(sentiment)
+        if not counter:
+            return None, None
+        values = np.array(sorted(counter), dtype=np.float64)
+        cumulative = np.cumsum([counter[v] for v in sorted(counter)])
+        return values, cumulative
+
+
+def _quantile(values, cumulative, q):
+    # Linear-interpolated quantile (numpy's default method) from value frequencies
+    position = q * (cumulative[-1] - 1)
+    lower = values[np.searchsorted(cumulative, np.floor(position), side='right')]
+    upper = values[np.searchsorted(cumulative, np.ceil(position), side='right')]
+    return float(lower + (upper - lower) * (position - np.floor(position)))
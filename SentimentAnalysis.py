@@ -1,44 +1,183 @@
-import requests
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
+import os
+import multiprocessing
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from scipy.special import softmax
-from textblob import TextBlob
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.linear_model import LogisticRegression
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import classification_report, accuracy_score
 import numpy as np
+from importlib.metadata import version, PackageNotFoundError
+from SentimentCache import SentimentCache
+from SentimentScores import SentimentScores
+import ModelRegistry
+from HuggingFaceClient import HuggingFaceClient, InferenceAPIError, DEFAULT_API_BASE
+
+DEFAULT_MODEL_NAME = "cardiffnlp/twitter-roberta-base-sentiment-latest"
+
+# Interchangeable backends for the same RoBERTa model: full-precision PyTorch,
+# dynamically int8-quantized PyTorch, and an exported ONNX Runtime session
+ROBERTA_BACKENDS = ('roberta', 'roberta_int8', 'roberta_onnx')
+
+# Rows per sparse matrix product in method='linear'; bounds the TF-IDF features held at once
+LINEAR_CHUNK_SIZE = 8192
+
+# method='cascade' scores everything with a cheap first tier and re-scores only
+# the results it is unsure about with the final tier:
+#   margin          textblob results with |polarity| within margin of the 0.1 cutoff
+#   min_confidence  results from scored methods (e.g. linear) below this confidence
+#   escalate_unknown textblob results with no sentiment-bearing words at all
+DEFAULT_CASCADE = {
+    'first': 'textblob',
+    'final': 'roberta',
+    'margin': 0.05,
+    'min_confidence': 0.7,
+    'escalate_unknown': True,
+}
 
 class SentimentAnalyzer:
-    def __init__(self, hf_token=None):
+    def __init__(self, hf_token=None, cache=None, model_name=DEFAULT_MODEL_NAME, onnx_dir=None, onnx_quantize=True,
+                 linear_model_path=None, cascade=None, hf_api_url=None, hf_fallback='roberta'):
         self.hf_token = hf_token
+        # Inference API endpoint (HF_API_URL, e.g. a dedicated endpoint or a local
+        # FakeInferenceServer) and the local method scoring batches it fails on
+        self.hf_api_url = hf_api_url or os.getenv("HF_API_URL")
+        self.hf_fallback = hf_fallback
+        self._hf_client = None
         self.models = {}
+        # cache may be a SentimentCache or a path to its SQLite file
+        self.cache = SentimentCache(cache) if isinstance(cache, str) else cache
+        self.model_name = model_name
+        self.onnx_dir = onnx_dir
+        self.onnx_quantize = onnx_quantize
+        # Distilled TF-IDF + logistic regression model used by method='linear'
+        self.linear_model_path = linear_model_path or os.getenv("LINEAR_MODEL_PATH", "linear_sentiment_model.joblib")
+        self.cascade = {**DEFAULT_CASCADE, **(cascade or {})}
+        # Texts actually scored by each cascade tier (cache hits excluded)
+        self.cascade_counts = Counter()
+        self._executor = None
+        self._executor_config = None
         self.setup_models()
     
     def setup_models(self):
-        # Setup RoBERTa model for Twitter sentiment
-        model_name = "cardiffnlp/twitter-roberta-base-sentiment-latest"
-        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-        self.model = AutoModelForSequenceClassification.from_pretrained(model_name)
+        # Models are loaded lazily through ModelRegistry on first use
         self.labels = ['negative', 'neutral', 'positive']
+        self.api_url = self.hf_api_url or f"{DEFAULT_API_BASE}/{self.model_name}"
+    
+    @property
+    def tokenizer(self):
+        return self._roberta()[0]
+    
+    @property
+    def model(self):
+        return self._roberta()[1]
+    
+    def _roberta(self, backend='roberta'):
+        # Returns (tokenizer, model) for a backend; the model is an ONNX Runtime
+        # session for roberta_onnx and a torch module otherwise
+        if backend == 'roberta_int8':
+            return ModelRegistry.get_model(
+                ('roberta_int8', self.model_name),
+                lambda: ModelRegistry.load_roberta_int8(self.model_name)
+            )
+        if backend == 'roberta_onnx':
+            return ModelRegistry.get_model(
+                ('roberta_onnx', self.model_name, self.onnx_dir, self.onnx_quantize),
+                lambda: ModelRegistry.load_roberta_onnx(self.model_name, self.onnx_dir, self.onnx_quantize)
+            )
+        return ModelRegistry.get_model(
+            ('roberta', self.model_name),
+            lambda: ModelRegistry.load_roberta(self.model_name)
+        )
+    
+    def _roberta_logits(self, backend, tokenizer, model, features):
+        # Pads one batch of tokenized features and returns its logits as a numpy array
+        if backend == 'roberta_onnx':
+            batch = tokenizer.pad(features, padding='longest', return_tensors='np')
+            inputs = {'input_ids': batch['input_ids'].astype(np.int64),
+                      'attention_mask': batch['attention_mask'].astype(np.int64)}
+            return model.run(['logits'], inputs)[0]
         
-        # Setup Hugging Face API if token provided
-        if self.hf_token:
-            self.api_url = f"https://api-inference.huggingface.co/models/{model_name}"
-            self.headers = {"Authorization": f"Bearer {self.hf_token}"}
+        import torch
+        batch = tokenizer.pad(features, padding='longest', return_tensors='pt')
+        with torch.inference_mode():
+            return model(**batch)[0].numpy()
     
-    def analyze_with_roberta(self, text):
+    def analyze_with_roberta(self, text, backend='roberta'):
+        tokenizer, model = self._roberta(backend)
+        
         # Preprocess text for RoBERTa
         processed_text = self.preprocess_for_roberta(text)
         
         # Tokenize
-        encoded_input = self.tokenizer(processed_text, return_tensors='pt', 
-                                     truncation=True, max_length=512)
+        encoded_input = tokenizer(processed_text, truncation=True, max_length=512)
         
         # Get prediction
-        output = self.model(**encoded_input)
-        scores = output[0][0].detach().numpy()
-        scores = softmax(scores)
+        logits = self._roberta_logits(backend, tokenizer, model, [encoded_input])
+        scores = softmax(logits[0])
         
+        return self.format_roberta_scores(scores)
+    
+    def analyze_with_roberta_batch(self, texts, batch_size=32, backend='roberta'):
+        return list(self._roberta_scores(texts, batch_size, backend).to_results())
+    
+    def _roberta_scores(self, texts, batch_size=32, backend='roberta'):
+        if not len(texts):
+            return SentimentScores.from_probabilities(np.empty((0, len(self.labels)), dtype=np.float32))
+        # Tokenize everything once without padding so we know each sequence length
+        try:
+            tokenizer, model = self._roberta(backend)
+            processed_texts = [self.preprocess_for_roberta(text) for text in texts]
+            encoded = tokenizer(processed_texts, truncation=True, max_length=512)
+        except Exception as e:
+            print(f"Error tokenizing batch, retrying per text: {e}")
+            return SentimentScores.from_results(self._analyze_each(texts, backend))
+        input_ids = encoded['input_ids']
+        
+        # Sort by length so each batch is only padded to its own longest sequence
+        order = np.argsort([len(ids) for ids in input_ids], kind='stable')
+        # Each batch's probabilities are written straight into their original rows
+        probabilities = np.zeros((len(texts), len(self.labels)), dtype=np.float32)
+        errors = {}
+        
+        for start in range(0, len(order), batch_size):
+            batch_idx = order[start:start + batch_size]
+            features = [{key: encoded[key][i] for key in encoded.keys()} for i in batch_idx]
+            
+            try:
+                logits = self._roberta_logits(backend, tokenizer, model, features)
+                probabilities[batch_idx] = softmax(logits, axis=1)
+            except Exception as e:
+                # Fall back to scoring this batch one text at a time
+                print(f"Error analyzing batch, retrying per text: {e}")
+                for i, result in zip(batch_idx.tolist(), self._analyze_each([texts[i] for i in batch_idx], backend)):
+                    if 'error' in result:
+                        errors[i] = result['error']
+                    else:
+                        probabilities[i] = [result['scores'][label] for label in self.labels]
+        
+        return SentimentScores.from_probabilities(probabilities, errors)
+    
+    def _linear(self):
+        path = os.path.abspath(self.linear_model_path)
+        return ModelRegistry.get_model(('linear', path), lambda: ModelRegistry.load_linear(path))
+    
+    def analyze_with_linear(self, text):
+        return self.analyze_with_linear_batch([text])[0]
+    
+    def analyze_with_linear_batch(self, texts, batch_size=None):
+        return list(self._linear_scores(texts).to_results())
+    
+    def _linear_scores(self, texts):
+        # One sparse matrix product per chunk of rows, written into a single float32 matrix
+        from LinearSentiment import prepare_texts
+        
+        model = self._linear()
+        probabilities = np.empty((len(texts), len(self.labels)), dtype=np.float32)
+        for start in range(0, len(texts), LINEAR_CHUNK_SIZE):
+            chunk = texts[start:start + LINEAR_CHUNK_SIZE]
+            probabilities[start:start + len(chunk)] = model.predict_proba(prepare_texts(self, chunk))
+        return SentimentScores.from_probabilities(probabilities)
+    
+    def format_roberta_scores(self, scores):
         # Get the highest scoring sentiment
         max_score_idx = np.argmax(scores)
         sentiment = self.labels[max_score_idx]
@@ -51,6 +190,8 @@ class SentimentAnalyzer:
         }
     
     def analyze_with_textblob(self, text):
+        from textblob import TextBlob
+        
         blob = TextBlob(text)
         polarity = blob.sentiment.polarity
         
@@ -67,23 +208,62 @@ class SentimentAnalyzer:
             'subjectivity': blob.sentiment.subjectivity
         }
     
+    def _huggingface(self):
+        # The public API needs a token; a custom endpoint may not
+        if self._hf_client is None and (self.hf_token or self.hf_api_url):
+            self._hf_client = HuggingFaceClient(
+                self.api_url, token=self.hf_token,
+                batch_size=int(os.getenv("HF_API_BATCH_SIZE", "16")),
+                max_concurrency=int(os.getenv("HF_API_CONCURRENCY", "4")),
+            )
+        return self._hf_client
+    
     def analyze_with_huggingface_api(self, text):
-        if not self.hf_token:
-            return None
-        
-        payload = {"inputs": text, "options": {"wait_for_model": True}}
-        response = requests.post(self.api_url, headers=self.headers, json=payload)
-        
-        if response.status_code == 200:
-            result = response.json()
-            if isinstance(result, list) and len(result) > 0:
-                top_result = max(result, key=lambda x: x['score'])
-                return {
-                    'sentiment': top_result['label'].lower(),
-                    'confidence': top_result['score'],
-                    'all_scores': result
-                }
-        return None
+        return self.analyze_with_huggingface_api_batch([text])[0]
+    
+    def analyze_with_huggingface_api_batch(self, texts, batch_size=32):
+        # Only the texts of batches the API failed on go to the local fallback
+        client = self._huggingface()
+        if client is None:
+            scores, errors = [None] * len(texts), dict.fromkeys(range(len(texts)),
+                                                               InferenceAPIError("no HF token configured"))
+        else:
+            scores, errors = client.classify(texts)
+        results = [self.format_api_scores(text_scores) if text_scores is not None else None
+                   for text_scores in scores]
+        if not errors:
+            return results
+        
+        failed = sorted(errors)
+        error = errors[failed[0]]
+        if not self.hf_fallback:
+            print(f"Error analyzing {len(failed)} of {len(texts)} texts with the Inference API: {error}")
+            for index in failed:
+                results[index] = {'sentiment': 'neutral', 'confidence': 0.0, 'error': str(errors[index])}
+            return results
+        print(f"[WARNING] Inference API unavailable ({error}); scoring {len(failed)} of {len(texts)} texts "
+              f"with local {self.hf_fallback}")
+        # Marked so the cache never stores them as Inference API results
+        fallback = self._score([texts[index] for index in failed], self.hf_fallback, batch_size)
+        for index, result in zip(failed, fallback):
+            result['fallback'] = self.hf_fallback
+            results[index] = result
+        return results
+    
+    def format_api_scores(self, scores):
+        # API labels are the model's own ('negative', ...) or LABEL_<index>
+        by_label = {}
+        for item in scores:
+            label = item['label'].lower()
+            if label.startswith('label_'):
+                label = self.labels[int(label[len('label_'):])]
+            by_label[label] = float(item['score'])
+        sentiment = max(by_label, key=by_label.get)
+        return {
+            'sentiment': sentiment,
+            'confidence': by_label[sentiment],
+            'scores': {label: by_label.get(label, 0.0) for label in self.labels},
+        }
     
     def preprocess_for_roberta(self, text):
         # Specific preprocessing for RoBERTa model
@@ -94,13 +274,209 @@ class SentimentAnalyzer:
             new_text.append(t)
         return " ".join(new_text)
     
-    def batch_analyze(self, texts, method='roberta'):
+    @property
+    def cache_hits(self):
+        return self.cache.hits if self.cache else 0
+    
+    @property
+    def cache_misses(self):
+        return self.cache.misses if self.cache else 0
+    
+    def model_id(self, method):
+        # Identifies the model behind a method so cached results never leak across models
+        if method == 'textblob':
+            try:
+                return f"textblob-{version('textblob')}"
+            except PackageNotFoundError:
+                return "textblob"
+        if method == 'huggingface_api':
+            return f"{self.model_name}@inference-api"
+        if method == 'roberta_int8':
+            return f"{self.model_name}#int8-dynamic"
+        if method == 'roberta_onnx':
+            return f"{self.model_name}#onnx{'-int8' if self.onnx_quantize else ''}"
+        if method == 'linear':
+            return f"linear-{self._linear().version}"
+        if method == 'cascade':
+            c = self.cascade
+            return (f"cascade[{self.model_id(c['first'])}>{self.model_id(c['final'])}"
+                    f"|{c['margin']}|{c['min_confidence']}|{c['escalate_unknown']}]")
+        return self.model_name
+    
+    def batch_analyze(self, texts, method='roberta', batch_size=32, workers=1):
+        texts = list(texts)
+        if self.cache is None:
+            return self._score(texts, method, batch_size, workers)
+        
+        model_id = self.model_id(method)
+        keys = [SentimentCache.make_key(text, method, model_id) for text in texts]
+        cached = self.cache.get_many(keys)
+        
+        # Score each distinct uncached text once
+        pending = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in pending:
+                pending[key] = text
+        
+        if pending:
+            scored = self._score(list(pending.values()), method, batch_size, workers)
+            fresh = dict(zip(pending.keys(), scored))
+            self.cache.set_many(
+                (key, result) for key, result in fresh.items()
+                if result is not None and 'error' not in result and 'fallback' not in result
+            )
+            cached.update(fresh)
+        
+        return [cached[key] for key in keys]
+    
+    def analyze_columns(self, texts, method='roberta', batch_size=32, workers=1):
+        # batch_analyze's results as a SentimentScores. RoBERTa and linear
+        # probabilities go from the model's output arrays straight into it, so
+        # no per-text dicts are built except for the cache's own rows.
+        texts = list(texts)
+        if not texts:
+            return SentimentScores.from_results([])
+        if method in ('textblob', 'huggingface_api', 'cascade') or workers > 1:
+            return SentimentScores.from_results(self.batch_analyze(texts, method, batch_size, workers))
+        if self.cache is None:
+            return self._probability_scores(texts, method, batch_size)
+        
+        model_id = self.model_id(method)
+        keys = [SentimentCache.make_key(text, method, model_id) for text in texts]
+        cached = self.cache.get_many(keys)
+        pending = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in pending:
+                pending[key] = text
+        
+        # Cache hits first, then the freshly scored texts; each key's row in them
+        rows = {key: row for row, key in enumerate(cached)}
+        parts = [SentimentScores.from_results(list(cached.values()))]
+        if pending:
+            scored = self._probability_scores(list(pending.values()), method, batch_size)
+            self.cache.set_many(
+                (key, result) for key, result in zip(pending, scored.to_results()) if 'error' not in result
+            )
+            rows.update((key, len(cached) + row) for row, key in enumerate(pending))
+            parts.append(scored)
+        return SentimentScores.concatenate(parts).take([rows[key] for key in keys])
+    
+    def _probability_scores(self, texts, method, batch_size):
+        if method == 'linear':
+            try:
+                return self._linear_scores(texts)
+            except Exception as e:
+                print(f"Error analyzing batch, retrying per text: {e}")
+                return SentimentScores.from_results(self._analyze_each(texts, method))
+        backend = method if method in ROBERTA_BACKENDS else 'roberta'
+        return self._roberta_scores(texts, batch_size=batch_size, backend=backend)
+    
+    def _score(self, texts, method, batch_size, workers=1):
+        if method == 'cascade':
+            # Handled here so each tier can still use the process pool
+            return self.analyze_cascade(texts, batch_size, workers)
+        
+        if method == 'huggingface_api':
+            # Remote; batched and concurrent in the client rather than in worker processes
+            return self.analyze_with_huggingface_api_batch(texts, batch_size)
+        
+        if workers > 1 and len(texts) > batch_size:
+            return list(self.analyze_parallel(texts, method=method, workers=workers, batch_size=batch_size))
+        
+        if method == 'linear':
+            try:
+                return self.analyze_with_linear_batch(texts)
+            except Exception as e:
+                print(f"Error analyzing batch, retrying per text: {e}")
+                return self._analyze_each(texts, method)
+        
+        if method not in ('textblob', 'huggingface_api'):
+            # RoBERTa (also the default) is scored in padded, length-sorted batches
+            backend = method if method in ROBERTA_BACKENDS else 'roberta'
+            return self.analyze_with_roberta_batch(texts, batch_size=batch_size, backend=backend)
+        
+        return self._analyze_each(texts, method)
+    
+    def analyze_cascade(self, texts, batch_size=32, workers=1):
+        first, final = self.cascade['first'], self.cascade['final']
+        # The cheap first tier runs in-process; only the final tier uses the process
+        # pool, so the pool (keyed by method) keeps its workers and loaded model
+        results = [dict(r, tier=first) if r is not None else None
+                   for r in self._score(texts, first, batch_size)]
+        
+        unsure = [i for i, result in enumerate(results) if self._needs_escalation(result)]
+        if unsure:
+            escalated = self._score([texts[i] for i in unsure], final, batch_size, workers)
+            for i, result in zip(unsure, escalated):
+                if result is not None and 'error' not in result:
+                    results[i] = dict(result, tier=final)
+        
+        self.cascade_counts[first] += len(texts) - len(unsure)
+        self.cascade_counts[final] += len(unsure)
+        return results
+    
+    def _needs_escalation(self, result):
+        if result is None or 'error' in result:
+            return True
+        if 'polarity' in result:
+            # TextBlob: near the +/-0.1 cutoff, or no opinion words found
+            if self.cascade['escalate_unknown'] and result['polarity'] == 0 and result['subjectivity'] == 0:
+                return True
+            return abs(abs(result['polarity']) - 0.1) <= self.cascade['margin']
+        return result.get('confidence', 0.0) < self.cascade['min_confidence']
+    
+    def analyze_parallel(self, texts, method='roberta', workers=None, shard_size=None,
+                         batch_size=32, torch_threads=1):
+        # Shards texts across a process pool and yields results in input order
+        # as soon as each shard (and every shard before it) is done
+        texts = list(texts)
+        workers = workers or os.cpu_count() or 1
+        if shard_size is None:
+            # A few shards per worker keeps the pool busy without tiny tasks
+            shard_size = max(batch_size, -(-len(texts) // (workers * 4)))
+        
+        executor = self._get_executor(workers, method, torch_threads)
+        shards = [texts[start:start + shard_size] for start in range(0, len(texts), shard_size)]
+        for shard_results in executor.map(_score_shard, shards, repeat(method), repeat(batch_size)):
+            yield from shard_results
+    
+    def _get_executor(self, workers, method, torch_threads):
+        # The pool is kept between calls so workers only load their model once;
+        # workers preload the model of the method they were started for
+        config = (workers, method, torch_threads)
+        if self._executor is not None and self._executor_config != config:
+            self.shutdown_workers()
+        
+        if self._executor is None:
+            if method == 'roberta_onnx':
+                # Exported once here so the workers only ever load the cached files
+                ModelRegistry.export_onnx(self.model_name, self.onnx_dir, self.onnx_quantize)
+            # spawn avoids forking a parent that may already hold torch threads
+            self._executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(self.hf_token, self.model_name, self.onnx_dir, self.onnx_quantize,
+                          self.linear_model_path, method, torch_threads)
+            )
+            self._executor_config = config
+        return self._executor
+    
+    def shutdown_workers(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+            self._executor_config = None
+    
+    def _analyze_each(self, texts, method):
         results = []
         
         for text in texts:
             try:
-                if method == 'roberta':
-                    result = self.analyze_with_roberta(text)
+                if method in ROBERTA_BACKENDS:
+                    result = self.analyze_with_roberta(text, backend=method)
+                elif method == 'linear':
+                    result = self.analyze_with_linear(text)
                 elif method == 'textblob':
                     result = self.analyze_with_textblob(text)
                 elif method == 'huggingface_api':
@@ -111,6 +487,31 @@ class SentimentAnalyzer:
                 results.append(result)
             except Exception as e:
                 print(f"Error analyzing text: {e}")
-                results.append({'sentiment': 'neutral', 'confidence': 0.0})
+                results.append({'sentiment': 'neutral', 'confidence': 0.0, 'error': str(e)})
         
         return results
+
+
+# Per-process analyzer used by analyze_parallel workers
+_worker_analyzer = None
+
+def _init_worker(hf_token, model_name, onnx_dir, onnx_quantize, linear_model_path, method, torch_threads):
+    global _worker_analyzer
+    if torch_threads:
+        # Keep each worker to a few intra-op threads so workers don't oversubscribe cores
+        os.environ['OMP_NUM_THREADS'] = str(torch_threads)
+        os.environ['MKL_NUM_THREADS'] = str(torch_threads)
+    
+    _worker_analyzer = SentimentAnalyzer(hf_token=hf_token, model_name=model_name,
+                                         onnx_dir=onnx_dir, onnx_quantize=onnx_quantize,
+                                         linear_model_path=linear_model_path)
+    if method == 'linear':
+        _worker_analyzer._linear()
+    elif method in ROBERTA_BACKENDS:
+        if torch_threads and method != 'roberta_onnx':
+            import torch
+            torch.set_num_threads(torch_threads)
+        _worker_analyzer._roberta(method)  # load the model once, up front
+
+def _score_shard(texts, method, batch_size):
+    return _worker_analyzer._score(texts, method, batch_size)
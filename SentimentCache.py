@@ -0,0 +1,145 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class SentimentCache:
+    def __init__(self, path="sentiment_cache.sqlite", memory_size=10000, max_entries=1000000, ttl=None):
+        self.path = path
+        self.memory_size = memory_size
+        self.max_entries = max_entries
+        self.ttl = ttl  # seconds, None keeps entries forever
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.setup_db()
+
+    def setup_db(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_results_created_at ON results (created_at)")
+        self.conn.commit()
+
+    @staticmethod
+    def make_key(text, method, model_id):
+        digest = hashlib.sha256()
+        for part in (method, model_id, text):
+            digest.update(str(part).encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def get_many(self, keys):
+        # Returns {key: result} for every key found in memory or on disk
+        found = {}
+        missing = []
+        now = time.time()
+
+        with self._lock:
+            for key in keys:
+                entry = self._memory.get(key)
+                if entry is not None and not self._expired(entry[1], now):
+                    self._memory.move_to_end(key)
+                    found[key] = entry[0]
+                else:
+                    missing.append(key)
+
+            # SQLite limits the number of bound parameters per statement
+            for start in range(0, len(missing), 500):
+                chunk = missing[start:start + 500]
+                placeholders = ','.join('?' * len(chunk))
+                rows = self.conn.execute(
+                    f"SELECT key, value, created_at FROM results WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                for key, value, created_at in rows:
+                    if self._expired(created_at, now):
+                        continue
+                    result = json.loads(value)
+                    found[key] = result
+                    self._remember(key, result, created_at)
+
+            for key in keys:
+                if key in found:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+
+        return found
+
+    def set_many(self, items):
+        # items is an iterable of (key, result) pairs
+        now = time.time()
+        rows = []
+
+        with self._lock:
+            for key, result in items:
+                self._remember(key, result, now)
+                rows.append((key, json.dumps(result), now))
+
+            if rows:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO results (key, value, created_at) VALUES (?, ?, ?)", rows
+                )
+                self.conn.commit()
+                self._evict(now)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self.conn.execute("DELETE FROM results")
+            self.conn.commit()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            size = self.conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': size,
+            'memory_entries': len(self._memory),
+        }
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    def _expired(self, created_at, now):
+        return self.ttl is not None and now - created_at > self.ttl
+
+    def _remember(self, key, result, created_at):
+        self._memory[key] = (result, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def _evict(self, now):
+        if self.ttl is not None:
+            self.conn.execute("DELETE FROM results WHERE created_at < ?", (now - self.ttl,))
+
+        # Drop the oldest rows once the on-disk cache grows past its limit
+        if self.max_entries:
+            size = self.conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+            if size > self.max_entries:
+                self.conn.execute(
+                    "DELETE FROM results WHERE key IN "
+                    "(SELECT key FROM results ORDER BY created_at LIMIT ?)",
+                    (size - self.max_entries,)
+                )
+        self.conn.commit()
@@ -0,0 +1,135 @@
+import numpy as np
+import pandas as pd
+
+from SentimentAggregates import SENTIMENTS
+
+# Result columns downcast to the smallest integer type holding their values.
+# cluster_id and cluster_size stay int64, the type ResultsStore writes them as.
+COMPACT_INT_COLUMNS = ['retweet_count', 'like_count', 'reply_count']
+STRING_COLUMNS = ['text', 'cleaned_text']
+
+_NEUTRAL = SENTIMENTS.index('neutral')
+
+
+class SentimentScores:
+    # The scores of a batch of texts as columns instead of one dict per text:
+    # int8 label codes into SENTIMENTS, float32 confidence, the float32 (n, 3)
+    # probability matrix when the method has one (RoBERTa, linear) and
+    # {row: message} for texts that failed to score. A million results take
+    # ~17MB this way; as dicts with nested score dicts they take over 1GB.
+    def __init__(self, codes, confidence, probabilities=None, errors=None, tiers=None):
+        self.codes = codes
+        self.confidence = confidence
+        self.probabilities = probabilities
+        self.errors = errors or {}
+        # Cascade tier that produced each result (a Categorical), if any
+        self.tiers = tiers
+
+    def __len__(self):
+        return len(self.codes)
+
+    @classmethod
+    def from_probabilities(cls, probabilities, errors=None):
+        # Rows in errors are scored neutral with zero confidence
+        probabilities = np.asarray(probabilities, dtype=np.float32)
+        codes = probabilities.argmax(axis=1).astype(np.int8) if len(probabilities) else np.empty(0, np.int8)
+        confidence = probabilities[np.arange(len(codes)), codes]
+        if errors:
+            rows = list(errors)
+            codes[rows] = _NEUTRAL
+            confidence[rows] = 0.0
+        return cls(codes, confidence, probabilities, errors)
+
+    @classmethod
+    def from_results(cls, results):
+        # For methods that only produce per-text dicts (TextBlob, the Inference
+        # API, cascade) and for cache hits
+        n = len(results)
+        index = {label: code for code, label in enumerate(SENTIMENTS)}
+        codes = np.fromiter((index.get(r['sentiment'], _NEUTRAL) if r else _NEUTRAL for r in results),
+                            dtype=np.int8, count=n)
+        confidence = np.fromiter((r.get('confidence', 0.0) if r else 0.0 for r in results),
+                                 dtype=np.float32, count=n)
+        errors = {i: (r or {}).get('error', 'not scored') for i, r in enumerate(results) if not r or 'error' in r}
+
+        probabilities = None
+        if n and all('scores' in r for i, r in enumerate(results) if i not in errors):
+            probabilities = np.zeros((n, len(SENTIMENTS)), dtype=np.float32)
+            for i, r in enumerate(results):
+                if i not in errors:
+                    probabilities[i] = [r['scores'].get(label, 0.0) for label in SENTIMENTS]
+
+        tiers = None
+        if any(r and 'tier' in r for r in results):
+            tiers = pd.Categorical([r.get('tier') if r else None for r in results])
+        return cls(codes, confidence, probabilities, errors, tiers)
+
+    @classmethod
+    def concatenate(cls, parts):
+        parts = [part for part in parts if len(part)] or parts[:1]
+        offsets = np.cumsum([0] + [len(part) for part in parts])
+        probabilities = None
+        if all(part.probabilities is not None for part in parts):
+            probabilities = np.concatenate([part.probabilities for part in parts])
+        tiers = None
+        if any(part.tiers is not None for part in parts):
+            tiers = pd.Categorical(np.concatenate([
+                np.asarray(part.tiers, dtype=object) if part.tiers is not None else np.full(len(part), None)
+                for part in parts
+            ]))
+        return cls(
+            np.concatenate([part.codes for part in parts]),
+            np.concatenate([part.confidence for part in parts]),
+            probabilities,
+            {offset + row: message for offset, part in zip(offsets, parts) for row, message in part.errors.items()},
+            tiers,
+        )
+
+    def take(self, indices):
+        # Rows in the given order, e.g. each tweet's cluster representative
+        indices = np.asarray(indices, dtype=np.intp)
+        errors = {}
+        if self.errors:
+            for row in np.flatnonzero(np.isin(indices, list(self.errors))).tolist():
+                errors[row] = self.errors[int(indices[row])]
+        return SentimentScores(
+            self.codes[indices],
+            self.confidence[indices],
+            self.probabilities[indices] if self.probabilities is not None else None,
+            errors,
+            self.tiers.take(indices) if self.tiers is not None else None,
+        )
+
+    def to_results(self):
+        # The per-text dicts batch_analyze returns, generated one at a time
+        for row in range(len(self.codes)):
+            if row in self.errors:
+                yield {'sentiment': 'neutral', 'confidence': 0.0, 'error': self.errors[row]}
+                continue
+            result = {'sentiment': SENTIMENTS[self.codes[row]], 'confidence': float(self.confidence[row])}
+            if self.probabilities is not None:
+                result['scores'] = dict(zip(SENTIMENTS, self.probabilities[row].tolist()))
+            if self.tiers is not None:
+                result['tier'] = self.tiers[row]
+            yield result
+
+    def assign(self, df):
+        # Categorical sentiment and float32 confidence straight from the arrays
+        df['sentiment'] = pd.Categorical.from_codes(self.codes, categories=SENTIMENTS)
+        df['confidence'] = self.confidence
+        return df
+
+
+def compact_frame(df, string_storage=None):
+    # Downcasts the engagement columns of a result frame; with
+    # string_storage='pyarrow', text columns still held as Python objects
+    # become Arrow-backed strings (pandas 3 already stores them that way)
+    for column in COMPACT_INT_COLUMNS:
+        if column in df.columns and pd.api.types.is_integer_dtype(df[column]) and len(df):
+            downcast = 'unsigned' if df[column].min() >= 0 else 'integer'
+            df[column] = pd.to_numeric(df[column], downcast=downcast)
+    if string_storage:
+        for column in STRING_COLUMNS:
+            if column in df.columns and df[column].dtype == object:
+                df[column] = df[column].astype(pd.StringDtype(string_storage))
+    return df
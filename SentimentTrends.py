@@ -0,0 +1,165 @@
+import numpy as np
+import pandas as pd
+
+from SentimentAggregates import SENTIMENTS, ENGAGEMENT_COLUMNS
+
+# Bucket width of each resolution, in seconds
+RESOLUTIONS = {'minute': 60, 'hour': 3600, 'day': 86400}
+# Buckets kept per resolution, oldest dropped first; None keeps them all
+DEFAULT_RETENTION = {'minute': 7 * 24 * 60, 'hour': 180 * 24, 'day': None}
+
+# Sums kept per bucket: tweets per sentiment, confidence, engagement weight and
+# engagement-weighted sentiment (negative -1, neutral 0, positive +1)
+FIELDS = SENTIMENTS + ['confidence_sum', 'confidence_count', 'weight', 'weighted_sentiment']
+TREND_COLUMNS = ['count'] + SENTIMENTS + ['mean_confidence', 'net_sentiment', 'weighted_sentiment', 'engagement']
+_SENTIMENT_VALUES = np.array([-1.0, 0.0, 1.0])
+
+
+class SentimentTrends:
+    # Sentiment over created_at in minute, hour and day buckets, updated one
+    # scored batch at a time. A bucket only holds sums, so a batch touches just
+    # the buckets its tweets fall in and batches may arrive in any time order
+    # (search pages come newest first). Trend frames, rolling windows and spike
+    # detection are computed from the buckets, never from the tweets. A tweet's
+    # engagement weight is 1 + likes + retweets + replies, so tweets nobody
+    # reacted to still count.
+    def __init__(self, resolutions=tuple(RESOLUTIONS), retention=None):
+        self.resolutions = tuple(resolutions)
+        self.retention = {**DEFAULT_RETENTION, **(retention or {})}
+        # resolution -> {bucket start (epoch seconds): float64 array of FIELDS}
+        self.buckets = {resolution: {} for resolution in self.resolutions}
+        self.total = 0
+        self.undated = 0
+
+    @classmethod
+    def from_dataframe(cls, df, **kwargs):
+        return cls(**kwargs).update(df)
+
+    def update(self, df):
+        if df is None or df.empty or 'sentiment' not in df.columns:
+            return self
+        self.total += len(df)
+        if 'created_at' not in df.columns:
+            self.undated += len(df)
+            return self
+
+        times = pd.to_datetime(df['created_at'], utc=True, errors='coerce')
+        codes = pd.Categorical(df['sentiment'].astype(str), categories=SENTIMENTS).codes
+        keep = (times.notna() & (codes >= 0)).to_numpy()
+        self.undated += int((~keep).sum())
+        if not keep.any():
+            return self
+
+        seconds = ((times[keep] - pd.Timestamp(0, tz='UTC')) // pd.Timedelta(seconds=1)).to_numpy(np.int64)
+        rows = self._rows(df[keep], codes[keep])
+        for resolution in self.resolutions:
+            width = RESOLUTIONS[resolution]
+            starts, inverse = np.unique(seconds // width * width, return_inverse=True)
+            sums = np.column_stack([np.bincount(inverse, weights=column, minlength=len(starts)) for column in rows])
+            self._add(resolution, starts.tolist(), sums)
+        return self
+
+    def merge(self, other):
+        self.total += other.total
+        self.undated += other.undated
+        for resolution in self.resolutions:
+            buckets = other.buckets.get(resolution, {})
+            self._add(resolution, list(buckets), list(buckets.values()))
+        return self
+
+    def frame(self, resolution='hour', last=None):
+        # One row per bucket (TREND_COLUMNS) up to the newest, empty buckets
+        # included: the last buckets, or without last those since the first
+        # bucket but at most the resolution's retention
+        return _derive(self._sums(resolution, last))
+
+    def rolling(self, resolution='hour', window=24, last=None):
+        # Each bucket's trailing window: a number of buckets or a time span like '6h'.
+        # Only the requested buckets and the window before them are reindexed.
+        width = RESOLUTIONS[resolution]
+        if isinstance(window, str):
+            window = max(1, int(pd.Timedelta(window).total_seconds()) // width)
+        last = last or self.retention.get(resolution)
+        sums = self._sums(resolution, last + window - 1 if last else None)
+        rolled = _derive(sums.rolling(window, min_periods=1).sum())
+        return rolled.iloc[-last:] if last else rolled
+
+    def spikes(self, resolution='hour', metric='count', span=24, threshold=4.0, min_periods=6, min_count=10,
+               last=None):
+        # Buckets whose metric is more than threshold standard deviations from
+        # the EWMA of the buckets before it. Tweet counts only spike upwards;
+        # sentiment metrics in either direction. Counts use a Poisson floor on
+        # the deviation so a burst after a quiet stretch still registers, and
+        # buckets with fewer than min_count tweets are too noisy to flag.
+        frame = self.frame(resolution)
+        series = frame[metric]
+        history = series.shift(1).ewm(span=span, min_periods=min_periods)
+        expected, spread = history.mean(), history.std()
+        if metric in ('count', 'engagement') + tuple(SENTIMENTS):
+            spread = np.maximum(spread, np.sqrt(expected.clip(lower=1.0)))
+            zscore = (series - expected) / spread
+            flagged = zscore > threshold
+        else:
+            zscore = (series - expected) / spread.clip(lower=0.05)
+            flagged = zscore.abs() > threshold
+        flagged &= frame['count'] >= min_count
+        spikes = pd.DataFrame({'value': series, 'expected': expected, 'zscore': zscore})[flagged]
+        return spikes.iloc[-last:] if last else spikes
+
+    def _rows(self, df, codes):
+        # Per-tweet FIELDS values, one array per field
+        n = len(codes)
+        confidence = df['confidence'].to_numpy(np.float64) if 'confidence' in df.columns else np.full(n, np.nan)
+        scored = ~np.isnan(confidence)
+        weight = np.ones(n)
+        for column in ENGAGEMENT_COLUMNS:
+            if column in df.columns:
+                weight += pd.to_numeric(df[column], errors='coerce').fillna(0).to_numpy(np.float64)
+        return [(codes == code).astype(np.float64) for code in range(len(SENTIMENTS))] + [
+            np.where(scored, confidence, 0.0), scored.astype(np.float64), weight, weight * _SENTIMENT_VALUES[codes],
+        ]
+
+    def _add(self, resolution, starts, sums):
+        buckets = self.buckets[resolution]
+        for start, row in zip(starts, sums):
+            bucket = buckets.get(start)
+            if bucket is None:
+                buckets[start] = np.array(row, dtype=np.float64)
+            else:
+                bucket += row
+        retention = self.retention.get(resolution)
+        if retention and len(buckets) > retention:
+            for start in sorted(buckets)[:len(buckets) - retention]:
+                del buckets[start]
+
+    def _sums(self, resolution, last=None):
+        # Bucket sums reindexed onto every bucket of the window ending at the newest.
+        # Retention caps the buckets stored, not the time they span, so it caps the
+        # window too: a sparse minute history would otherwise be reindexed onto
+        # months of empty rows on every call.
+        buckets = self.buckets[resolution]
+        if not buckets:
+            return pd.DataFrame(columns=FIELDS, index=pd.DatetimeIndex([], tz='UTC'), dtype=np.float64)
+        width = RESOLUTIONS[resolution]
+        last = last or self.retention.get(resolution)
+        starts = np.array(sorted(buckets), dtype=np.int64)
+        first = starts[0] if not last else max(starts[0], starts[-1] - (last - 1) * width)
+        starts = starts[np.searchsorted(starts, first):]
+        sums = np.zeros(((starts[-1] - first) // width + 1, len(FIELDS)))
+        sums[(starts - first) // width] = [buckets[start] for start in starts.tolist()]
+        index = pd.to_datetime(np.arange(first, starts[-1] + width, width), unit='s', utc=True)
+        return pd.DataFrame(sums, columns=FIELDS, index=index)
+
+
+def _derive(sums):
+    count = sums[SENTIMENTS].sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        trends = pd.DataFrame({
+            'count': count,
+            **{sentiment: sums[sentiment] for sentiment in SENTIMENTS},
+            'mean_confidence': sums['confidence_sum'] / sums['confidence_count'].where(sums['confidence_count'] > 0),
+            'net_sentiment': (sums['positive'] - sums['negative']) / count.where(count > 0),
+            'weighted_sentiment': sums['weighted_sentiment'] / sums['weight'].where(sums['weight'] > 0),
+            'engagement': sums['weight'] - count,
+        }, index=sums.index)
+    return trends[TREND_COLUMNS]
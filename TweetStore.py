@@ -0,0 +1,149 @@
+import os
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+COLUMNS = ['id', 'text', 'created_at', 'author_id', 'retweet_count', 'like_count', 'reply_count']
+
+# SQLite limits the number of bound parameters per statement
+_CHUNK = 900
+
+
+class TweetStore:
+    # Every tweet collected for a query, keyed by (query, id). The primary key
+    # is the ID index: it dedupes re-fetched tweets, so a recurring run only
+    # processes tweets it has not seen. Each query also has a high-water mark
+    # for since_id collection. Search pages come newest first, so the mark only
+    # moves up once a run has paginated all the way down to it; a run cut short
+    # (max_tweets, errors) keeps the old mark plus the next_token of the older
+    # tweets it did not reach, and the next run fetches that gap first.
+    def __init__(self, path="tweet_store.sqlite"):
+        self.path = path
+        self._lock = threading.Lock()
+        self.setup_db()
+
+    def setup_db(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS tweets ("
+            "query TEXT NOT NULL, id INTEGER NOT NULL, text TEXT NOT NULL, created_at TEXT, "
+            "author_id INTEGER, retweet_count INTEGER, like_count INTEGER, reply_count INTEGER, "
+            "collected_at REAL NOT NULL, PRIMARY KEY (query, id)) WITHOUT ROWID"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS marks (query TEXT PRIMARY KEY, since_id INTEGER, next_token TEXT)"
+        )
+        self.conn.commit()
+
+    def high_water_mark(self, query):
+        # since_id for the next run of the query, None if nothing is stored. Stores
+        # from before marks were kept fall back to the newest stored tweet id.
+        with self._lock:
+            row = self.conn.execute("SELECT since_id FROM marks WHERE query = ?", (query,)).fetchone()
+            if row is None:
+                row = self.conn.execute("SELECT MAX(id) FROM tweets WHERE query = ?", (query,)).fetchone()
+        return row[0]
+
+    def gap_token(self, query):
+        # next_token of the older tweets an earlier run did not reach, or None
+        with self._lock:
+            row = self.conn.execute("SELECT next_token FROM marks WHERE query = ?", (query,)).fetchone()
+        return row[0] if row else None
+
+    def advance(self, query, since_id, next_token=None):
+        # Called after a run's tweets are stored with the since_id it searched
+        # from and the next_token it stopped at: None means pagination reached
+        # since_id, so the mark becomes the newest stored tweet
+        with self._lock:
+            if next_token is None:
+                row = self.conn.execute("SELECT MAX(id) FROM tweets WHERE query = ?", (query,)).fetchone()
+                since_id = row[0] if row[0] is not None else since_id
+            self.conn.execute(
+                "INSERT OR REPLACE INTO marks (query, since_id, next_token) VALUES (?, ?, ?)",
+                (query, None if since_id is None else int(since_id), next_token)
+            )
+            self.conn.commit()
+
+    def known_ids(self, query, ids):
+        ids = [int(i) for i in ids]
+        found = set()
+        with self._lock:
+            for start in range(0, len(ids), _CHUNK):
+                chunk = ids[start:start + _CHUNK]
+                placeholders = ','.join('?' * len(chunk))
+                rows = self.conn.execute(
+                    f"SELECT id FROM tweets WHERE query = ? AND id IN ({placeholders})", [query, *chunk]
+                ).fetchall()
+                found.update(row[0] for row in rows)
+        return found
+
+    def new_tweets(self, query, tweets_df):
+        # The rows whose ids are not stored for the query yet
+        if tweets_df is None or tweets_df.empty:
+            return tweets_df
+        tweets_df = tweets_df.drop_duplicates('id')
+        return tweets_df[~tweets_df['id'].isin(self.known_ids(query, tweets_df['id']))]
+
+    def add(self, query, tweets_df):
+        # Stores the tweets not seen before for the query and returns just those rows
+        new_df = self.new_tweets(query, tweets_df)
+        if new_df is None or new_df.empty:
+            return new_df
+
+        now = time.time()
+        rows = [
+            (query, int(row.id), row.text, _timestamp(row.created_at), _int(row.author_id),
+             _int(row.retweet_count), _int(row.like_count), _int(row.reply_count), now)
+            for row in new_df.reindex(columns=COLUMNS).itertuples(index=False)
+        ]
+        with self._lock:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO tweets (query, id, text, created_at, author_id, retweet_count, "
+                "like_count, reply_count, collected_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            self.conn.commit()
+        return new_df
+
+    def load(self, query, since_id=None):
+        # Stored tweets of a query (optionally only those newer than since_id), oldest first
+        sql = f"SELECT {', '.join(COLUMNS)} FROM tweets WHERE query = ?"
+        params = [query]
+        if since_id is not None:
+            sql += " AND id > ?"
+            params.append(int(since_id))
+        with self._lock:
+            df = pd.read_sql_query(sql + " ORDER BY id", self.conn, params=params)
+        df['created_at'] = pd.to_datetime(df['created_at'], utc=True)
+        return df
+
+    def count(self, query=None):
+        with self._lock:
+            if query is None:
+                return self.conn.execute("SELECT COUNT(*) FROM tweets").fetchone()[0]
+            return self.conn.execute("SELECT COUNT(*) FROM tweets WHERE query = ?", (query,)).fetchone()[0]
+
+    def queries(self):
+        with self._lock:
+            return [row[0] for row in self.conn.execute("SELECT DISTINCT query FROM tweets ORDER BY query")]
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+def _timestamp(value):
+    if pd.isna(value):
+        return None
+    return pd.Timestamp(value).isoformat()
+
+
+def _int(value):
+    return None if pd.isna(value) else int(value)
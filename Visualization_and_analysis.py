@@ -1,117 +1,181 @@
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import matplotlib
 import matplotlib.pyplot as plt
-import seaborn as sns
-from wordcloud import WordCloud
-from collections import Counter
+from wordcloud import WordCloud, STOPWORDS
+from SentimentAggregates import SentimentAggregates, SENTIMENTS
+
+# Chart name -> method; render() runs them by name
+CHARTS = {
+    'sentiment_distribution': 'plot_sentiment_distribution',
+    'confidence_distribution': 'plot_confidence_distribution',
+    'wordclouds': 'create_wordclouds',
+    'engagement': 'plot_engagement_by_sentiment',
+}
+
+COLORS = {'negative': '#ff6b6b', 'neutral': '#4ecdc4', 'positive': '#45b7d1'}
+WORDCLOUD_COLORMAPS = {'negative': 'Reds', 'neutral': 'Greys', 'positive': 'Blues'}
 
 class SentimentVisualizer:
-    def __init__(self, df):
+    def __init__(self, df=None, output_dir=None, formats=('png',), aggregates=None):
+        # Without output_dir charts are shown interactively; with it each chart
+        # is saved as <output_dir>/<chart>.<format> and its figure closed.
+        # Charts and insights only read the aggregates, which are built from df
+        # in one pass on first use unless precomputed ones are passed in.
         self.df = df
+        self.output_dir = output_dir
+        self.formats = tuple(formats)
+        self._aggregates = aggregates
         plt.style.use('seaborn-v0_8')
     
+    @property
+    def aggregates(self):
+        if self._aggregates is None:
+            self._aggregates = SentimentAggregates.from_dataframe(self.df)
+        return self._aggregates
+    
+    def render(self, charts=None, workers=1):
+        # Renders charts to files, optionally one worker process per chart.
+        # Returns {chart: [saved paths]}.
+        charts = list(charts or CHARTS)
+        if self.output_dir is None:
+            raise ValueError("render() needs an output_dir to save charts to")
+        
+        if workers <= 1 or len(charts) == 1:
+            # Saved charts never need a display; an interactive backend only slows them down
+            matplotlib.use('Agg')
+            return {chart: getattr(self, CHARTS[chart])() for chart in charts}
+        
+        # Workers receive the (small) aggregates rather than the rows
+        aggregates = self.aggregates
+        with ProcessPoolExecutor(max_workers=min(workers, len(charts)),
+                                 mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_init_render_worker) as executor:
+            futures = {
+                chart: executor.submit(_render_chart, aggregates, chart, self.output_dir, self.formats)
+                for chart in charts
+            }
+            return {chart: future.result() for chart, future in futures.items()}
+    
+    def _finish(self, name, fig=None):
+        fig = fig or plt.gcf()
+        if self.output_dir is None:
+            plt.show()
+            plt.close(fig)
+            return []
+        
+        os.makedirs(self.output_dir, exist_ok=True)
+        paths = []
+        for fmt in self.formats:
+            path = os.path.join(self.output_dir, f"{name}.{fmt}")
+            fig.savefig(path, format=fmt, bbox_inches='tight')
+            paths.append(path)
+        plt.close(fig)
+        return paths
+    
     def plot_sentiment_distribution(self):
         plt.figure(figsize=(10, 6))
+        sentiments = self.aggregates.sentiments()
+        counts = [self.aggregates.counts[s] for s in sentiments]
+        colors = [COLORS.get(s, '#96ceb4') for s in sentiments]
         
         # Count plot
         plt.subplot(1, 2, 1)
-        sentiment_counts = self.df['sentiment'].value_counts()
-        colors = ['#ff6b6b', '#4ecdc4', '#45b7d1']
-        plt.pie(sentiment_counts.values, labels=sentiment_counts.index, 
-                autopct='%1.1f%%', colors=colors, startangle=90)
+        plt.pie(counts, labels=sentiments, autopct='%1.1f%%', colors=colors, startangle=90)
         plt.title('Sentiment Distribution')
         
         # Bar plot
         plt.subplot(1, 2, 2)
-        sns.countplot(data=self.df, x='sentiment', palette=colors)
+        plt.bar(sentiments, counts, color=colors)
         plt.title('Sentiment Counts')
         plt.xlabel('Sentiment')
         plt.ylabel('Count')
         
         plt.tight_layout()
-        plt.show()
+        return self._finish('sentiment_distribution')
     
     def plot_confidence_distribution(self):
         plt.figure(figsize=(12, 4))
         
-        for i, sentiment in enumerate(['negative', 'neutral', 'positive']):
+        for i, sentiment in enumerate(SENTIMENTS):
             plt.subplot(1, 3, i+1)
-            sentiment_data = self.df[self.df['sentiment'] == sentiment]['confidence']
-            plt.hist(sentiment_data, bins=20, alpha=0.7, color=['#ff6b6b', '#4ecdc4', '#45b7d1'][i])
+            bins, counts = self.aggregates.confidence_histogram(sentiment)
+            plt.bar(bins[:-1], counts, width=bins[1:] - bins[:-1], align='edge', alpha=0.7, color=COLORS[sentiment])
             plt.title(f'{sentiment.capitalize()} Confidence')
             plt.xlabel('Confidence Score')
             plt.ylabel('Frequency')
         
         plt.tight_layout()
-        plt.show()
+        return self._finish('confidence_distribution')
     
     def create_wordclouds(self):
         fig, axes = plt.subplots(1, 3, figsize=(18, 6))
-        sentiments = ['negative', 'neutral', 'positive']
-        colors = ['Reds', 'Greys', 'Blues']
         
-        for i, sentiment in enumerate(sentiments):
-            sentiment_text = ' '.join(self.df[self.df['sentiment'] == sentiment]['cleaned_text'])
+        for i, sentiment in enumerate(SENTIMENTS):
+            # Precomputed token counts; no per-sentiment text join
+            frequencies = self.aggregates.word_frequencies(sentiment, max_words=200, stopwords=STOPWORDS)
             
-            if sentiment_text:
+            if frequencies:
                 wordcloud = WordCloud(width=400, height=300, 
                                     background_color='white',
-                                    colormap=colors[i]).generate(sentiment_text)
+                                    colormap=WORDCLOUD_COLORMAPS[sentiment]).generate_from_frequencies(frequencies)
                 
                 axes[i].imshow(wordcloud, interpolation='bilinear')
                 axes[i].set_title(f'{sentiment.capitalize()} Words')
                 axes[i].axis('off')
         
         plt.tight_layout()
-        plt.show()
+        return self._finish('wordclouds', fig)
     
     def plot_engagement_by_sentiment(self):
-        if 'like_count' in self.df.columns:
-            plt.figure(figsize=(12, 4))
-            
-            # Likes by sentiment
-            plt.subplot(1, 3, 1)
-            sns.boxplot(data=self.df, x='sentiment', y='like_count')
-            plt.title('Likes by Sentiment')
-            plt.yscale('log')
-            
-            # Retweets by sentiment
-            plt.subplot(1, 3, 2)
-            sns.boxplot(data=self.df, x='sentiment', y='retweet_count')
-            plt.title('Retweets by Sentiment')
-            plt.yscale('log')
-            
-            # Replies by sentiment
-            plt.subplot(1, 3, 3)
-            sns.boxplot(data=self.df, x='sentiment', y='reply_count')
-            plt.title('Replies by Sentiment')
-            plt.yscale('log')
-            
-            plt.tight_layout()
-            plt.show()
+        columns = [('like_count', 'Likes'), ('retweet_count', 'Retweets'), ('reply_count', 'Replies')]
+        if not self.aggregates.engagement.get('like_count'):
+            return []
+        
+        plt.figure(figsize=(12, 4))
+        for i, (column, title) in enumerate(columns):
+            # Box plots drawn from precomputed quartiles and whiskers
+            plt.subplot(1, 3, i+1)
+            stats = [self.aggregates.box_stats(column, s) for s in self.aggregates.sentiments()]
+            stats = [box for box in stats if box is not None]
+            if stats:
+                plt.gca().bxp(stats, showfliers=False)
+            plt.title(f'{title} by Sentiment')
+            plt.yscale('symlog')  # unlike log, keeps the many zero-engagement tweets visible
+        
+        plt.tight_layout()
+        return self._finish('engagement')
     
     def generate_insights(self):
-        total_tweets = len(self.df)
-        sentiment_counts = self.df['sentiment'].value_counts()
+        aggregates = self.aggregates
+        total_tweets = aggregates.total
         
         print("=== SENTIMENT ANALYSIS INSIGHTS ===")
         print(f"Total tweets analyzed: {total_tweets}")
-        print(f"Positive tweets: {sentiment_counts.get('positive', 0)} ({sentiment_counts.get('positive', 0)/total_tweets*100:.1f}%)")
-        print(f"Neutral tweets: {sentiment_counts.get('neutral', 0)} ({sentiment_counts.get('neutral', 0)/total_tweets*100:.1f}%)")
-        print(f"Negative tweets: {sentiment_counts.get('negative', 0)} ({sentiment_counts.get('negative', 0)/total_tweets*100:.1f}%)")
+        for sentiment in ['positive', 'neutral', 'negative']:
+            print(f"{sentiment.capitalize()} tweets: {aggregates.counts.get(sentiment, 0)} "
+                  f"({aggregates.percentage(sentiment):.1f}%)")
         
-        if 'confidence' in self.df.columns:
-            avg_confidence = self.df['confidence'].mean()
-            print(f"Average confidence: {avg_confidence:.3f}")
+        if aggregates.confidence:
+            print(f"Average confidence: {aggregates.average_confidence():.3f}")
         
         # Most common words by sentiment
         for sentiment in ['positive', 'negative', 'neutral']:
-            sentiment_tweets = self.df[self.df['sentiment'] == sentiment]['cleaned_text']
-            if not sentiment_tweets.empty:
-                all_words = ' '.join(sentiment_tweets).split()
-                common_words = Counter(all_words).most_common(5)
+            common_words = aggregates.top_words(sentiment, 5)
+            if common_words:
                 print(f"\nTop words in {sentiment} tweets:")
                 for word, count in common_words:
                     print(f"  {word}: {count}")
 
+def _init_render_worker():
+    # Render workers never have a display
+    matplotlib.use('Agg')
+
+def _render_chart(aggregates, chart, output_dir, formats):
+    visualizer = SentimentVisualizer(output_dir=output_dir, formats=formats, aggregates=aggregates)
+    return getattr(visualizer, CHARTS[chart])()
+
 # Usage
 # visualizer = SentimentVisualizer(processed_tweets)
 # visualizer.plot_sentiment_distribution()
@@ -119,3 +183,6 @@ class SentimentVisualizer:
 # visualizer.create_wordclouds()
 # visualizer.plot_engagement_by_sentiment()
 # visualizer.generate_insights()
+#
+# Headless: save every chart under charts/, rendering in parallel processes
+# SentimentVisualizer(processed_tweets, output_dir='charts', formats=('png', 'svg')).render(workers=4)
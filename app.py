@@ -1,11 +1,14 @@
 import streamlit as st
 import pandas as pd
 import json
+import time
 from datetime import datetime
 import plotly.express as px
+import plotly.graph_objects as go
 import os
 from dotenv import load_dotenv
 from main import TwitterSentimentPipeline
+from JobManager import JobManager
 
 
 # Load environment variables
@@ -43,11 +46,24 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+@st.cache_resource
+def get_job_manager():
+    # One manager per server process, shared by every session
+    return JobManager(max_workers=2)
+
+job_manager = get_job_manager()
+
 # Session state
+if 'job_id' not in st.session_state:
+    st.session_state.job_id = None
 if 'pipeline' not in st.session_state:
     st.session_state.pipeline = None
 if 'results' not in st.session_state:
     st.session_state.results = None
+if 'aggregates' not in st.session_state:
+    st.session_state.aggregates = None
+if 'trends' not in st.session_state:
+    st.session_state.trends = None
 if 'analysis_complete' not in st.session_state:
     st.session_state.analysis_complete = False
 
@@ -68,6 +84,11 @@ if st.sidebar.button("🔧 Initialize Pipeline"):
     except Exception as e:
         st.sidebar.error(f"❌ Error initializing pipeline: {e}")
 
+method = st.sidebar.selectbox("🧠 Sentiment model:", ['textblob', 'linear', 'cascade', 'roberta'])
+
+# Analyses run as background jobs; the page reruns every second while one is in flight
+job = job_manager.get(st.session_state.job_id) if st.session_state.job_id else None
+
 # Main
 if st.session_state.pipeline is None:
     st.info("👆 Please click 'Initialize Pipeline' in the sidebar to get started.")
@@ -79,45 +100,62 @@ else:
         query = st.text_input("🔍 Enter search query:", placeholder="e.g., Python, Tesla, Bitcoin")
 
     with col2:
-        max_tweets = st.number_input("📈 Max tweets:", min_value=10, max_value=10, value=10, step=10)
+        max_tweets = st.number_input("📈 Max tweets:", min_value=10, max_value=5000, value=100, step=10)
 
-    if st.button("🚀 Run Analysis", type="primary"):
+    running = job is not None and not job.done
+    if st.button("🚀 Run Analysis", type="primary", disabled=running):
         if query:
-            with st.spinner("🔄 Analyzing tweets..."):
-                try:
-                    results = st.session_state.pipeline.run_analysis(
-                        query=query,
-                        max_tweets=max_tweets,
-                        save_results=False
-                    )
-                    if results.empty or 'text' not in results.columns:
-                        st.warning("⚠️ No valid tweets collected. Try a different query.")
-                    else:
-                        st.session_state.results = results
-                        st.session_state.analysis_complete = True
-                        st.success(f"✅ Analysis complete! {len(results)} tweets analyzed.")
-                except Exception as e:
-                    st.error(f"❌ Error: {e}")
+            job = job_manager.submit(st.session_state.pipeline, query, max_tweets=max_tweets, method=method)
+            st.session_state.job_id = job.id
+            st.session_state.results = None
+            st.session_state.analysis_complete = False
         else:
             st.warning("⚠️ Enter a search query.")
 
+    if job is not None:
+        st.progress(job.progress, text=f"🔄 {job.status.title()} '{job.query}': {job.analyzed} analyzed, "
+                                       f"{job.collected} of {job.max_tweets} collected")
+        if not job.done and st.button("⏹️ Cancel Analysis"):
+            job_manager.cancel(job.id)
+
+        # Results render progressively as each page is scored
+        partial = job.results()
+        if not partial.empty:
+            st.session_state.results = partial
+            st.session_state.aggregates = job.aggregates()
+            st.session_state.trends = job.trends()
+            st.session_state.analysis_complete = True
+
+        if job.status == 'done':
+            if partial.empty:
+                st.warning("⚠️ No valid tweets collected. Try a different query.")
+            else:
+                st.success(f"✅ Analysis complete! {len(partial)} tweets analyzed.")
+        elif job.status == 'cancelled':
+            st.warning(f"⏹️ Analysis cancelled after {len(partial)} tweets.")
+        elif job.status == 'failed':
+            st.error(f"❌ Error: {job.error}")
+
 # Results
 if st.session_state.analysis_complete and st.session_state.results is not None:
     st.header("📈 Analysis Results")
     results = st.session_state.results
+    # Every widget below reads the job's precomputed aggregates, not the rows
+    aggregates = st.session_state.aggregates
+    sentiments = aggregates.sentiments()
+    counts = [aggregates.counts[s] for s in sentiments]
+    colors = {'positive': '#45b7d1', 'neutral': '#96ceb4', 'negative': '#ff6b6b'}
 
     # Metrics
     col1, col2, col3, col4 = st.columns(4)
-    sentiment_counts = results['sentiment'].value_counts()
-    total_tweets = len(results)
-    avg_confidence = results['confidence'].mean()
+    avg_confidence = aggregates.average_confidence()
 
     with col1:
-        st.metric("Total Tweets", total_tweets)
+        st.metric("Total Tweets", aggregates.total)
     with col2:
-        st.metric("Positive %", f"{(sentiment_counts.get('positive', 0)/total_tweets)*100:.1f}%")
+        st.metric("Positive %", f"{aggregates.percentage('positive'):.1f}%")
     with col3:
-        st.metric("Negative %", f"{(sentiment_counts.get('negative', 0)/total_tweets)*100:.1f}%")
+        st.metric("Negative %", f"{aggregates.percentage('negative'):.1f}%")
     with col4:
         st.metric("Avg Confidence", f"{avg_confidence:.3f}")
 
@@ -127,73 +165,96 @@ if st.session_state.analysis_complete and st.session_state.results is not None:
 
     with col1:
         fig_pie = px.pie(
-            values=sentiment_counts.values,
-            names=sentiment_counts.index,
+            values=counts,
+            names=sentiments,
             title="Sentiment Distribution",
-            color_discrete_map={
-                'positive': '#45b7d1',
-                'neutral': '#96ceb4',
-                'negative': '#ff6b6b'
-            }
+            color=sentiments,
+            color_discrete_map=colors
         )
         st.plotly_chart(fig_pie, use_container_width=True)
 
     with col2:
         fig_bar = px.bar(
-            x=sentiment_counts.index,
-            y=sentiment_counts.values,
+            x=sentiments,
+            y=counts,
             title="Sentiment Counts",
-            color=sentiment_counts.index,
-            color_discrete_map={
-                'positive': '#45b7d1',
-                'neutral': '#96ceb4',
-                'negative': '#ff6b6b'
-            }
+            color=sentiments,
+            color_discrete_map=colors
         )
         fig_bar.update_layout(showlegend=False)
         st.plotly_chart(fig_bar, use_container_width=True)
 
     # Confidence histogram
     st.subheader("🎯 Confidence Distribution")
-    fig_conf = px.histogram(
-        results,
+    histogram = []
+    for sentiment in sentiments:
+        bins, bin_counts = aggregates.confidence_histogram(sentiment)
+        histogram += [{'confidence': (lo + hi) / 2, 'count': int(c), 'sentiment': sentiment}
+                      for lo, hi, c in zip(bins[:-1], bins[1:], bin_counts)]
+    fig_conf = px.bar(
+        pd.DataFrame(histogram, columns=['confidence', 'count', 'sentiment']),
         x='confidence',
+        y='count',
         color='sentiment',
-        nbins=20,
         title="Confidence Score Distribution by Sentiment",
-        color_discrete_map={
-            'positive': '#45b7d1',
-            'neutral': '#96ceb4',
-            'negative': '#ff6b6b'
-        }
+        color_discrete_map=colors
     )
+    fig_conf.update_layout(bargap=0)
     st.plotly_chart(fig_conf, use_container_width=True)
 
-    # Engagement metrics
-    if 'like_count' in results.columns:
-        st.subheader("💬 Engagement by Sentiment")
-        col1, col2, col3 = st.columns(3)
-
+    # Sentiment over time, from the job's time buckets
+    trends = st.session_state.trends
+    if trends is not None and any(trends.buckets.values()):
+        st.subheader("📉 Sentiment Over Time")
+        col1, col2 = st.columns(2)
         with col1:
-            fig_likes = px.box(results, x='sentiment', y='like_count', color='sentiment', title="Likes by Sentiment",
-                               color_discrete_map={'positive': '#45b7d1', 'neutral': '#96ceb4', 'negative': '#ff6b6b'})
-            fig_likes.update_layout(yaxis_type='log')
-            st.plotly_chart(fig_likes, use_container_width=True)
-
+            resolution = st.selectbox("Bucket:", ['minute', 'hour', 'day'], index=1)
         with col2:
-            fig_retweets = px.box(results, x='sentiment', y='retweet_count', color='sentiment',
-                                  title="Retweets by Sentiment",
-                                  color_discrete_map={'positive': '#45b7d1', 'neutral': '#96ceb4', 'negative': '#ff6b6b'})
-            fig_retweets.update_layout(yaxis_type='log')
+            window = st.number_input("Rolling window (buckets):", min_value=1, max_value=168, value=6)
+        frame = trends.frame(resolution, last=1000)
+        rolled = trends.rolling(resolution, int(window), last=len(frame))
+        spikes = trends.spikes(resolution, last=len(frame))
+
+        fig_volume = go.Figure()
+        for sentiment in ['negative', 'neutral', 'positive']:
+            fig_volume.add_trace(go.Bar(x=frame.index, y=frame[sentiment], name=sentiment,
+                                        marker_color=colors[sentiment]))
+        if not spikes.empty:
+            fig_volume.add_trace(go.Scatter(x=spikes.index, y=spikes['value'], mode='markers', name='spike',
+                                            marker=dict(symbol='triangle-down', size=12, color='black')))
+        fig_volume.update_layout(barmode='stack', title=f"Tweets per {resolution}")
+        st.plotly_chart(fig_volume, use_container_width=True)
+
+        fig_trend = go.Figure()
+        fig_trend.add_trace(go.Scatter(x=rolled.index, y=rolled['net_sentiment'], name='net sentiment'))
+        fig_trend.add_trace(go.Scatter(x=rolled.index, y=rolled['weighted_sentiment'],
+                                       name='engagement-weighted'))
+        fig_trend.update_layout(title=f"Sentiment, rolling {int(window)} {resolution}(s) "
+                                      f"(+1 all positive, -1 all negative)", yaxis_range=[-1, 1])
+        st.plotly_chart(fig_trend, use_container_width=True)
+        if trends.undated:
+            st.caption(f"{trends.undated} tweets without a timestamp are not shown.")
 
-            st.plotly_chart(fig_retweets, use_container_width=True)
-
-        with col3:
-            fig_replies = px.box(results, x='sentiment', y='reply_count', color='sentiment',
-                                 title="Replies by Sentiment",
-                                 color_discrete_map={'positive': '#45b7d1', 'neutral': '#96ceb4', 'negative': '#ff6b6b'})
-            fig_replies.update_layout(yaxis_type='log')
-            st.plotly_chart(fig_replies, use_container_width=True)
+    # Engagement metrics
+    if aggregates.engagement.get('like_count'):
+        st.subheader("💬 Engagement by Sentiment")
+        columns = st.columns(3)
+
+        for col, (column, title) in zip(columns, [('like_count', 'Likes'), ('retweet_count', 'Retweets'),
+                                                  ('reply_count', 'Replies')]):
+            with col:
+                # Box plots from precomputed quartiles and whiskers
+                fig_box = go.Figure()
+                for sentiment in sentiments:
+                    box = aggregates.box_stats(column, sentiment)
+                    if box is not None:
+                        fig_box.add_trace(go.Box(
+                            x=[sentiment], name=sentiment, marker_color=colors.get(sentiment),
+                            q1=[box['q1']], median=[box['med']], q3=[box['q3']],
+                            lowerfence=[box['whislo']], upperfence=[box['whishi']]
+                        ))
+                fig_box.update_layout(title=f"{title} by Sentiment", yaxis_type='log', showlegend=False)
+                st.plotly_chart(fig_box, use_container_width=True)
 
     # Sample tweets
     st.subheader("📝 Sample Tweets by Sentiment")
@@ -201,17 +262,35 @@ if st.session_state.analysis_complete and st.session_state.results is not None:
 
     for i, sentiment in enumerate(['positive', 'neutral', 'negative']):
         with tabs[i]:
-            subset = results[results['sentiment'] == sentiment]
-            if not subset.empty:
-                top = subset.nlargest(5, 'confidence')
-                for _, row in top.iterrows():
-                    with st.expander(f"Confidence: {row['confidence']:.3f}"):
-                        st.write(row['text'])
+            top = aggregates.top_examples(sentiment)
+            if top:
+                for row in top:
+                    with st.expander(f"Confidence: {row.get('confidence', 0):.3f}"):
+                        st.write(row.get('text', ''))
                         if 'created_at' in row:
                             st.caption(f"Posted: {row['created_at']}")
             else:
                 st.info(f"No {sentiment} tweets found.")
 
+    # Pipeline metrics of the last run
+    metrics = job.metrics if job is not None else None
+    if metrics is not None:
+        st.subheader("⏱️ Pipeline Metrics")
+        record = metrics.to_record()
+        counters = record['counters']
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Run Time", f"{record['wall_seconds']:.2f}s")
+        with col2:
+            st.metric("API Calls", counters.get('api_calls', 0))
+        with col3:
+            st.metric("Cache Hits", counters.get('cache_hits', 0))
+        with col4:
+            st.metric("Rate-limit Sleep", f"{counters.get('rate_limit_sleep_seconds', 0):.1f}s")
+        stages_df = pd.DataFrame.from_dict(record['stages'], orient='index')
+        st.dataframe(stages_df[['items', 'wall_seconds', 'cpu_seconds', 'items_per_second', 'peak_rss_mb']],
+                     use_container_width=True)
+
     # Download section
     st.subheader("💾 Download Results")
     col1, col2 = st.columns(2)
@@ -221,12 +300,10 @@ if st.session_state.analysis_complete and st.session_state.results is not None:
         st.download_button("📄 Download CSV", csv, f"sentiment_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv", "text/csv")
 
     with col2:
-        summary = {
-            'total_tweets': len(results),
-            'sentiment_distribution': sentiment_counts.to_dict(),
-            'average_confidence': float(avg_confidence),
-            'timestamp': datetime.now().isoformat()
-        }
+        summary = aggregates.summary()
+        summary['timestamp'] = datetime.now().isoformat()
+        if metrics is not None:
+            summary['metrics'] = metrics.to_record()
         json_str = json.dumps(summary, indent=2)
         st.download_button("📊 Download Summary JSON", json_str, f"sentiment_summary_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json", "application/json")
 
@@ -236,17 +313,29 @@ single_text = st.text_area("Enter text to analyze:")
 
 if st.button("🎯 Analyze Text") and single_text and st.session_state.pipeline:
     try:
-        result = st.session_state.pipeline.analyzer.analyze_with_textblob(single_text)
+        # Same model as the sidebar; TextBlob reports polarity/subjectivity, the models confidence/scores
+        result = st.session_state.pipeline.analyzer.batch_analyze([single_text], method=method)[0]
+        if result is None or 'error' in result:
+            raise ValueError(result.get('error') if result else f"{method} returned no result")
         col1, col2 = st.columns(2)
 
         with col1:
             st.metric("Sentiment", result['sentiment'].title())
-            st.metric("Confidence", f"{result['confidence']:.3f}")
+            if 'confidence' in result:
+                st.metric("Confidence", f"{result['confidence']:.3f}")
+            else:
+                st.metric("Polarity", f"{result['polarity']:.3f}")
+                st.metric("Subjectivity", f"{result['subjectivity']:.3f}")
 
         with col2:
-            df = pd.DataFrame([{'Sentiment': k.title(), 'Score': v} for k, v in result['scores'].items()])
-            fig = px.bar(df, x='Sentiment', y='Score', color='Sentiment', title="Sentiment Scores",
-                         color_discrete_map={'Positive': '#45b7d1', 'Neutral': '#96ceb4', 'Negative': '#ff6b6b'})
+            if 'scores' in result:
+                df = pd.DataFrame([{'Sentiment': k.title(), 'Score': v} for k, v in result['scores'].items()])
+                fig = px.bar(df, x='Sentiment', y='Score', color='Sentiment', title="Sentiment Scores",
+                             color_discrete_map={'Positive': '#45b7d1', 'Neutral': '#96ceb4', 'Negative': '#ff6b6b'})
+            else:
+                df = pd.DataFrame([{'Measure': 'Polarity', 'Value': result['polarity']},
+                                   {'Measure': 'Subjectivity', 'Value': result['subjectivity']}])
+                fig = px.bar(df, x='Measure', y='Value', title="TextBlob Scores", range_y=[-1, 1])
             st.plotly_chart(fig, use_container_width=True)
     except Exception as e:
         st.error(f"Error analyzing text: {e}")
@@ -254,3 +343,8 @@ if st.button("🎯 Analyze Text") and single_text and st.session_state.pipeline:
 # Footer
 st.markdown("---")
 st.markdown("Built with ❤️ using Streamlit | Twitter Sentiment Analysis Tool")
+
+# Poll the running job
+if job is not None and not job.done:
+    time.sleep(1)
+    st.rerun()
@@ -0,0 +1,56 @@
+import argparse
+import os
+import re
+import string
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic import make_texts
+from DataPreprocessing import TwitterPreprocessor
+
+
+def clean_tweet_original(tweet):
+    # Cleaning as it was before patterns were precompiled, kept as the reference
+    tweet = tweet.lower()
+    tweet = re.sub(r'http\S+|www\S+|https\S+', 'http', tweet, flags=re.MULTILINE)
+    tweet = re.sub(r'@\w+', '@user', tweet)
+    tweet = re.sub(r'#(\w+)', r'\1', tweet)
+    tweet = re.sub(r'\s+', ' ', tweet).strip()
+    tweet = tweet.translate(str.maketrans('', '', string.punctuation))
+    return tweet
+
+
+def timed(fn, texts):
+    start = time.perf_counter()
+    result = fn(texts)
+    return result, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Equivalence and throughput of tweet cleaning implementations")
+    parser.add_argument("--tweets", type=int, default=200000)
+    parser.add_argument("--duplicate-ratio", type=float, default=0.3)
+    args = parser.parse_args()
+
+    texts = pd.Series(make_texts(args.tweets, args.duplicate_ratio))
+    preprocessor = TwitterPreprocessor()
+
+    implementations = [
+        ("original apply", lambda s: s.apply(clean_tweet_original)),
+        ("precompiled apply", lambda s: s.apply(preprocessor.clean_tweet)),
+        ("vectorized", preprocessor.clean_series),
+    ]
+
+    reference = None
+    print(f"tweets={args.tweets} duplicate_ratio={args.duplicate_ratio}")
+    print(f"{'implementation':<20} {'seconds':>9} {'sec / 1M tweets':>16} {'identical':>10}")
+    for name, fn in implementations:
+        cleaned, elapsed = timed(fn, texts)
+        if reference is None:
+            reference = cleaned
+        identical = cleaned.tolist() == reference.tolist()
+        print(f"{name:<20} {elapsed:>9.3f} {elapsed / args.tweets * 1e6:>16.2f} {str(identical):>10}")
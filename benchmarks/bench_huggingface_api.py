@@ -0,0 +1,53 @@
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic import make_texts
+from FakeInferenceAPI import FakeInferenceServer
+from SentimentAnalysis import SentimentAnalyzer
+
+
+def per_text_requests(url, texts):
+    # The Inference API call as it was before HuggingFaceClient: one bare post per text
+    for text in texts:
+        requests.post(url, json={"inputs": text, "options": {"wait_for_model": True}})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-text vs pooled, batched Inference API calls on a local mock")
+    parser.add_argument("--texts", type=int, default=2000)
+    parser.add_argument("--latency-ms", type=float, default=20, help="simulated per-request overhead")
+    parser.add_argument("--per-text-ms", type=float, default=2, help="simulated inference time per input")
+    parser.add_argument("--loading-requests", type=int, default=3, help="initial 503 'model is loading' answers")
+    args = parser.parse_args()
+
+    texts = make_texts(args.texts)
+    server_args = dict(latency=args.latency_ms / 1000, per_text_latency=args.per_text_ms / 1000)
+    print(f"texts={args.texts} latency={args.latency_ms:g}ms per_text={args.per_text_ms:g}ms "
+          f"batch={os.getenv('HF_API_BATCH_SIZE', '16')} concurrency={os.getenv('HF_API_CONCURRENCY', '4')}")
+
+    with FakeInferenceServer(**server_args) as server:
+        start = time.perf_counter()
+        per_text_requests(server.model_url(), texts)
+        per_text_seconds = time.perf_counter() - start
+        print(f"per-text requests: {per_text_seconds:8.2f}s  requests={server.requests} "
+              f"connections={server.connections}")
+
+    with FakeInferenceServer(loading_requests=args.loading_requests, **server_args) as server:
+        analyzer = SentimentAnalyzer(hf_api_url=server.model_url(), hf_fallback=None)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = analyzer.batch_analyze(texts, method='huggingface_api')
+        client_seconds = time.perf_counter() - start
+        stats = analyzer._huggingface().stats()
+        print(f"client:            {client_seconds:8.2f}s  requests={server.requests} "
+              f"connections={server.connections} max_in_flight={server.max_in_flight} "
+              f"retries={stats['retries']} errors={sum('error' in r for r in results)} "
+              f"({per_text_seconds / client_seconds:.1f}x)")
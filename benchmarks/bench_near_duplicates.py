@@ -0,0 +1,53 @@
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic import make_tweets
+from DataPreprocessing import TwitterPreprocessor
+from NearDuplicates import NearDuplicateDetector
+from SentimentAnalysis import SentimentAnalyzer
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scoring work saved by collapsing near-duplicate tweets")
+    parser.add_argument("--tweets", type=int, default=100000)
+    parser.add_argument("--near-duplicate-ratio", type=float, default=0.3)
+    parser.add_argument("--threshold", type=float, default=0.7)
+    parser.add_argument("--method", default="textblob")
+    args = parser.parse_args()
+
+    tweets = make_tweets(args.tweets, near_duplicate_ratio=args.near_duplicate_ratio)
+    df = TwitterPreprocessor().preprocess_dataframe(tweets)
+    analyzer = SentimentAnalyzer()
+    print(f"tweets={args.tweets} after exact dedup={len(df)} threshold={args.threshold} method={args.method}")
+
+    detector = NearDuplicateDetector(threshold=args.threshold)
+    clustered, cluster_seconds = timed(detector.annotate, df)
+    representatives = NearDuplicateDetector.representatives(clustered)
+    stats = detector.last_stats
+    print(f"clusters={stats['clusters']} reduction={stats['reduction_ratio']:.1%} "
+          f"largest={clustered['cluster_size'].max()} cluster time={cluster_seconds:.2f}s")
+
+    full, full_seconds = timed(analyzer.batch_analyze, df['cleaned_text'].tolist(), method=args.method)
+    collapsed, collapsed_seconds = timed(analyzer.batch_analyze, representatives['cleaned_text'].tolist(),
+                                         method=args.method)
+    by_cluster = dict(zip(representatives['cluster_id'], (r['sentiment'] for r in collapsed)))
+    propagated = [by_cluster[cluster_id] for cluster_id in clustered['cluster_id']]
+    agreement = sum(a == r['sentiment'] for a, r in zip(propagated, full)) / len(full)
+
+    print(f"score all:             {full_seconds:8.2f}s")
+    print(f"cluster + score reps:  {cluster_seconds + collapsed_seconds:8.2f}s "
+          f"({full_seconds / (cluster_seconds + collapsed_seconds):.2f}x)")
+    print(f"label agreement with scoring every tweet: {agreement:.1%}")
@@ -0,0 +1,53 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic import make_texts
+from SentimentAnalysis import SentimentAnalyzer, DEFAULT_MODEL_NAME
+
+
+def run(method, n, worker_counts, batch_size, torch_threads, model_name):
+    texts = make_texts(n)
+    print(f"method={method} texts={n} batch_size={batch_size} torch_threads={torch_threads}")
+    print(f"{'workers':>8} {'seconds':>10} {'texts/sec':>12} {'speedup':>8}")
+
+    baseline = None
+    for workers in worker_counts:
+        analyzer = SentimentAnalyzer(model_name=model_name)
+        # Warm up so imports and model loading are not counted as scoring time
+        if workers > 1:
+            list(analyzer.analyze_parallel(texts[:workers * batch_size], method=method, workers=workers,
+                                           batch_size=batch_size, torch_threads=torch_threads))
+        else:
+            analyzer.batch_analyze(texts[:batch_size], method=method, batch_size=batch_size)
+
+        start = time.perf_counter()
+        if workers > 1:
+            results = list(analyzer.analyze_parallel(texts, method=method, workers=workers,
+                                                     batch_size=batch_size, torch_threads=torch_threads))
+        else:
+            results = analyzer.batch_analyze(texts, method=method, batch_size=batch_size)
+        elapsed = time.perf_counter() - start
+        analyzer.shutdown_workers()
+
+        assert len(results) == len(texts)
+        throughput = n / elapsed
+        baseline = baseline or throughput
+        print(f"{workers:>8} {elapsed:>10.2f} {throughput:>12.1f} {throughput / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Throughput of parallel sentiment scoring vs. worker count")
+    parser.add_argument("--method", default="textblob", choices=["textblob", "roberta"])
+    parser.add_argument("--texts", type=int, default=20000)
+    parser.add_argument("--workers", default="1,2,4,8", help="comma separated worker counts")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--torch-threads", type=int, default=1)
+    parser.add_argument("--model-name", default=DEFAULT_MODEL_NAME)
+    args = parser.parse_args()
+
+    run(args.method, args.texts, [int(w) for w in args.workers.split(',')],
+        args.batch_size, args.torch_threads, args.model_name)
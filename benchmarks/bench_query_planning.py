@@ -0,0 +1,38 @@
+import argparse
+import contextlib
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from DataCollection import TwitterDataCollector
+from FakeTwitterAPI import FakeTwitterClient
+from QueryPlanner import QueryPlanner
+from RequestScheduler import RequestScheduler
+
+PLANNERS = {
+    'client-side filters': QueryPlanner(pushdown=False),
+    'pushed down': QueryPlanner(),
+    'pushed down, no replies': QueryPlanner(exclude_replies=True),
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="API pages and tweets fetched per kept tweet, by query plan")
+    parser.add_argument("--tweets", type=int, default=5000, help="tweets to keep")
+    parser.add_argument("--query", default="python")
+    parser.add_argument("--non-english-ratio", type=float, default=0.1)
+    args = parser.parse_args()
+
+    print(f"query={args.query!r} keep={args.tweets} non_english_ratio={args.non_english_ratio}")
+    print(f"{'plan':<26} {'API calls':>9} {'fetched':>8} {'kept':>6} {'kept %':>7} {'retweets':>9}  query sent")
+    for name, planner in PLANNERS.items():
+        client = FakeTwitterClient(total_tweets=args.tweets * 10, non_english_ratio=args.non_english_ratio)
+        collector = TwitterDataCollector(client=client, planner=planner,
+                                         scheduler=RequestScheduler(max_requests=10 ** 9, window_seconds=1))
+        with contextlib.redirect_stdout(io.StringIO()):
+            df = collector.collect_tweets(args.query, args.tweets)
+        retweets = int(df['text'].str.startswith('RT @').sum())
+        print(f"{name:<26} {client.calls:>9} {collector.fetched:>8} {collector.kept:>6} "
+              f"{collector.kept / collector.fetched:>7.0%} {retweets:>9}  {planner.plan(args.query).query}")
@@ -0,0 +1,58 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from synthetic import make_tweets
+from QueryPlanner import QueryPlanner
+from ReplayCollection import ArchiveTweetCollector, write_archive
+
+
+def naive_replay(path, query):
+    # Line-by-line json.loads of every record into a DataFrame, then filtering
+    with open(path, encoding='utf-8') as f:
+        df = pd.json_normalize([json.loads(line) for line in f])
+    if query != '*':
+        df = df[df['text'].str.lower().str.contains(query.lower(), regex=False)]
+    return df[~df['text'].str.startswith('RT @')]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archive replay throughput: naive json reads vs ArchiveTweetCollector")
+    parser.add_argument("--tweets", type=int, default=1_000_000)
+    parser.add_argument("--queries", default="*,python,release", help="single terms, comma-separated")
+    parser.add_argument("--dir", default=None, help="where to write the archives (a temp dir by default)")
+    args = parser.parse_args()
+
+    directory = args.dir or tempfile.mkdtemp(prefix="replay_bench_")
+    tweets = make_tweets(args.tweets)
+    plain = write_archive(tweets, os.path.join(directory, "archive.jsonl"))
+    gzipped = write_archive(tweets, os.path.join(directory, "archive.jsonl.gz"))
+    size_mb = os.path.getsize(plain) / 1e6
+    print(f"tweets={args.tweets} archive={size_mb:.0f}MB gz={os.path.getsize(gzipped) / 1e6:.0f}MB dir={directory}")
+    print(f"{'query':<24} {'reader':<22} {'seconds':>8} {'tweets/s':>10} {'MB/s':>7} {'kept':>8}")
+
+    for query in args.queries.split(','):
+        start = time.perf_counter()
+        kept = len(naive_replay(plain, query))
+        seconds = time.perf_counter() - start
+        print(f"{query:<24} {'json.loads per line':<22} {seconds:>8.2f} {args.tweets / seconds:>10,.0f} "
+              f"{size_mb / seconds:>7.0f} {kept:>8}")
+
+        for name, path in (("mmap", plain), ("gzip stream", gzipped)):
+            # lang is implied by the archive, so only the retweet filter is planned
+            collector = ArchiveTweetCollector(path, planner=QueryPlanner(lang=None))
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                df = collector.collect_tweets(query, args.tweets, columns=QueryPlanner.columns_for(['score']))
+            seconds = time.perf_counter() - start
+            print(f"{query:<24} {name:<22} {seconds:>8.2f} {args.tweets / seconds:>10,.0f} "
+                  f"{size_mb / seconds:>7.0f} {len(df):>8}")
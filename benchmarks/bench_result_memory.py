@@ -0,0 +1,72 @@
+import argparse
+import contextlib
+import gc
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pyarrow as pa
+
+from synthetic import make_tweets, parse_size
+from run_suite import ensure_linear_model
+from DataPreprocessing import TwitterPreprocessor
+from SentimentAnalysis import SentimentAnalyzer
+from SentimentScores import compact_frame
+
+
+def dict_results(analyzer, df, method):
+    # The result assembly before SentimentScores: one dict per tweet, copied into columns
+    results = analyzer.batch_analyze(df['cleaned_text'].tolist(), method=method)
+    df['sentiment'] = [r['sentiment'] for r in results]
+    df['confidence'] = [r.get('confidence', 0) for r in results]
+    return df, results
+
+
+def columnar_results(analyzer, df, method, string_storage):
+    scores = analyzer.analyze_columns(df['cleaned_text'], method=method)
+    scores.assign(df)
+    return compact_frame(df, string_storage), scores
+
+
+def measure(name, fn, processed):
+    # tracemalloc sees Python and numpy allocations; Arrow buffers are counted separately
+    df = processed.copy(deep=True)
+    gc.collect()
+    arrow_before = pa.total_allocated_bytes()
+    tracemalloc.start()
+    start = time.perf_counter()
+    df, results = fn(df)
+    seconds = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    arrow = (pa.total_allocated_bytes() - arrow_before) / 1e6
+    frame = df.memory_usage(deep=True).sum() / 1e6
+    print(f"{name:<34} {seconds:>8.2f} {peak / 1e6:>10.0f} {current / 1e6:>10.0f} {arrow:>9.0f} {frame:>9.0f}")
+    return df
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Memory of scored result frames: per-row dicts vs columnar scores")
+    parser.add_argument("--size", default="1m")
+    parser.add_argument("--method", default="linear", help="linear or a RoBERTa backend")
+    args = parser.parse_args()
+
+    n = parse_size(args.size)
+    workdir = tempfile.mkdtemp(prefix="result_memory_")
+    analyzer = SentimentAnalyzer(linear_model_path=ensure_linear_model(workdir) if args.method == 'linear' else None)
+    with contextlib.redirect_stdout(io.StringIO()):
+        analyzer.batch_analyze(["warm up the model"], method=args.method)
+    processed = TwitterPreprocessor().preprocess_dataframe(make_tweets(n))
+    print(f"tweets={n} scored={len(processed)} method={args.method}")
+    print(f"{'result layout':<34} {'seconds':>8} {'peak MB':>10} {'kept MB':>10} {'arrow MB':>9} {'frame MB':>9}")
+
+    measure("per-row dicts", lambda df: dict_results(analyzer, df, args.method), processed)
+    measure("columnar", lambda df: columnar_results(analyzer, df, args.method, None), processed)
+    df = measure("columnar + Arrow strings", lambda df: columnar_results(analyzer, df, args.method, 'pyarrow'),
+                 processed)
+    print("dtypes: " + ", ".join(f"{column}={dtype}" for column, dtype in df.dtypes.astype(str).items()))
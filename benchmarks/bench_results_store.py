@@ -0,0 +1,56 @@
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic import make_results
+from ResultsStore import ResultsStore
+
+
+def directory_size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(path) for name in names)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CSV vs partitioned Parquet results store")
+    parser.add_argument("--rows", type=int, default=200000)
+    args = parser.parse_args()
+
+    df = make_results(args.rows)
+    workdir = tempfile.mkdtemp(prefix="bench_results_store_")
+    try:
+        csv_path = os.path.join(workdir, "results.csv")
+        _, csv_write = timed(lambda: df.to_csv(csv_path, index=False))
+        reloaded, csv_read = timed(lambda: pd.read_csv(csv_path))
+        _, csv_summary = timed(lambda: pd.read_csv(csv_path)['sentiment'].value_counts())
+
+        store = ResultsStore(os.path.join(workdir, "store"))
+        _, pq_write = timed(lambda: store.append(df, "benchmark query"))
+        typed, pq_read = timed(lambda: store.read(query="benchmark query"))
+        _, pq_summary = timed(lambda: store.summarize(query="benchmark query"))
+
+        print(f"rows={args.rows}")
+        print(f"{'format':<10} {'write s':>9} {'size MB':>9} {'reload s':>9} {'summary s':>10}")
+        print(f"{'csv':<10} {csv_write:>9.3f} {directory_size(csv_path) / 1e6:>9.2f} "
+              f"{csv_read:>9.3f} {csv_summary:>10.3f}")
+        print(f"{'parquet':<10} {pq_write:>9.3f} {directory_size(store.root) / 1e6:>9.2f} "
+              f"{pq_read:>9.3f} {pq_summary:>10.3f}")
+        print(f"csv reload dtypes: created_at={reloaded['created_at'].dtype}, sentiment={reloaded['sentiment'].dtype}")
+        print(f"parquet reload dtypes: created_at={typed['created_at'].dtype}, sentiment={typed['sentiment'].dtype}")
+    finally:
+        shutil.rmtree(workdir)
@@ -0,0 +1,54 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic import make_texts
+from SentimentAnalysis import SentimentAnalyzer, DEFAULT_MODEL_NAME, ROBERTA_BACKENDS
+
+
+def measure(analyzer, backend, texts, batch_size, latency_samples):
+    # Warm up: loads (and for ONNX exports) the model outside the timings
+    analyzer.batch_analyze(texts[:batch_size], method=backend, batch_size=batch_size)
+
+    latencies = []
+    for text in texts[:latency_samples]:
+        start = time.perf_counter()
+        analyzer.analyze_with_roberta(text, backend=backend)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    results = analyzer.batch_analyze(texts, method=backend, batch_size=batch_size)
+    elapsed = time.perf_counter() - start
+    return results, np.array(latencies), len(texts) / elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Accuracy parity and speed of the RoBERTa backends")
+    parser.add_argument("--texts", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--latency-samples", type=int, default=100)
+    parser.add_argument("--backends", default=','.join(ROBERTA_BACKENDS))
+    parser.add_argument("--model-name", default=DEFAULT_MODEL_NAME)
+    args = parser.parse_args()
+
+    texts = make_texts(args.texts)
+    analyzer = SentimentAnalyzer(model_name=args.model_name)
+
+    reference = None
+    print(f"texts={args.texts} batch_size={args.batch_size} model={args.model_name}")
+    print(f"{'backend':<14} {'p50 ms':>8} {'p99 ms':>8} {'texts/sec':>10} {'label agree':>12} {'max |dp|':>9}")
+    for backend in args.backends.split(','):
+        results, latencies, throughput = measure(analyzer, backend, texts, args.batch_size, args.latency_samples)
+        if reference is None:
+            # The first backend (fp32 'roberta' by default) is the reference
+            reference = results
+        agreement = np.mean([r['sentiment'] == ref['sentiment'] for r, ref in zip(results, reference)])
+        max_diff = max(abs(r['scores'][label] - ref['scores'][label])
+                       for r, ref in zip(results, reference) for label in analyzer.labels)
+        print(f"{backend:<14} {np.percentile(latencies, 50) * 1000:>8.2f} {np.percentile(latencies, 99) * 1000:>8.2f} "
+              f"{throughput:>10.1f} {agreement:>12.2%} {max_diff:>9.4f}")
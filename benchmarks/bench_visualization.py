@@ -0,0 +1,71 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic import make_results
+
+# Each mode runs in a fresh child process so its peak RSS is its own
+MODES = ['none', 'serial', 'parallel']
+
+
+def run_mode(mode, rows, workers, formats):
+    from Visualization_and_analysis import SentimentVisualizer
+
+    df = make_results(rows)
+    output_dir = tempfile.mkdtemp(prefix="bench_visualization_")
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        visualizer = SentimentVisualizer(df, output_dir=output_dir, formats=formats)
+        if mode != 'none':
+            visualizer.render(workers=workers if mode == 'parallel' else 1)
+        visualizer.generate_insights()
+    elapsed = time.perf_counter() - start
+    return {
+        'mode': mode,
+        'seconds': elapsed,
+        'rss_before_mb': before,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'peak_worker_rss_mb': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,
+        'files': sum(len(files) for _, _, files in os.walk(output_dir)),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Wall time and memory of headless chart rendering")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--formats", default="png")
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args.rows, args.workers, args.formats.split(','))))
+        sys.exit(0)
+
+    from Visualization_and_analysis import CHARTS
+
+    # The pool only pays off if its spawn cost is below the charts' serial render time
+    print(f"rows={args.rows} charts={len(CHARTS)} workers={args.workers} cpus={os.cpu_count()} "
+          f"formats={args.formats}")
+    print(f"{'mode':<10} {'seconds':>9} {'files':>6} {'peak RSS MB':>12} {'base MB':>8} {'worker RSS MB':>14}")
+    for mode in MODES:
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--mode", mode, "--rows", str(args.rows),
+             "--workers", str(args.workers), "--formats", args.formats],
+            check=True, capture_output=True, text=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{mode:<10} {result['seconds']:>9.2f} {result['files']:>6} {result['peak_rss_mb']:>12.0f} "
+              f"{result['rss_before_mb']:>8.0f} {result['peak_worker_rss_mb']:>14.0f}")
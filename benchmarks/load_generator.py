@@ -0,0 +1,88 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic import make_texts
+
+
+def run_load(url, texts, concurrency, requests_total, batch):
+    # Each worker thread keeps one connection and sends requests back to back
+    local = threading.local()
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def send(i):
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+        start_index = (i * batch) % len(texts)
+        chunk = texts[start_index:start_index + batch]
+        body = {'text': chunk[0]} if batch == 1 else {'texts': chunk}
+        start = time.perf_counter()
+        try:
+            response = session.post(f"{url}/score", json=body, timeout=60)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            with lock:
+                errors.append(str(e))
+            return
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(send, range(requests_total)))
+    wall = time.perf_counter() - start
+    return np.array(latencies) * 1000, errors, wall
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent load against the sentiment scoring service")
+    parser.add_argument("--url", help="a running ScoringService; by default one is started in-process")
+    parser.add_argument("--method", default="textblob", help="scoring method of the in-process service")
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=10)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=1, help="texts per request")
+    args = parser.parse_args()
+
+    texts = make_texts(max(10000, args.batch))
+    service = None
+    url = args.url
+    if url is None:
+        from ScoringService import ScoringService
+        from SentimentAnalysis import SentimentAnalyzer
+        service = ScoringService(SentimentAnalyzer(), method=args.method, max_batch_size=args.max_batch_size,
+                                 max_wait_ms=args.max_wait_ms, port=0).start()
+        url = service.url
+
+    try:
+        # Warm-up loads the model before anything is timed
+        requests.post(f"{url}/score", json={'text': texts[0]}, timeout=600).raise_for_status()
+        latencies, errors, wall = run_load(url, texts, args.concurrency, args.requests, args.batch)
+        server = requests.get(f"{url}/metrics", timeout=10).json()
+    finally:
+        if service is not None:
+            service.stop()
+
+    print(f"url={url} model={server['model']} concurrency={args.concurrency} "
+          f"requests={args.requests} texts/request={args.batch}")
+    if len(latencies):
+        p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+        print(f"client: {len(latencies) / wall:.1f} req/s, {len(latencies) * args.batch / wall:.1f} texts/s, "
+              f"p50 {p50:.1f} ms, p90 {p90:.1f} ms, p99 {p99:.1f} ms, errors {len(errors)}")
+    else:
+        print(f"client: every request failed ({errors[0] if errors else 'no requests'})")
+    print("server: " + json.dumps({key: server[key] for key in ('batches', 'average_batch_size', 'latency_ms')}))
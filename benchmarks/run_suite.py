@@ -0,0 +1,218 @@
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from synthetic import make_texts, make_tweets, parse_size
+from DataCollection import TwitterDataCollector
+from DataPreprocessing import TwitterPreprocessor
+from FakeTwitterAPI import FakeTwitterClient, FakeTweet
+from QueryPlanner import QueryPlanner
+from RequestScheduler import RequestScheduler
+from SentimentAnalysis import SentimentAnalyzer, DEFAULT_MODEL_NAME, ROBERTA_BACKENDS
+from Visualization_and_analysis import SentimentVisualizer
+
+# Offline benchmark suite: times each pipeline stage on synthetic corpora and
+# stores the numbers per commit in benchmarks/results/ for later comparison.
+#   python benchmarks/run_suite.py --sizes 1k,100k,1m
+#   python benchmarks/run_suite.py --compare <commit>
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# Methods that run a transformer are far slower, so they score at most --model-texts texts
+MODEL_METHODS = ROBERTA_BACKENDS + ('huggingface_api', 'cascade')
+
+
+class CorpusTwitterClient(FakeTwitterClient):
+    # FakeTwitterClient serving a synthetic corpus instead of its own word salad
+    def __init__(self, tweets):
+        super().__init__(total_tweets=len(tweets), non_english_ratio=0.0)
+        self.rows = tweets.to_dict('records')
+
+    def make_tweet(self, query, index):
+        row = self.rows[index]
+        return FakeTweet(
+            tweet_id=row['id'],
+            text=row['text'],
+            created_at=row['created_at'].to_pydatetime(),
+            author_id=row['author_id'],
+            public_metrics={'retweet_count': row['retweet_count'], 'like_count': row['like_count'],
+                            'reply_count': row['reply_count'], 'quote_count': 0},
+        )
+
+
+def timed(fn, repeat):
+    # Best of `repeat` runs; output is swallowed so it doesn't distort timings
+    best = None
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            fn()
+            elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def record(results, name, items, seconds):
+    results[name] = {'items': items, 'seconds': seconds, 'items_per_second': items / seconds if seconds else 0.0}
+    print(f"{name:<32} {items:>9} {seconds:>10.3f} {results[name]['items_per_second']:>14.0f}")
+
+
+def ensure_linear_model(workdir):
+    # A linear model distilled from TextBlob labels, unless one is configured
+    path = os.getenv("LINEAR_MODEL_PATH")
+    if path and os.path.exists(path):
+        return path
+    from LinearSentiment import distill
+
+    path = os.path.join(workdir, "linear_sentiment_model.joblib")
+    with contextlib.redirect_stdout(io.StringIO()):
+        distill(SentimentAnalyzer(), make_texts(20000, seed=1), teacher='textblob').save(path)
+    return path
+
+
+def run_suite(sizes, methods, repeat, model_texts, model_name, workdir):
+    results = {}
+    preprocessor = TwitterPreprocessor()
+    linear_path = ensure_linear_model(workdir) if 'linear' in methods or 'cascade' in methods else None
+    analyzer = SentimentAnalyzer(model_name=model_name, linear_model_path=linear_path)
+
+    print(f"{'benchmark':<32} {'items':>9} {'seconds':>10} {'items/sec':>14}")
+    for size in sizes:
+        n = parse_size(size)
+        tweets = make_tweets(n)
+
+        seconds = timed(lambda: preprocessor.preprocess_dataframe(tweets), repeat)
+        record(results, f"preprocess/{size}", n, seconds)
+        processed = preprocessor.preprocess_dataframe(tweets)
+        texts = processed['cleaned_text'].tolist()
+
+        for method in methods:
+            sample = texts[:model_texts] if method in MODEL_METHODS else texts
+            # Warm up so model loading is not counted as scoring time
+            analyzer.batch_analyze(sample[:32], method=method)
+            seconds = timed(lambda: analyzer.batch_analyze(sample, method=method), repeat)
+            record(results, f"score/{method}/{size}", len(sample), seconds)
+
+        scored = processed.copy()
+        scored_results = analyzer.batch_analyze(texts, method='textblob')
+        scored['sentiment'] = [r['sentiment'] for r in scored_results]
+        scored['confidence'] = [r.get('confidence', 0) for r in scored_results]
+        seconds = timed(lambda: SentimentVisualizer(scored).generate_insights(), repeat)
+        record(results, f"insights/{size}", len(scored), seconds)
+
+        seconds = timed(lambda: run_end_to_end(tweets, workdir), 1)
+        record(results, f"run_analysis/{size}", n, seconds)
+    return results
+
+
+def run_end_to_end(tweets, workdir):
+    from main import TwitterSentimentPipeline
+    import matplotlib.pyplot as plt
+
+    # A scheduler that never paces, since the fake API has no rate limit
+    # Retweets stay in the query so every corpus row reaches the pipeline, as in earlier results
+    collector = TwitterDataCollector(client=CorpusTwitterClient(tweets),
+                                     scheduler=RequestScheduler(max_requests=10 ** 9, window_seconds=1),
+                                     planner=QueryPlanner(exclude_retweets=False))
+    pipeline = TwitterSentimentPipeline({}, cache_path="", collector=collector, output_format='csv')
+    pipeline.metrics_path = ""
+    # Charts are benchmarked separately (bench_visualization.py)
+    pipeline.run_analysis("benchmark", max_tweets=len(tweets), save_results=False, visualize='none')
+    plt.close('all')
+
+
+def git_commit():
+    try:
+        commit = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+        dirty = bool(subprocess.check_output(["git", "status", "--porcelain", "--untracked-files=no"],
+                                             cwd=ROOT, text=True).strip())
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+    return commit, dirty
+
+
+def save(results, args):
+    commit, dirty = git_commit()
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"{commit}{'-dirty' if dirty else ''}.json")
+    with open(path, 'w') as f:
+        json.dump({
+            'commit': commit,
+            'dirty': dirty,
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'args': vars(args),
+            'results': results,
+        }, f, indent=2)
+    return path
+
+
+def find_baseline(reference, current_path):
+    if reference:
+        if os.path.exists(reference):
+            return reference
+        matches = sorted(glob.glob(os.path.join(RESULTS_DIR, f"{reference}*.json")))
+        return matches[0] if matches else None
+    # Default to the most recent other run
+    others = [p for p in glob.glob(os.path.join(RESULTS_DIR, "*.json")) if p != current_path]
+    return max(others, key=os.path.getmtime) if others else None
+
+
+def compare(results, baseline_path, threshold):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nCompared with {baseline['commit']}{' (dirty)' if baseline['dirty'] else ''} "
+          f"from {baseline['timestamp']}:")
+    print(f"{'benchmark':<32} {'before s':>10} {'after s':>10} {'change':>8}")
+    regressions = 0
+    for name, current in results.items():
+        before = baseline['results'].get(name)
+        if before is None or before['items'] != current['items']:
+            continue
+        change = current['seconds'] / before['seconds'] - 1 if before['seconds'] else 0.0
+        flag = "  REGRESSION" if change > threshold else ""
+        regressions += bool(flag)
+        print(f"{name:<32} {before['seconds']:>10.3f} {current['seconds']:>10.3f} {change:>+8.1%}{flag}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline benchmark suite on synthetic tweet corpora")
+    parser.add_argument("--sizes", default="1k,100k", help="comma-separated corpus sizes, e.g. 1k,100k,1m")
+    parser.add_argument("--methods", default="textblob,linear",
+                        help="SentimentAnalyzer methods to time; roberta backends and cascade need the model locally")
+    parser.add_argument("--model-texts", type=int, default=2000)
+    parser.add_argument("--model-name", default=DEFAULT_MODEL_NAME)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--compare", default=None, help="commit or results file to compare with (default: latest)")
+    parser.add_argument("--threshold", type=float, default=0.10, help="slowdown reported as a regression")
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench_suite_") as workdir:
+        results = run_suite(args.sizes.split(','), args.methods.split(','), args.repeat, args.model_texts,
+                            args.model_name, workdir)
+
+    current_path = None if args.no_save else save(results, args)
+    if current_path:
+        print(f"\nResults saved to {current_path}")
+    baseline_path = find_baseline(args.compare, current_path)
+    if baseline_path:
+        regressions = compare(results, baseline_path, args.threshold)
+        sys.exit(1 if regressions else 0)
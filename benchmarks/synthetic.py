@@ -0,0 +1,99 @@
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+# Synthetic tweet corpora shared by the benchmarks. Everything is generated from
+# a seed, so a given (n, seed) always yields the same corpus on every machine.
+
+WORDS = ("love hate great terrible python release bug fix happy sad awesome broken "
+         "today launch update slow fast amazing worst best meh okay Love GREAT "
+         "café naïve not really very so good bad").split()
+EMOJI = ["😀", "😡", "🚀", "🔥", "😢", "👍", "🎉", "💔"]
+PUNCTUATION = ["!!!", "...", "?", "!", ":)", ":("]
+
+SIZES = {'1k': 1000, '10k': 10000, '100k': 100000, '1m': 1000000}
+
+
+def parse_size(size):
+    # '100k' -> 100000; plain integers are accepted as well
+    size = str(size).lower()
+    return SIZES[size] if size in SIZES else int(size)
+
+
+def _vocabulary(rng):
+    # Words make up ~80% of tokens; mentions, hashtags, URLs, emoji and
+    # punctuation the rest, so every cleaning rule has something to do
+    groups = [
+        (WORDS, 0.80),
+        ([f"@user_{i}" for i in range(2000)], 0.06),
+        ([f"#Tag{i}" for i in range(500)], 0.05),
+        ([f"https://t.co/{i:06x}" for i in rng.integers(0, 16 ** 6, 2000)] + ["www.example.com"], 0.04),
+        (EMOJI, 0.03),
+        (PUNCTUATION, 0.02),
+    ]
+    vocabulary = np.array([token for tokens, _ in groups for token in tokens], dtype=object)
+    weights = np.concatenate([np.full(len(tokens), share / len(tokens)) for tokens, share in groups])
+    return vocabulary, weights / weights.sum()
+
+
+def make_texts(n, duplicate_ratio=0.3, retweet_ratio=0.05, min_tokens=3, max_tokens=25, seed=0,
+               near_duplicate_ratio=0.0):
+    rng = np.random.default_rng(seed)
+    vocabulary, weights = _vocabulary(rng)
+
+    lengths = rng.integers(min_tokens, max_tokens + 1, n)
+    tokens = vocabulary[rng.choice(len(vocabulary), size=int(lengths.sum()), p=weights)]
+    ends = np.cumsum(lengths)
+    texts = [' '.join(tokens[end - length:end]) for end, length in zip(ends.tolist(), lengths.tolist())]
+
+    retweets = rng.random(n) < retweet_ratio
+    for i in np.flatnonzero(retweets).tolist():
+        texts[i] = f"RT @user_{i % 2000}: {texts[i]}"
+
+    # Duplicates copy an earlier tweet, like retweets and copy-paste spam do
+    duplicates = rng.random(n) < duplicate_ratio
+    duplicates[0] = False
+    sources = (rng.random(n) * np.arange(n)).astype(np.int64)
+    for i, source in zip(np.flatnonzero(duplicates).tolist(), sources[duplicates].tolist()):
+        texts[i] = texts[source]
+
+    # Near-duplicates copy an earlier tweet with one word swapped or a link appended
+    if near_duplicate_ratio:
+        near = rng.random(n) < near_duplicate_ratio
+        near[0] = False
+        sources = (rng.random(n) * np.arange(n)).astype(np.int64)
+        for i, source in zip(np.flatnonzero(near).tolist(), sources[near].tolist()):
+            words = texts[source].split()
+            if rng.random() < 0.5:
+                words[rng.integers(len(words))] = str(vocabulary[rng.choice(len(vocabulary), p=weights)])
+            else:
+                words.append(f"https://t.co/{i:x}")
+            texts[i] = ' '.join(words)
+    return texts
+
+
+def make_tweets(n, duplicate_ratio=0.3, seed=0, near_duplicate_ratio=0.0):
+    # A DataFrame shaped like TwitterDataCollector.collect_tweets output
+    rng = np.random.default_rng(seed + 1)
+    start = pd.Timestamp(datetime(2024, 1, 1, tzinfo=timezone.utc))
+    return pd.DataFrame({
+        'id': np.arange(10 ** 18, 10 ** 18 + n, dtype=np.int64),
+        'text': make_texts(n, duplicate_ratio=duplicate_ratio, seed=seed, near_duplicate_ratio=near_duplicate_ratio),
+        'created_at': start + pd.to_timedelta(np.sort(rng.integers(0, 7 * 86400, n)), unit='s'),
+        'author_id': rng.integers(1, 10 ** 9, n),
+        # Engagement is heavy-tailed: most tweets get nothing, a few go viral
+        'retweet_count': rng.zipf(2.0, n) - 1,
+        'like_count': rng.zipf(1.8, n) - 1,
+        'reply_count': rng.zipf(2.2, n) - 1,
+    })
+
+
+def make_results(n, duplicate_ratio=0.3, seed=0):
+    # make_tweets plus cleaned text and random sentiment columns, like a scored run
+    df = make_tweets(n, duplicate_ratio=duplicate_ratio, seed=seed)
+    rng = np.random.default_rng(seed + 2)
+    df['cleaned_text'] = df['text'].str.lower()
+    df['sentiment'] = rng.choice(['negative', 'neutral', 'positive'], n)
+    df['confidence'] = rng.random(n)
+    return df
@@ -1,88 +1,517 @@
 import pandas as pd
 import json
+from collections import Counter
 from datetime import datetime
 from DataCollection import TwitterDataCollector
-from DataPreprocessing import TwitterPreprocessor
+from ConcurrentCollection import prefetch_query_pages
+from RequestScheduler import CollectionCheckpoint
+from ResultsStore import ResultsStore
+from DataPreprocessing import TwitterPreprocessor, FingerprintSet
 from SentimentAnalysis import SentimentAnalyzer
-from Visualization_and_analysis import SentimentVisualizer 
+from SentimentCache import SentimentCache
+from SentimentScores import compact_frame
+from SentimentTrends import SentimentTrends
+from Instrumentation import PipelineMetrics
+from NearDuplicates import NearDuplicateDetector
+from TweetStore import TweetStore
+from QueryPlanner import QueryPlanner
+from ReplayCollection import ArchiveTweetCollector
+from Visualization_and_analysis import SentimentVisualizer, CHARTS
 import os
 from dotenv import load_dotenv
 
 
-import nltk
-nltk.download('punkt')
-
-
-
-
 class TwitterSentimentPipeline:
-    def __init__(self, twitter_credentials, hf_token=None):
-        self.collector = TwitterDataCollector(**twitter_credentials)
+    def __init__(self, twitter_credentials, hf_token=None, cache_path=None, collector=None, output_format=None,
+                 near_duplicates=None):
+        # collector can be any object with collect_tweets/iter_tweet_pages,
+        # e.g. a TwitterDataCollector around a FakeTwitterClient for offline runs.
+        # REPLAY_ARCHIVE (JSONL archive files or a directory, comma-separated)
+        # replays archived tweets instead of calling the API.
+        if collector is None and os.getenv("REPLAY_ARCHIVE"):
+            collector = ArchiveTweetCollector(os.getenv("REPLAY_ARCHIVE").split(','))
+        self.collector = collector or TwitterDataCollector(**twitter_credentials)
         self.preprocessor = TwitterPreprocessor()
-        self.analyzer = SentimentAnalyzer(hf_token=hf_token)
+        
+        # Scored results are cached across runs so repeated text is never re-scored
+        if cache_path is None:
+            cache_path = os.getenv("SENTIMENT_CACHE_PATH",
+                                   os.path.join(os.getenv("OUTPUT_DIR", "."), "sentiment_cache.sqlite"))
+        cache = SentimentCache(cache_path) if cache_path else None
+        self.analyzer = SentimentAnalyzer(hf_token=hf_token, cache=cache)
+        
+        # 'csv' writes one file per run; 'parquet' appends to a partitioned ResultsStore
+        self.output_format = output_format or os.getenv("OUTPUT_FORMAT", "csv")
+        self.results_store = None
+        if self.output_format == 'parquet':
+            self.results_store = ResultsStore(os.getenv(
+                "RESULTS_STORE_DIR", os.path.join(os.getenv("OUTPUT_DIR", "."), "results_store")))
         self.results = None
+        self.stream_summary = None
+        self.last_query = None
+        # query -> SentimentTrends of its tweets, fed one scored batch at a time. A
+        # normal run re-collects recent tweets, so it starts its query's trends over;
+        # an incremental run only processes tweets new to the TweetStore and adds to them.
+        self.trends = {}
+        # RESULT_STRING_STORAGE=pyarrow keeps result text columns as Arrow strings
+        # (already the default with pandas 3)
+        self.string_storage = os.getenv("RESULT_STRING_STORAGE")
+        
+        # Charts of batch runs: 'files' saves them under OUTPUT_DIR/charts/ (the
+        # headless default), 'show' opens interactive windows, 'none' skips them
+        self.visualize = os.getenv("VISUALIZE", "files")
+        self.chart_formats = tuple(os.getenv("CHART_FORMATS", "png").split(','))
+        
+        # Each run appends one metrics record (JSON lines); empty METRICS_PATH disables it.
+        # METRICS_PROMETHEUS_PATH additionally writes the last run in Prometheus text format.
+        self.metrics = None
+        self.metrics_path = os.getenv("METRICS_PATH",
+                                      os.path.join(os.getenv("OUTPUT_DIR", "."), "pipeline_metrics.jsonl"))
+        self.prometheus_path = os.getenv("METRICS_PROMETHEUS_PATH")
+        
+        # Near-duplicate collapsing before scoring (retweets, template spam): only one
+        # tweet per cluster is scored. NEAR_DUPLICATE_THRESHOLD (estimated Jaccard
+        # similarity, e.g. 0.7) turns it on, or pass a NearDuplicateDetector.
+        threshold = os.getenv("NEAR_DUPLICATE_THRESHOLD")
+        self.near_duplicates = near_duplicates or (NearDuplicateDetector(float(threshold)) if threshold else None)
+        
+        # Incremental runs keep every collected tweet in a TweetStore and only fetch
+        # tweets newer than the query's high-water mark; opened on first use
+        self.tweet_store_path = os.getenv("TWEET_STORE_PATH",
+                                          os.path.join(os.getenv("OUTPUT_DIR", "."), "tweet_store.sqlite"))
+        self._tweet_store = None
     
-    def run_analysis(self, query, max_tweets=1000, save_results=True):
+    def run_analysis(self, query, max_tweets=1000, save_results=True, method='textblob', visualize=None,
+                     incremental=False):
+        # method is any SentimentAnalyzer method, e.g. 'roberta', 'linear' or
+        # 'cascade' (cheap model first, RoBERTa only for the uncertain tweets).
+        # visualize overrides self.visualize for this run. incremental only
+        # fetches and processes tweets newer than the last run for this query
+        # (and older ones a capped earlier run did not reach).
         print(f"Starting sentiment analysis for query: '{query}'")
+        metrics, baseline = self._start_metrics(mode='batch', query=query, method=method)
         
         # Step 1: Collect tweets
         print("1. Collecting tweets...")
-        tweets_df = self.collector.collect_tweets(query, max_tweets)
-        print(f"   Collected {len(tweets_df)} tweets")
+        since_id = self.tweet_store.high_water_mark(query) if incremental else None
+        trends = self._query_trends(query, incremental)
+        visualize = visualize or self.visualize
+        # Only the tweet fields the stages of this run read are requested
+        stages = ['preprocess', 'score', 'insights', 'trends'] + ['visualize'] * (visualize != 'none') + \
+                 ['save'] * save_results + ['store'] * incremental
+        with metrics.stage('collect') as stage:
+            if incremental:
+                pages = list(self.collector.iter_tweet_pages(
+                    query, max_tweets, since_id=since_id, next_token=self.tweet_store.gap_token(query),
+                    columns=QueryPlanner.columns_for(stages)))
+                tweets_df = pd.DataFrame([tweet for page in pages for tweet in page])
+            else:
+                tweets_df = self.collector.collect_tweets(query, max_tweets, since_id=since_id,
+                                                          columns=QueryPlanner.columns_for(stages))
+            stage['items'] += len(tweets_df)
+        print(f"   Collected {len(tweets_df)} tweets" + (f" newer than {since_id}" if since_id else ""))
+        if incremental:
+            tweets_df = self._new_tweets(query, tweets_df, metrics)
+            print(f"   {len(tweets_df)} not seen before")
         if tweets_df.empty or 'text' not in tweets_df.columns:
-            print("❌ No valid tweets collected or missing 'text' column.")
+            print("No new tweets since the last run." if incremental and since_id else
+                  "❌ No valid tweets collected or missing 'text' column.")
+            if incremental:
+                self._advance_mark(query, pages[-1] if pages else None)
+            self._finish_metrics(metrics, baseline)
             return pd.DataFrame()  # or raise Exception("No valid tweets collected.")
 
         
         # Step 2: Preprocess tweets
         print("2. Preprocessing tweets...")
-        processed_df = self.preprocessor.preprocess_dataframe(tweets_df)
+        with metrics.stage('preprocess') as stage:
+            processed_df = self.preprocessor.preprocess_dataframe(tweets_df)
+            stage['items'] += len(tweets_df)
         print(f"   {len(processed_df)} tweets after preprocessing")
         
         # Step 3: Analyze sentiment
         print("3. Analyzing sentiment...")
-        sentiment_results = self.analyzer.batch_analyze(
-            processed_df['cleaned_text'].tolist(), 
-            method='textblob'
-        )
-        
-        # Add results to dataframe
-        processed_df['sentiment'] = [r['sentiment'] for r in sentiment_results]
-        processed_df['confidence'] = [r.get('confidence', 0) for r in sentiment_results]
+        processed_df, scores = self._score_dataframe(processed_df, method, metrics)
+        if self.near_duplicates is not None and len(processed_df):
+            rows, clusters = len(processed_df), processed_df['cluster_id'].nunique()
+            print(f"   Near-duplicates: scored {clusters} cluster representatives for {rows} tweets "
+                  f"({1 - clusters / rows:.1%} fewer)")
+        if self.analyzer.cache is not None:
+            # This run's lookups; the analyzer's counters span every run of the pipeline
+            print(f"   Cache hits: {self.analyzer.cache_hits - baseline['cache_hits']}, "
+                  f"misses: {self.analyzer.cache_misses - baseline['cache_misses']}")
+        if method == 'cascade' and scores.tiers is not None:
+            tiers = Counter(scores.tiers)
+            print("   Cascade tiers: " + ", ".join(f"{tier}={count}" for tier, count in tiers.items()))
         
         self.results = processed_df
+        self.stream_summary = None
+        self.last_query = query
+        trends.update(processed_df)
         
         # Step 4: Generate visualizations
-        print("4. Generating visualizations...")
-        visualizer = SentimentVisualizer(processed_df)
-        visualizer.plot_sentiment_distribution()
-        visualizer.generate_insights()
+        print("4. Generating visualizations..." if visualize != 'none' else "4. Generating insights...")
+        with metrics.stage('visualize') as stage:
+            if visualize == 'files':
+                chart_dir = self._charts_dir(query)
+                visualizer = SentimentVisualizer(processed_df, output_dir=chart_dir, formats=self.chart_formats)
+                visualizer.render(workers=self._render_workers())
+                print(f"   Charts saved to {chart_dir}")
+            else:
+                visualizer = SentimentVisualizer(processed_df)
+                if visualize == 'show':
+                    visualizer.plot_sentiment_distribution()
+            visualizer.generate_insights()
+            stage['items'] += len(processed_df)
         
         # Step 5: Save results
         if save_results:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            output_dir = os.getenv("OUTPUT_DIR", ".")
-            os.makedirs(output_dir, exist_ok=True)
-            filename = os.path.join(output_dir, f"sentiment_analysis_{query.replace(' ', '')}{timestamp}.csv")
-            processed_df.to_csv(filename, index=False)
-            print(f"5. Results saved to {filename}")
+            with metrics.stage('save') as stage:
+                if self.results_store is not None:
+                    self.results_store.append(processed_df, query)
+                    print(f"5. Results appended to {self.results_store.root}")
+                else:
+                    filename = self._results_filename(query)
+                    processed_df.to_csv(filename, index=False)
+                    print(f"5. Results saved to {filename}")
+                stage['items'] += len(processed_df)
+        
+        if incremental:
+            self._store_tweets(query, tweets_df, metrics)
+            self._advance_mark(query, pages[-1] if pages else None)
         
+        self._finish_metrics(metrics, baseline)
         return processed_df
     
-    def export_summary(self, filename=None):
-        if self.results is None:
+    def run_analysis_streaming(self, query, max_tweets=1000, method='textblob', output_file=None, prefetch=2,
+                               checkpoint=None):
+        # Collects, preprocesses and scores one API page at a time, appending each
+        # scored page to output_file, so memory stays bounded by the page size
+        output_files = {query: output_file} if output_file else None
+        summaries = self.run_queries_streaming([query], max_tweets, method, output_files, prefetch, checkpoint)
+        self.stream_summary = summaries[query]
+        return self.stream_summary
+    
+    def run_queries_streaming(self, queries, max_tweets=1000, method='textblob', output_files=None, prefetch=2,
+                              checkpoint=None, save_results=True, on_page=None, cancel_event=None,
+                              incremental=False):
+        # Each query is collected by its own background thread (all sharing the
+        # collector's request scheduler) while earlier pages are being scored.
+        # prefetch is the number of pages allowed to wait in the queue; 0 fetches serially.
+        # checkpoint (a CollectionCheckpoint or its path) lets an interrupted run
+        # resume its pagination and keep appending to the same output file; a
+        # page is committed to it only once its rows are written, so pages that
+        # were prefetched or being scored when the run died are fetched again.
+        # on_page(query, scored_df, totals) is called after every page (scored_df is
+        # None when nothing on the page survived preprocessing), and setting
+        # cancel_event stops the run after the page being scored. incremental
+        # collects only tweets newer than each query's stored high-water mark
+        # (and older ones a capped earlier run did not reach).
+        print(f"Starting streaming sentiment analysis for queries: {', '.join(repr(q) for q in queries)}")
+        if isinstance(checkpoint, str):
+            checkpoint = CollectionCheckpoint(checkpoint)
+        metrics, baseline = self._start_metrics(mode='streaming', query=', '.join(queries), method=method)
+        
+        streams = {}
+        for query in queries:
+            resumed = checkpoint.get(query).get('output_file') if checkpoint is not None else None
+            if not save_results:
+                filename = None
+            elif self.results_store is not None:
+                filename = self.results_store.root
+            else:
+                filename = resumed or (output_files or {}).get(query) or self._results_filename(query)
+            if checkpoint is not None and filename:
+                checkpoint.update(query, output_file=filename)
+            streams[query] = {
+                'filename': filename,
+                'write_header': bool(filename) and (not os.path.exists(filename) or os.path.getsize(filename) == 0),
+                'seen': FingerprintSet(),
+                'sentiment_counts': Counter(),
+                'confidence_sum': 0.0,
+                'collected': 0,
+                'analyzed': 0,
+                'pending': [],
+                'pending_rows': 0,
+                'uncommitted': [],
+                'checkpoint': checkpoint,
+                'incremental': incremental,
+                'trends': self._query_trends(query, incremental),
+                'last_page': None,
+            }
+        
+        stages = ['preprocess', 'score', 'trends'] + ['insights'] * (on_page is not None) + \
+                 ['save'] * save_results + ['store'] * incremental
+        page_iters = {query: self.collector.iter_tweet_pages(
+                          query, max_tweets, checkpoint=checkpoint,
+                          since_id=self.tweet_store.high_water_mark(query) if incremental else None,
+                          next_token=self.tweet_store.gap_token(query) if incremental else None,
+                          columns=QueryPlanner.columns_for(stages))
+                      for query in queries}
+        if prefetch:
+            pages = prefetch_query_pages(page_iters, max_prefetch=prefetch)
+        else:
+            pages = ((query, page) for query, page_iter in page_iters.items() for page in page_iter)
+        
+        pages = iter(pages)
+        cancelled = False
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                print("Streaming analysis cancelled.")
+                pages.close()  # stops the prefetch threads
+                cancelled = True
+                break
+            # With prefetching this is only the time spent waiting for a page
+            with metrics.stage('collect') as stage:
+                item = next(pages, None)
+                stage['items'] += len(item[1]) if item is not None else 0
+            if item is None:
+                break
+            query, page = item
+            streams[query]['last_page'] = page
+            if not page:
+                # Nothing kept on this API page (or the end of the query): only its checkpoint state
+                self._commit_stream_page(query, streams[query], page)
+                continue
+            scored_df = self._score_stream_page(query, streams[query], page, method, metrics)
+            self._commit_stream_page(query, streams[query], page)
+            if on_page is not None:
+                stream = streams[query]
+                on_page(query, scored_df, {'collected': stream['collected'], 'analyzed': stream['analyzed']})
+        
+        summaries = {}
+        for query, stream in streams.items():
+            with metrics.stage('save'):
+                self._flush_stream(query, stream)
+            if incremental:
+                self._advance_mark(query, stream['last_page'])
+            analyzed = stream['analyzed']
+            summaries[query] = {
+                'total_tweets': analyzed,
+                'collected_tweets': stream['collected'],
+                'sentiment_distribution': dict(stream['sentiment_counts']),
+                'average_confidence': stream['confidence_sum'] / analyzed if analyzed else 0.0,
+                'output_file': stream['filename'] if analyzed else None,
+                'cancelled': cancelled,
+            }
+            if analyzed and stream['filename']:
+                print(f"Results for '{query}' streamed to {stream['filename']}")
+            elif not analyzed and incremental:
+                print(f"No new tweets for '{query}' since the last run.")
+            elif not analyzed:
+                print(f"❌ No valid tweets collected for '{query}'.")
+        
+        self.results = None
+        self.stream_summary = summaries[queries[0]] if len(queries) == 1 else None
+        self.last_query = queries[0] if len(queries) == 1 else None
+        self._finish_metrics(metrics, baseline)
+        return summaries
+    
+    def _score_stream_page(self, query, stream, page, method, metrics):
+        stream['collected'] += len(page)
+        page_df = pd.DataFrame(page)
+        if stream['incremental']:
+            page_df = self._new_tweets(query, page_df, metrics)
+        with metrics.stage('preprocess') as stage:
+            processed_df = self.preprocessor.preprocess_dataframe(page_df, seen=stream['seen'])
+            stage['items'] += len(page)
+        if processed_df.empty:
+            if stream['incremental']:
+                self._store_tweets(query, page_df, metrics)
+            return None
+        
+        processed_df, _ = self._score_dataframe(processed_df, method, metrics)
+        
+        if stream['filename']:
+            with metrics.stage('save') as stage:
+                if self.results_store is not None:
+                    # Buffer pages so the store gets a few large Parquet files, not one per page
+                    stream['pending'].append(processed_df)
+                    stream['pending_rows'] += len(processed_df)
+                    if stream['pending_rows'] >= 50000:
+                        self._flush_stream(query, stream)
+                else:
+                    processed_df.to_csv(stream['filename'], mode='a', header=stream['write_header'], index=False)
+                    stream['write_header'] = False
+                stage['items'] += len(processed_df)
+        
+        if stream['incremental']:
+            self._store_tweets(query, page_df, metrics)
+        
+        stream['analyzed'] += len(processed_df)
+        stream['sentiment_counts'].update(processed_df['sentiment'])
+        stream['trends'].update(processed_df)
+        stream['confidence_sum'] += float(processed_df['confidence'].sum())
+        print(f"   [{query}] Page scored: {len(processed_df)} tweets "
+              f"({stream['analyzed']} analyzed, {stream['collected']} collected)")
+        return processed_df
+    
+    def _score_dataframe(self, processed_df, method, metrics):
+        # Adds categorical sentiment and float32 confidence columns and compacts the
+        # frame (compact_frame); returns it with the SentimentScores behind it.
+        # With near-duplicate collapsing each cluster's first tweet is scored and its
+        # result copied to the rest, so label counts stay weighted by cluster size.
+        if self.near_duplicates is None:
+            with metrics.stage('score') as stage:
+                scores = self.analyzer.analyze_columns(processed_df['cleaned_text'], method=method)
+                stage['items'] += len(processed_df)
+        else:
+            with metrics.stage('cluster') as stage:
+                processed_df = self.near_duplicates.annotate(processed_df)
+                representatives = NearDuplicateDetector.representatives(processed_df)
+                stage['items'] += len(processed_df)
+            with metrics.stage('score') as stage:
+                scores = self.analyzer.analyze_columns(representatives['cleaned_text'], method=method)
+                stage['items'] += len(representatives)
+            scores = scores.take(pd.Index(representatives['cluster_id']).get_indexer(processed_df['cluster_id']))
+            metrics.counters['near_duplicate_rows'] = metrics.counters.get('near_duplicate_rows', 0) + len(processed_df)
+            metrics.counters['near_duplicate_clusters'] = \
+                metrics.counters.get('near_duplicate_clusters', 0) + len(representatives)
+        
+        scores.assign(processed_df)
+        return compact_frame(processed_df, self.string_storage), scores
+    
+    @property
+    def tweet_store(self):
+        if self._tweet_store is None:
+            self._tweet_store = TweetStore(self.tweet_store_path)
+        return self._tweet_store
+    
+    def _new_tweets(self, query, tweets_df, metrics):
+        # Dedupes against the store's ID index; only unseen tweets go on to be processed
+        with metrics.stage('store') as stage:
+            new_df = self.tweet_store.new_tweets(query, tweets_df)
+            stage['items'] += len(tweets_df)
+        metrics.counters['new_tweets'] = metrics.counters.get('new_tweets', 0) + len(new_df)
+        return new_df
+    
+    def _store_tweets(self, query, tweets_df, metrics):
+        # Called once tweets are processed, so a failed run fetches them again next time
+        with metrics.stage('store') as stage:
+            self.tweet_store.add(query, tweets_df)
+            stage['items'] += len(tweets_df)
+    
+    def _commit_stream_page(self, query, stream, page):
+        # Pages buffered for the results store are committed when they are flushed
+        stream['uncommitted'].append(page)
+        if not stream['pending']:
+            self._commit_stream(query, stream)
+    
+    def _commit_stream(self, query, stream):
+        if stream['checkpoint'] is not None:
+            for page in stream['uncommitted']:
+                stream['checkpoint'].commit(query, page)
+        stream['uncommitted'] = []
+    
+    def _query_trends(self, query, incremental):
+        if not incremental or query not in self.trends:
+            self.trends[query] = SentimentTrends()
+        return self.trends[query]
+    
+    def _advance_mark(self, query, last_page):
+        # Moves the query's high-water mark once its processed tweets are stored;
+        # last_page is the last page collected and processed (None if there was none)
+        state = getattr(last_page, 'checkpoint_state', None)
+        if state is not None:
+            self.tweet_store.advance(query, state.get('since_id'), state.get('next_token'))
+    
+    def _flush_stream(self, query, stream):
+        if stream['pending']:
+            self.results_store.append(pd.concat(stream['pending'], ignore_index=True), query)
+            stream['pending'] = []
+            stream['pending_rows'] = 0
+        self._commit_stream(query, stream)
+    
+    def _counter_snapshot(self):
+        # Cumulative counters; a run's values are the difference across the run
+        counters = {
+            'cache_hits': self.analyzer.cache_hits,
+            'cache_misses': self.analyzer.cache_misses,
+        }
+        if hasattr(self.collector, 'fetched'):
+            # Tweets the API returned vs tweets that survived the collector's filters
+            counters['tweets_fetched'] = self.collector.fetched
+            counters['tweets_kept'] = self.collector.kept
+        scheduler = getattr(self.collector, 'scheduler', None)
+        if scheduler is not None:
+            stats = scheduler.stats()
+            counters.update({
+                'api_calls': stats['api_calls'],
+                'api_retries': stats['retries'],
+                'rate_limit_hits': stats['rate_limit_hits'],
+                'rate_limit_sleep_seconds': stats['sleep_time'],
+            })
+        return counters
+    
+    def _start_metrics(self, **labels):
+        self.metrics = PipelineMetrics(labels=labels)
+        return self.metrics, self._counter_snapshot()
+    
+    def _finish_metrics(self, metrics, baseline):
+        counters = {name: round(value - baseline[name], 3) for name, value in self._counter_snapshot().items()}
+        if metrics.counters.get('near_duplicate_rows'):
+            counters['near_duplicate_reduction'] = round(
+                1 - metrics.counters['near_duplicate_clusters'] / metrics.counters['near_duplicate_rows'], 4)
+        metrics.finish(**counters)
+        if self.metrics_path:
+            metrics.write_jsonl(self.metrics_path)
+        if self.prometheus_path:
+            metrics.write_prometheus(self.prometheus_path)
+        
+        stages = ", ".join(f"{name} {record['wall_seconds']:.2f}s" for name, record in metrics.stages.items())
+        print(f"   Stage timings: {stages}")
+    
+    def _charts_dir(self, query):
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        return os.path.join(os.getenv("OUTPUT_DIR", "."), "charts", f"{query.replace(' ', '')}{timestamp}")
+    
+    def _render_workers(self):
+        # Charts render serially by default: they are drawn from aggregates, so
+        # their cost depends on the number of charts rather than rows, and spawning
+        # a process pool costs more than the few charts take (see
+        # benchmarks/bench_visualization.py). VISUALIZE_WORKERS opts into the pool,
+        # capped at one worker per chart and per core.
+        workers = int(os.getenv("VISUALIZE_WORKERS", "1"))
+        return max(1, min(workers, len(CHARTS), os.cpu_count() or 1))
+    
+    def _results_filename(self, query):
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output_dir = os.getenv("OUTPUT_DIR", ".")
+        os.makedirs(output_dir, exist_ok=True)
+        return os.path.join(output_dir, f"sentiment_analysis_{query.replace(' ', '')}{timestamp}.csv")
+    
+    def export_summary(self, filename=None, query=None):
+        # With a query and a Parquet results store, the summary covers every run
+        # stored for that query and reads only the sentiment/confidence columns
+        from_store = query is not None and self.results_store is not None
+        if self.results is None and self.stream_summary is None and not from_store:
             print("No results to export. Run analysis first.")
             return
         
         if filename is None:
             filename = f"sentiment_summary_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
         
-        summary = {
-            'total_tweets': len(self.results),
-            'sentiment_distribution': self.results['sentiment'].value_counts().to_dict(),
-            'average_confidence': float(self.results['confidence'].mean()),
-            'analysis_timestamp': datetime.now().isoformat()
-        }
+        if from_store:
+            summary = self.results_store.summarize(query=query)
+            summary['query'] = query
+        elif self.results is not None:
+            summary = {
+                'total_tweets': len(self.results),
+                'sentiment_distribution': {k: int(v) for k, v in self.results['sentiment'].value_counts().items() if v},
+                'average_confidence': float(self.results['confidence'].mean()),
+            }
+        else:
+            # Streaming runs keep running totals instead of the full results
+            summary = dict(self.stream_summary)
+        trends = self.trends.get(query if query is not None else self.last_query)
+        if trends is not None:
+            # Hourly sentiment of the query's tweets (by created_at), empty hours included
+            hourly = trends.frame('hour').reset_index(names='hour')
+            hourly['hour'] = hourly['hour'].map(pd.Timestamp.isoformat)
+            summary['sentiment_over_time'] = hourly.astype(object).where(hourly.notna(), None).to_dict('records')
+        summary['analysis_timestamp'] = datetime.now().isoformat()
+        if self.metrics is not None and not from_store:
+            summary['metrics'] = self.metrics.to_record()
         
         with open(filename, 'w') as f:
             json.dump(summary, f, indent=2)
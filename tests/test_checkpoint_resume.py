@@ -0,0 +1,95 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+import pytest
+
+from DataCollection import TwitterDataCollector
+from FakeTwitterAPI import FakeTwitterClient
+from ReplayCollection import ArchiveTweetCollector, write_archive
+from RequestScheduler import CollectionCheckpoint, RequestScheduler
+from main import TwitterSentimentPipeline
+
+
+class Interrupted(Exception):
+    pass
+
+
+def make_pipeline(tmp_path, monkeypatch):
+    monkeypatch.setenv("METRICS_PATH", "")
+    monkeypatch.setenv("OUTPUT_DIR", str(tmp_path))
+    collector = TwitterDataCollector(client=FakeTwitterClient(total_tweets=1500),
+                                     scheduler=RequestScheduler(max_requests=10 ** 6, window_seconds=1))
+    return TwitterSentimentPipeline({}, cache_path='', collector=collector)
+
+
+def stream(pipeline, output_file, checkpoint, prefetch, on_page=None):
+    return pipeline.run_queries_streaming(['python'], max_tweets=1000, output_files={'python': output_file},
+                                          prefetch=prefetch, checkpoint=checkpoint, on_page=on_page)
+
+
+@pytest.mark.parametrize('prefetch', [0, 2])
+def test_interrupted_run_resumes_without_losing_or_repeating_tweets(tmp_path, monkeypatch, prefetch):
+    expected_file = str(tmp_path / 'uninterrupted.csv')
+    stream(make_pipeline(tmp_path, monkeypatch), expected_file, None, prefetch)
+    expected = pd.read_csv(expected_file)
+
+    output_file = str(tmp_path / 'resumed.csv')
+    checkpoint_path = str(tmp_path / 'checkpoint.json')
+    pages = []
+
+    def crash(query, scored_df, totals):
+        # Dies after the third page is written, with later pages already prefetched
+        pages.append(scored_df)
+        if len(pages) == 3:
+            raise Interrupted()
+
+    with pytest.raises(Interrupted):
+        stream(make_pipeline(tmp_path, monkeypatch), output_file, CollectionCheckpoint(checkpoint_path), prefetch,
+               on_page=crash)
+    assert CollectionCheckpoint(checkpoint_path).get('python')['next_token']
+
+    stream(make_pipeline(tmp_path, monkeypatch), output_file, CollectionCheckpoint(checkpoint_path), prefetch)
+    resumed = pd.read_csv(output_file)
+
+    assert not resumed['id'].duplicated().any()
+    assert sorted(resumed['id']) == sorted(expected['id'])
+    assert CollectionCheckpoint(checkpoint_path).get('python') == {}
+
+
+@pytest.mark.parametrize('prefetch', [0, 2])
+def test_interrupted_replay_resumes_without_losing_or_repeating_tweets(tmp_path, monkeypatch, prefetch):
+    monkeypatch.setenv("METRICS_PATH", "")
+    monkeypatch.setenv("OUTPUT_DIR", str(tmp_path))
+    tweets = TwitterDataCollector(client=FakeTwitterClient(total_tweets=1500),
+                                  scheduler=RequestScheduler(max_requests=10 ** 6, window_seconds=1)) \
+        .collect_tweets('python', max_tweets=1500)
+    tweets.loc[0, 'created_at'] = pd.NaT
+    archive = write_archive(tweets, str(tmp_path / 'archive.jsonl'))
+
+    def pipeline():
+        return TwitterSentimentPipeline({}, cache_path='', collector=ArchiveTweetCollector(archive, page_size=100))
+
+    expected_file = str(tmp_path / 'uninterrupted.csv')
+    stream(pipeline(), expected_file, None, prefetch)
+    expected = pd.read_csv(expected_file)
+
+    output_file = str(tmp_path / 'resumed.csv')
+    checkpoint_path = str(tmp_path / 'checkpoint.json')
+    pages = []
+
+    def crash(query, scored_df, totals):
+        pages.append(scored_df)
+        if len(pages) == 3:
+            raise Interrupted()
+
+    with pytest.raises(Interrupted):
+        stream(pipeline(), output_file, CollectionCheckpoint(checkpoint_path), prefetch, on_page=crash)
+    stream(pipeline(), output_file, CollectionCheckpoint(checkpoint_path), prefetch)
+    resumed = pd.read_csv(output_file)
+
+    assert not resumed['id'].duplicated().any()
+    assert sorted(resumed['id']) == sorted(expected['id'])
+    assert CollectionCheckpoint(checkpoint_path).get('python') == {}
@@ -0,0 +1,42 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from DataCollection import TwitterDataCollector
+from FakeTwitterAPI import FakeTwitterClient
+from RequestScheduler import RequestScheduler
+from main import TwitterSentimentPipeline
+
+
+def all_ids(client):
+    collector = TwitterDataCollector(client=client, scheduler=RequestScheduler(max_requests=10 ** 6, window_seconds=1))
+    return set(collector.collect_tweets('python', max_tweets=10 ** 6, columns=['id'])['id'])
+
+
+@pytest.mark.parametrize('streaming', [False, True])
+def test_capped_runs_fill_the_gap_below_newer_tweets(tmp_path, monkeypatch, streaming):
+    monkeypatch.setenv("METRICS_PATH", "")
+    monkeypatch.setenv("OUTPUT_DIR", str(tmp_path))
+    client = FakeTwitterClient(total_tweets=300)
+    collector = TwitterDataCollector(client=client, scheduler=RequestScheduler(max_requests=10 ** 6, window_seconds=1))
+    pipeline = TwitterSentimentPipeline({}, cache_path='', collector=collector)
+
+    def run():
+        if streaming:
+            pipeline.run_queries_streaming(['python'], max_tweets=100, save_results=False, incremental=True)
+        else:
+            pipeline.run_analysis('python', max_tweets=100, save_results=False, visualize='none', incremental=True)
+
+    # More new tweets than one run may collect: each capped run continues below the last
+    for _ in range(4):
+        run()
+    assert set(pipeline.tweet_store.load('python')['id']) == all_ids(client)
+    assert pipeline.tweet_store.gap_token('python') is None
+
+    client.total_tweets = 400
+    for _ in range(2):
+        run()
+    assert set(pipeline.tweet_store.load('python')['id']) == all_ids(client)
@@ -0,0 +1,51 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from ReplayCollection import ArchiveTweetCollector
+from ResultsStore import ResultsStore
+from main import TwitterSentimentPipeline
+
+
+def test_missing_author_id_is_stored_as_null(tmp_path):
+    store = ResultsStore(str(tmp_path / 'store'))
+    df = pd.DataFrame({
+        'id': [1, 2],
+        'text': ['great release', 'slow build'],
+        'author_id': [42, None],
+        'created_at': pd.to_datetime(['2024-01-01', '2024-01-01'], utc=True),
+        'sentiment': ['positive', 'negative'],
+        'confidence': [0.9, 0.8],
+    })
+    store.append(df, 'python')
+
+    results = store.read(columns=['id', 'author_id']).sort_values('id')
+    assert results['id'].tolist() == [1, 2]
+    assert results['author_id'].iloc[0] == 42
+    assert pd.isna(results['author_id'].iloc[1])
+
+
+def test_replay_without_author_id_into_parquet(tmp_path, monkeypatch):
+    monkeypatch.setenv("METRICS_PATH", "")
+    monkeypatch.setenv("OUTPUT_DIR", str(tmp_path))
+    monkeypatch.setenv("RESULTS_STORE_DIR", str(tmp_path / 'store'))
+    archive = tmp_path / 'archive.jsonl'
+    with open(archive, 'w', encoding='utf-8') as f:
+        for i in range(20):
+            tweet = {'id': str(1000 + i), 'text': f"python release {i} is great", 'lang': 'en',
+                     'created_at': '2024-01-01T00:00:00.000Z'}
+            if i % 2:
+                tweet['author_id'] = str(i)
+            f.write(json.dumps(tweet) + '\n')
+
+    pipeline = TwitterSentimentPipeline({}, cache_path='', collector=ArchiveTweetCollector(str(archive)),
+                                        output_format='parquet')
+    pipeline.run_analysis('python', max_tweets=100, visualize='none')
+
+    results = pipeline.results_store.read(columns=['id', 'author_id'])
+    assert len(results) == 20
+    assert results['author_id'].isna().sum() == 10